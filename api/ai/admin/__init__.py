@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from ai.models import AiCostModel
-from ai.admin import ai_cost
+from ai.models import AiCostModel, RagDocumentModel, RagChunkModel
+from ai.admin import ai_cost, rag
 
 admin.site.register(AiCostModel, ai_cost.AiCostAdmin)
+admin.site.register(RagDocumentModel, rag.RagDocumentAdmin)
+admin.site.register(RagChunkModel, rag.RagChunkAdmin)
@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+class RagDocumentAdmin(admin.ModelAdmin):
+    list_display = ["title", "user_email", "embedding_model", "created_at"]
+    list_per_page = 10
+    search_fields = ["title", "user__email"]
+    list_filter = ["embedding_model"]
+
+    def user_email(self, obj):
+        return obj.user.email if obj.user else "N/A"
+
+class RagChunkAdmin(admin.ModelAdmin):
+    list_display = ["document", "chunk_number"]
+    list_per_page = 10
+    search_fields = ["document__title", "text"]
+    exclude = ["embedding"]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-16 10:12
+
+import django.db.models.deletion
+import pgvector.django.indexes
+import pgvector.django.vector
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0003_alter_aicost_service'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RagDocument',
+            fields=[
+                ('id', models.BigAutoField(editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('embedding_model', models.CharField(default='text-embedding-3-large', max_length=255)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rag_documents', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'RAG Documents',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.CreateModel(
+            name='RagChunk',
+            fields=[
+                ('id', models.BigAutoField(editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chunk_number', models.PositiveIntegerField()),
+                ('html', models.TextField(blank=True)),
+                ('text', models.TextField(blank=True)),
+                ('embedding', pgvector.django.vector.VectorField(blank=True, dimensions=1536, null=True)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='ai.ragdocument')),
+            ],
+            options={
+                'verbose_name_plural': 'RAG Chunks',
+                'ordering': ('document', 'chunk_number'),
+                'indexes': [pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='rag_chunk_embedding_hnsw', opclasses=['vector_cosine_ops'])],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-16 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0004_ragdocument_ragchunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ragchunk',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
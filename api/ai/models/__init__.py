@@ -1,3 +1,6 @@
-from ai.models import ai_cost
+from ai.models import ai_cost, rag
 
-AiCostModel = ai_cost.AiCost
\ No newline at end of file
+AiCostModel = ai_cost.AiCost
+
+RagDocumentModel = rag.RagDocument
+RagChunkModel = rag.RagChunk
\ No newline at end of file
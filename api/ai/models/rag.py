@@ -0,0 +1,46 @@
+from django.db import models
+from pgvector.django import VectorField, HnswIndex
+
+from core.models.base_model import TimeStampedModel
+from core.models import UserModel
+
+# text-embedding-3-* vectors are shortened to this size, pgvector can not index more than 2000 dimensions.
+EMBEDDING_DIMENSIONS = 1536
+
+class RagDocument(TimeStampedModel):
+    user = models.ForeignKey(UserModel, blank=True, null=True, on_delete=models.SET_NULL, related_name="rag_documents")
+    title = models.CharField(max_length=255, blank=True)
+    embedding_model = models.CharField(max_length=255, default="text-embedding-3-large")
+    metadata = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return self.title or f"RAG Document {self.id}"
+
+    class Meta:
+        verbose_name_plural = "RAG Documents"
+        ordering = ('id',)
+
+class RagChunk(TimeStampedModel):
+    document = models.ForeignKey(RagDocument, on_delete=models.CASCADE, related_name="chunks")
+    chunk_number = models.PositiveIntegerField()
+    html = models.TextField(blank=True)
+    text = models.TextField(blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    embedding = VectorField(dimensions=EMBEDDING_DIMENSIONS, blank=True, null=True)
+    metadata = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"Chunk {self.chunk_number} of {self.document}"
+
+    class Meta:
+        verbose_name_plural = "RAG Chunks"
+        ordering = ('document', 'chunk_number')
+        indexes = [
+            HnswIndex(
+                name="rag_chunk_embedding_hnsw",
+                fields=["embedding"],
+                m=16,
+                ef_construction=64,
+                opclasses=["vector_cosine_ops"],
+            ),
+        ]
@@ -21,4 +21,29 @@ def apply_cost_task(user_ids, cost, service):
             cur_cost = AiCostModel()
             cur_cost.cost = cost
             cur_cost.service = service
-            cur_cost.save()
\ No newline at end of file
+            cur_cost.save()
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def ocr_pdf_task(self, file_path, user_ids=[], start_page=None, end_page=None, max_workers=4, use_text_layer=False):
+    """
+    OCR a PDF stored on a shared volume as a resumable job (see OCRJobManager). Pages finished before a crash
+    or a retry are read back from Redis instead of being OCR'd and billed again.
+
+    Returns:
+        str: Job ID; the result is served by OCRJobManager.get_result(job_id, start_page, end_page).
+    """
+    from django.conf import settings
+    from ai.utils.ocr_manager import OCRManager
+    from ai.utils.ocr_job_manager import OCRJobManager
+
+    ocr_manager = OCRManager(
+        google_cloud_project_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROJECT_ID,
+        google_cloud_location=settings.GOOGLE_CLOUD_DOCUMENT_AI_LOCATION,
+        google_cloud_processor_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROCESSOR_ID,
+        cur_users=UserModel.objects.filter(id__in=user_ids),
+    )
+    with open(file_path, "rb") as pdf_file:
+        pdf_bytes = pdf_file.read()
+    job_manager = OCRJobManager(ocr_manager)
+    job_manager.run(pdf_bytes, start_page=start_page, end_page=end_page, max_workers=max_workers, use_text_layer=use_text_layer)
+    return job_manager.build_job_id(pdf_bytes, use_text_layer=use_text_layer)
@@ -1,9 +1,56 @@
 import re
+import hashlib
 import random
+import asyncio
+import time
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 
 from ai.utils.chunk_manager import ChunkPipeline
+from ai.utils.cache_manager import CacheManager
 from ai.tasks import apply_cost_task
 
+# Async clients shared per event loop (loop -> {key: (client, aclose)}). Async HTTP and gRPC clients are bound to the loop
+# they were made on, so every loop gets its own. Close them with aclose_shared_clients before the loop ends.
+_loop_clients = weakref.WeakKeyDictionary()
+
+def get_loop_client(key, factory, aclose=None):
+    """
+    Return the client stored under key for the running event loop, creating it with factory on first use.
+    Must be called from a coroutine.
+
+    Args:
+        key (hashable): Name of the client, e.g. ("openai", api_key).
+        factory (callable): Builds the client.
+        aclose (callable, optional): Returns an awaitable closing the client, called by aclose_shared_clients.
+
+    Returns:
+        The shared client.
+    """
+    clients = _loop_clients.setdefault(asyncio.get_running_loop(), {})
+    if key not in clients:
+        clients[key] = (factory(), aclose)
+    return clients[key][0]
+
+async def aclose_shared_clients():
+    """
+    Close the shared async clients of the running event loop. Call it at the end of a loop that is not the server's,
+    e.g. the coroutine given to asyncio.run in a Celery task or a script. The next call on the loop opens new clients.
+
+    Example:
+        async def main():
+            try:
+                return await manager.agenerate_response(max_tokens=500, messages=messages)
+            finally:
+                await aclose_shared_clients()
+        asyncio.run(main())
+    """
+    clients = _loop_clients.pop(asyncio.get_running_loop(), {})
+    for client, aclose in clients.values():
+        if aclose:
+            await aclose(client)
+
 class BaseAIManager:
     """
     Base class for AI managers.
@@ -15,14 +62,50 @@ class BaseAIManager:
         self.cost = 0
         self.ai_type = ai_type
         self.cur_users = cur_users
+        self.last_summary_stats = {}
+        self.completion_cache = None
+        self.chunk_mode = "html_aware"
+        self._cost_lock = threading.Lock()
 
     def _apply_cost(self, cost, service):
-        self.cost += cost
+        with self._cost_lock:
+            self.cost += cost
         user_ids = []
         if self.cur_users:
             user_ids = [user.id for user in self.cur_users]
         apply_cost_task.delay(user_ids, cost, service)
 
+    async def _run_cost_off_loop(self, cost_func, *args):
+        """
+        Run a cost accounting function from async code without blocking the event loop on the Celery broker call.
+        """
+        return await asyncio.to_thread(cost_func, *args)
+
+    def _get_cached_completion(self, *key_parts):
+        if not self.completion_cache:
+            return None, None
+        key = self.completion_cache.build_key(self.ai_type, *key_parts)
+        return key, self.completion_cache.get(key)
+
+    def _set_cached_completion(self, key, response_text):
+        if self.completion_cache and key:
+            self.completion_cache.set(key, response_text)
+
+    async def _aget_cached_completion(self, *key_parts):
+        """
+        Async counterpart of _get_cached_completion: the Redis lookup runs in a thread, off the event loop.
+        """
+        if not self.completion_cache:
+            return None, None
+        return await asyncio.to_thread(self._get_cached_completion, *key_parts)
+
+    async def _aset_cached_completion(self, key, response_text):
+        """
+        Async counterpart of _set_cached_completion: the Redis write runs in a thread, off the event loop.
+        """
+        if self.completion_cache and key:
+            await asyncio.to_thread(self._set_cached_completion, key, response_text)
+
     def _clean_code_block(self, response_text):
         pattern = r"^```(?:json|html)?\n?(.*)```$"
         match = re.match(pattern, response_text.strip(), re.DOTALL)
@@ -30,6 +113,64 @@ class BaseAIManager:
             return match.group(1).strip()
         return response_text.strip()
     
+    def _run_chunk_tasks(self, chunks, task, max_concurrency=1, progress_callback=None, label="Processing chunk", start_index=0):
+        """
+        Run a task for every chunk, optionally with bounded concurrency, and return the results in chunk order.
+        Each chunk is isolated: if its task raises, the error is reported and None is returned for that chunk.
+
+        Args:
+            chunks (list): Items to process.
+            task (callable): Function called as task(i, chunk) for each chunk.
+            max_concurrency (int): Maximum number of chunks in flight at once. 1 runs sequentially. Default is 1.
+            progress_callback (callable, optional): Called as progress_callback(chunk=chunk, index=index, total=total) when a chunk starts,
+                and as progress_callback(err_msg, chunk=chunk, index=index, total=total) when a chunk fails.
+            label (str): Prefix for printed progress messages. Default is "Processing chunk".
+            start_index (int): Index reported for the first chunk. Default is 0.
+
+        Returns:
+            list: Task results in the same order as chunks (None for failed chunks).
+
+        Example:
+            results = self._run_chunk_tasks(chunks, lambda i, chunk: chunk["text"].upper(), max_concurrency=4)
+        """
+        total = len(chunks)
+
+        def run(i):
+            chunk = chunks[i]
+            index = i + start_index
+            if progress_callback:
+                progress_callback(chunk=chunk, index=index, total=total)
+            else:
+                print(f"{label} {index}/{total}")
+            try:
+                return task(i, chunk)
+            except Exception as e:
+                err_msg = f"Error in {label.lower()} {index}/{total}: {e}"
+                if progress_callback:
+                    progress_callback(err_msg, chunk=chunk, index=index, total=total)
+                else:
+                    print(err_msg)
+                return None
+
+        if not max_concurrency or max_concurrency <= 1 or total <= 1:
+            return [run(i) for i in range(total)]
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, total)) as executor:
+            return list(executor.map(run, range(total)))
+
+    def _parse_list_response(self, response):
+        try:
+            parsed = eval(response) if isinstance(response, str) else response
+        except Exception:
+            return []
+        return parsed if isinstance(parsed, list) else []
+
+    def _parse_dict_response(self, response):
+        try:
+            parsed = eval(response) if isinstance(response, str) else response
+        except Exception:
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
+
     def _random_generator(self, length=16):
         """
         Generate a random string of specified length.
@@ -70,6 +211,49 @@ class BaseAIManager:
         """
         self.cost = 0
 
+    def enable_completion_cache(self, ttl=60 * 60 * 24 * 7, max_entries=10000):
+        """
+        Enable the completion cache in front of generate_response. Identical requests (same model, messages/prompt and max_token)
+        are served from Redis without calling the API and without applying any cost.
+
+        Args:
+            ttl (int): Time to live of each cached completion in seconds. Default is 7 days.
+            max_entries (int): Maximum number of cached completions before least recently used ones are evicted. Default is 10000.
+
+        Returns:
+            None
+
+        Example:
+            manager.enable_completion_cache(ttl=3600)
+        """
+        self.completion_cache = CacheManager(namespace="ai_completion", ttl=ttl, max_entries=max_entries)
+
+    def disable_completion_cache(self):
+        """
+        Disable the completion cache.
+
+        Returns:
+            None
+
+        Example:
+            manager.disable_completion_cache()
+        """
+        self.completion_cache = None
+
+    def get_completion_cache_stats(self):
+        """
+        Get hit/miss counters of the completion cache.
+
+        Returns:
+            dict: hits, misses, evictions, hit_rate and entries; empty if the cache is not enabled.
+
+        Example:
+            stats = manager.get_completion_cache_stats()
+        """
+        if not self.completion_cache:
+            return {}
+        return self.completion_cache.get_stats()
+
     def clear_messages(self):
         """
         Clear the message history.
@@ -97,13 +281,17 @@ class BaseAIManager:
         text = chunk_pipeline.process(html_src, "get_text")
         return text
 
-    def build_chunks(self, text, max_chunk_size=1000, chunk_mode="html_aware"):
+    def build_chunks(self, text, max_chunk_size=1000, chunk_mode=None):
         """
         Chunk text into manageable pieces for processing.
         
         Args:
-            text (str): The input text to chunk.
+            text (str or list): The input text to chunk, or a typed layout (see DocAIManager.build_layout), which is chunked
+                on block boundaries without HTML parsing and keeps a 'pages' key per chunk.
             max_chunk_size (int): Maximum size of each chunk. Default is 1000.
+            chunk_mode (str): "html_aware" (fixed-size windows), "block_aligned" (windows also end at paragraph boundaries,
+                so an edit does not shift every later chunk) or "single_pass" (sentence boundaries are repaired while chunking,
+                several times faster on large documents). Default is self.chunk_mode ("html_aware").
         
         Returns:
             list: List of chunk dicts with 'html' and 'text' keys.
@@ -112,7 +300,12 @@ class BaseAIManager:
             chunks = manager.build_chunks(long_text, max_chunk_size=500)
         """
         chunk_pipeline = ChunkPipeline(max_text_chars=max_chunk_size, backtrack=300)
+        if isinstance(text, list):
+            return chunk_pipeline.process_layout(text)
+        chunk_mode = chunk_mode or self.chunk_mode
         chunks = chunk_pipeline.process(text, "get_chunks", chunk_mode)
+        if chunk_mode == "single_pass":
+            return chunks
         for i in range(len(chunks) - 1):
             head, tail = chunk_pipeline.chunker.get_incomplete_end_html_aware(chunks[i]["html"])
             if tail:
@@ -121,6 +314,39 @@ class BaseAIManager:
                 chunks[i + 1]["html"] = tail + chunks[i + 1]["html"]
                 chunks[i + 1]["text"] = self.build_simple_text_from_html(tail + chunks[i + 1]["text"])
         return chunks
+
+    def iter_chunks(self, source, max_chunk_size=1000):
+        """
+        Lazily chunk text with the single-pass engine, so processing can start on the first chunk while later input
+        is still being produced. Peak memory does not depend on the size of the document.
+
+        Args:
+            source (str, file-like or iterable): HTML string, file object, or iterable of str/bytes fragments
+                (e.g. OCRManager.iter_pdf_html).
+            max_chunk_size (int): Maximum size of each chunk. Default is 1000.
+
+        Yields:
+            dict: Chunk dicts with 'html' and 'text' keys, the same as build_chunks(..., chunk_mode="single_pass").
+
+        Example:
+            for chunk in manager.iter_chunks(ocr_manager.iter_pdf_html(pdf_bytes)):
+                print(chunk["text"])
+        """
+        chunk_pipeline = ChunkPipeline(max_text_chars=max_chunk_size, backtrack=300)
+        yield from chunk_pipeline.iter_chunks(source)
+
+    def build_content_hash(self, text):
+        """
+        Hash the whitespace-normalized text of a chunk, so re-chunked text can be matched with previous materials.
+
+        Returns:
+            str: SHA-256 hex digest.
+
+        Example:
+            content_hash = manager.build_content_hash(chunk["text"])
+        """
+        normalized = " ".join((text or "").split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
     
     def add_message(self, *args, **kwargs):
         """
@@ -136,61 +362,133 @@ class BaseAIManager:
         """
         raise NotImplementedError("Subclasses must implement generate_response.")
     
-    def summarize(self, text, max_length=1000, max_chunk_size=1000, progress_callback=None):
+    def _summarize_chunks(self, chunks, summarize_step, strategy="rolling", fan_in=2, max_concurrency=1, progress_callback=None):
+        """
+        Reduce a list of chunks to a single summary with the given strategy and record run statistics in self.last_summary_stats.
+
+        Strategies:
+        - "rolling": fold the running summary into every next chunk (sequential, depth equals the number of chunks).
+        - "tree": summarize all leaf chunks in parallel, then merge summaries fan_in at a time until one remains.
+
+        Args:
+            chunks (list): List of chunk dicts with a 'text' key.
+            summarize_step (callable): Function that receives an input text and returns its summary.
+            strategy (str): "rolling" or "tree". Default is "rolling".
+            fan_in (int): Number of summaries merged per call in "tree" mode. Default is 2.
+            max_concurrency (int): Maximum number of parallel calls in "tree" mode. Default is 1.
+            progress_callback (callable, optional): Called as progress_callback(chunk=chunk, index=i, total=total) for each chunk.
+
+        Returns:
+            str: The final summary.
+        """
+        start_time = time.time()
+        start_cost = self.cost
+        if strategy == "rolling":
+            summary = ""
+            for i, chunk in enumerate(chunks, start=1):
+                if progress_callback:
+                    progress_callback(chunk=chunk, index=i, total=len(chunks))
+                else:
+                    print(f"Processing chunk {i}/{len(chunks)}")
+                input_text = (summary + "\n" + chunk["text"]).strip() if summary else chunk["text"]
+                summary = summarize_step(input_text)
+            depth = len(chunks)
+            calls = len(chunks)
+            used_fan_in = 2
+        elif strategy == "tree":
+            if fan_in < 2:
+                raise ValueError("fan_in must be at least 2 for the tree summary strategy.")
+            leaves = self._run_chunk_tasks(chunks, lambda i, chunk: summarize_step(chunk["text"]), max_concurrency=max_concurrency, progress_callback=progress_callback, label="Processing chunk", start_index=1)
+            level = [leaf for leaf in leaves if leaf]
+            depth = 1
+            calls = len(chunks)
+            while len(level) > 1:
+                groups = [level[j:j + fan_in] for j in range(0, len(level), fan_in)]
+
+                def merge_group(i, group):
+                    if len(group) == 1:
+                        return group[0]
+                    return summarize_step("\n".join(group))
+
+                merged = self._run_chunk_tasks(groups, merge_group, max_concurrency=max_concurrency, label=f"Merging summaries (level {depth + 1})", start_index=1)
+                calls += sum(1 for group in groups if len(group) > 1)
+                level = [result if result else "\n".join(group) for result, group in zip(merged, groups)]
+                depth += 1
+            summary = level[0] if level else ""
+            used_fan_in = fan_in
+        else:
+            raise ValueError(f"Unknown summary strategy: {strategy}. Options are 'rolling', 'tree'.")
+        self.last_summary_stats = {
+            "strategy": strategy,
+            "leaves": len(chunks),
+            "depth": depth,
+            "fan_in": used_fan_in,
+            "calls": calls,
+            "cost": self.cost - start_cost,
+            "elapsed_seconds": time.time() - start_time,
+        }
+        return summary
+
+    def summarize(self, text, max_length=1000, max_chunk_size=1000, progress_callback=None, strategy="rolling", fan_in=2, max_concurrency=1):
         """
-        Iteratively summarize a long text by processing it chunk by chunk and accumulating the summary.
-        For each chunk, the method combines the previous summary (if any) with the current chunk and asks the AI model to summarize them together.
-        This process continues for all chunks, so the summary grows and evolves as more of the text is processed.
+        Summarize a long text chunk by chunk.
+
+        With strategy="rolling" (default), the method combines the previous summary (if any) with the current chunk and asks the AI model to summarize them together,
+        so the summary grows and evolves as more of the text is processed.
+        With strategy="tree", all chunks are summarized independently (in parallel up to max_concurrency) and the partial summaries are then merged fan_in at a time until one remains.
+        Depth, fan-in, number of calls, cost and elapsed time of the run are stored in self.last_summary_stats.
 
         Args:
             text (str): The text to summarize.
             max_length (int): Maximum number of tokens for each summary step. Default is 1000.
             max_chunk_size (int): Maximum size of each chunk. Default is 1000.
+            strategy (str): "rolling" or "tree". Default is "rolling".
+            fan_in (int): Number of summaries merged per call in "tree" mode. Default is 2.
+            max_concurrency (int): Maximum number of parallel calls in "tree" mode. Default is 1.
 
         Returns:
-            str: The final accumulated summary of the entire text.
+            str: The final summary of the entire text.
 
         Example:
             summary = manager.summarize(long_text)
+            summary = manager.summarize(long_text, strategy="tree", fan_in=4, max_concurrency=8)
+            print(manager.last_summary_stats)
         """
         if len(text) <= max_length:
+            self.last_summary_stats = {"strategy": strategy, "leaves": 0, "depth": 0, "fan_in": 0, "calls": 0, "cost": 0, "elapsed_seconds": 0}
             return text
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        summary = ""
-        i = 0
-        for chunk in chunks:
-            i += 1
-            msg = f"Processing chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
-            input_text = (summary + "\n" + chunk["text"]).strip() if summary else chunk["text"]
+
+        def summarize_step(input_text):
             messages = [
                 {"role": "system", "content": "You are a summarization expert. Summarize the following text."},
                 {"role": "user", "content": input_text}
             ]
             prompt = f"Summarize the following text in at most {max_length} tokens:\n\n{input_text}"
             if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_length, messages=messages)
+                return self.generate_response(max_token=max_length, messages=messages)
             elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_length, prompt=prompt)
-            summary = response
-        return summary
+                return self.generate_response(max_token=max_length, prompt=prompt)
+
+        return self._summarize_chunks(chunks, summarize_step, strategy=strategy, fan_in=fan_in, max_concurrency=max_concurrency, progress_callback=progress_callback)
     
-    def summarize_for_translation(self, text, max_length=1000, max_chunk_size=1000, progress_callback=None):
+    def summarize_for_translation(self, text, max_length=1000, max_chunk_size=1000, progress_callback=None, strategy="rolling", fan_in=2, max_concurrency=1):
         """
-        Iteratively summarize and interpret a long text chunk by chunk, accumulating summary and clarifications for translation.
-        For each chunk, instruct the AI to:
+        Summarize and interpret a long text chunk by chunk, accumulating summary and clarifications for translation.
+        For each step, instruct the AI to:
         - Summarize the chunk and previous summary.
         - Identify any ambiguous phrases or unclear meanings and note them.
         - If context from later chunks clarifies previous ambiguities, update the summary to reflect the improved understanding.
         This helps the translation process by tracking and clarifying phrases as more context is available.
+        See summarize for the "rolling" and "tree" strategies.
 
         Args:
             text (str): The text to summarize and interpret for translation.
             max_length (int): Maximum number of tokens for each summary step. Default is 1000.
             max_chunk_size (int): Maximum size of each chunk. Default is 1000.
+            strategy (str): "rolling" or "tree". Default is "rolling".
+            fan_in (int): Number of summaries merged per call in "tree" mode. Default is 2.
+            max_concurrency (int): Maximum number of parallel calls in "tree" mode. Default is 1.
 
         Returns:
             str: The final accumulated summary and clarifications for translation.
@@ -199,18 +497,11 @@ class BaseAIManager:
             summary = manager.summarize_for_translation(long_text)
         """
         if len(text) <= max_length:
+            self.last_summary_stats = {"strategy": strategy, "leaves": 0, "depth": 0, "fan_in": 0, "calls": 0, "cost": 0, "elapsed_seconds": 0}
             return text
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        summary = ""
-        i = 0
-        for chunk in chunks:
-            i += 1
-            msg = f"Processing chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
-            input_text = (summary + "\n" + chunk["text"]).strip() if summary else chunk["text"]
+
+        def summarize_step(input_text):
             system_prompt = (
                 "You are a translation assistant. The purpose of this summarization is to provide hints and context needed for better translation of words, phrases, and expressions used in the text, not a general summary. "
                 "For the following text, do the following: "
@@ -231,26 +522,30 @@ class BaseAIManager:
                 "If you are suspicious about a word due to OCR errors, mention it, suggest the correct word, and write it in ALL UPPERCASE for highlighting.\n\n{input_text}"
             )
             if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_length, messages=messages)
+                return self.generate_response(max_token=max_length, messages=messages)
             elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_length, prompt=prompt)
-            summary = response
-        return summary
+                return self.generate_response(max_token=max_length, prompt=prompt)
+
+        return self._summarize_chunks(chunks, summarize_step, strategy=strategy, fan_in=fan_in, max_concurrency=max_concurrency, progress_callback=progress_callback)
     
-    def summarize_for_manipulation(self, text, manipulation_type="improve_fluency", max_length=1000, max_chunk_size=1000, progress_callback=None):
+    def summarize_for_manipulation(self, text, manipulation_type="improve_fluency", max_length=1000, max_chunk_size=1000, progress_callback=None, strategy="rolling", fan_in=2, max_concurrency=1):
         """
         Build a summary and guidance for AI to manipulate documentation, with options for tone, style, and improvement hints.
-        For each chunk, instruct the AI to:
+        For each step, instruct the AI to:
         - Summarize the chunk and previous summary.
         - Identify weaknesses, areas for improvement, and provide actionable hints.
         - Suggest how to change tone, style, or structure based on manipulation_type (e.g., academic, formal, informal, conversational, poetic, improve fluency, add citations, etc).
         - Track and update guidance as more context is available.
+        See summarize for the "rolling" and "tree" strategies.
 
         Args:
             text (str): The text to summarize and guide for manipulation.
             manipulation_type (str): Desired manipulation style (e.g., 'academic', 'formal', 'informal', 'conversational', 'poetic', 'improve_fluency', 'add_citations').
             max_length (int): Maximum number of tokens for each summary step. Default is 1000.
             max_chunk_size (int): Maximum size of each chunk. Default is 1000.
+            strategy (str): "rolling" or "tree". Default is "rolling".
+            fan_in (int): Number of summaries merged per call in "tree" mode. Default is 2.
+            max_concurrency (int): Maximum number of parallel calls in "tree" mode. Default is 1.
 
         Returns:
             str: The final accumulated summary and manipulation guidance.
@@ -259,18 +554,11 @@ class BaseAIManager:
             summary = manager.summarize_for_manipulation(long_text, manipulation_type='academic')
         """
         if len(text) <= max_length:
+            self.last_summary_stats = {"strategy": strategy, "leaves": 0, "depth": 0, "fan_in": 0, "calls": 0, "cost": 0, "elapsed_seconds": 0}
             return text
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        summary = ""
-        i = 0
-        for chunk in chunks:
-            i += 1
-            msg = f"Processing chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
-            input_text = (summary + "\n" + chunk["text"]).strip() if summary else chunk["text"]
+
+        def summarize_step(input_text):
             system_prompt = (
                 f"You are a documentation improvement assistant. The purpose of this summarization is to provide hints and guidance for manipulating the text to better match the desired style: {manipulation_type}. "
                 "For the following text, do the following: "
@@ -296,13 +584,13 @@ class BaseAIManager:
                 "Identify weaknesses and suggest improvements as context improves.\n\n{input_text}"
             )
             if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_length, messages=messages)
+                return self.generate_response(max_token=max_length, messages=messages)
             elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_length, prompt=prompt)
-            summary = response
-        return summary
+                return self.generate_response(max_token=max_length, prompt=prompt)
+
+        return self._summarize_chunks(chunks, summarize_step, strategy=strategy, fan_in=fan_in, max_concurrency=max_concurrency, progress_callback=progress_callback)
 
-    def translate(self, text, target_language, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_length_for_translation_summary=5000, max_chunk_size_for_translation_summary=15000, max_chunk_size=1000, max_translation_tokens=5000, progress_callback=None):
+    def translate(self, text, target_language, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_length_for_translation_summary=5000, max_chunk_size_for_translation_summary=15000, max_chunk_size=1000, max_translation_tokens=5000, progress_callback=None, max_concurrency=1):
         """
         Translate text to the target language using context-aware chunking and translation.
 
@@ -323,23 +611,19 @@ class BaseAIManager:
             max_chunk_size_for_translation_summary (int): Maximum chunk size for translation summary. Default is 15000.
             max_chunk_size (int): Maximum size of each chunk for translation. Default is 1000.
             max_translation_tokens (int): Maximum tokens for each translation step. Default is 5000.
+            max_concurrency (int): Maximum number of chunks translated in parallel. Default is 1 (sequential).
 
         Returns:
             str: The translated text.
 
         Example:
-            translated = manager.translate(text, target_language='en')
+            translated = manager.translate(text, target_language='en', max_concurrency=8)
         """
         general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
         translation_summary = self.summarize_for_translation(text, max_length=max_length_for_translation_summary, max_chunk_size=max_chunk_size_for_translation_summary)
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        translated_chunks = []
-        for i, chunk in enumerate(chunks):
-            msg = f"Translating chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
+
+        def translate_chunk(i, chunk):
             previous_chunk = chunks[i-1]["html"] if i > 0 else ""
             cur_chunk = chunk["html"]
             next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
@@ -362,7 +646,7 @@ class BaseAIManager:
                 )}
             ]
             if self.ai_type == "open_ai":
-                translated = self.generate_response(max_token=max_translation_tokens, messages=messages)
+                return self.generate_response(max_token=max_translation_tokens, messages=messages)
             elif self.ai_type == "google":
                 prompt = (
                     f"{system_prompt}\n"
@@ -372,9 +656,10 @@ class BaseAIManager:
                     f"Current chunk: {cur_chunk}\n"
                     f"Next chunk: {next_chunk}\n"
                 )
-                translated = self.generate_response(max_token=max_translation_tokens, prompt=prompt)
-            translated_chunks.append(translated)
-        return "".join(translated_chunks)
+                return self.generate_response(max_token=max_translation_tokens, prompt=prompt)
+
+        translated_chunks = self._run_chunk_tasks(chunks, translate_chunk, max_concurrency=max_concurrency, progress_callback=progress_callback, label="Translating chunk")
+        return "".join(translated or "" for translated in translated_chunks)
 
     def manipulate_text(self, text, manipulation_type="improve_fluency", target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_length_for_manipulation_summary=5000, max_chunk_size_for_manipulation_summary=15000, max_chunk_size=1000, max_manipulation_tokens=5000, progress_callback=None):
         """
@@ -458,7 +743,7 @@ class BaseAIManager:
             joint_manipulated_summary = self.summarize(joint_manipulated_summary)
         return "".join(manipulated_chunks)
 
-    def generate_q_and_a_from_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_q_and_a_tokens=5000, progress_callback=None):
+    def generate_q_and_a_from_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_q_and_a_tokens=5000, progress_callback=None, max_concurrency=1):
         """
         Generate Q&A pairs from the text to help people understand the context, prepare for exams/interviews, and cover important concepts.
 
@@ -476,6 +761,7 @@ class BaseAIManager:
             max_chunk_size_for_general_summary (int): Max chunk size for general summary. Default 15000.
             max_chunk_size (int): Max size of each chunk for Q&A. Default 1000.
             max_q_and_a_tokens (int): Max tokens for each Q&A step. Default 2000.
+            max_concurrency (int): Max number of chunks processed in parallel. Default 1 (sequential).
 
         Returns:
             list: List of Q&A dicts for all chunks.
@@ -485,13 +771,8 @@ class BaseAIManager:
         """
         general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        all_q_and_a = []
-        for i, chunk in enumerate(chunks):
-            msg = f"Generating Q&A for chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
+
+        def process_chunk(i, chunk):
             previous_chunk = chunks[i-1]["html"] if i > 0 else ""
             cur_chunk = chunk["html"]
             next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
@@ -521,19 +802,17 @@ class BaseAIManager:
                 f"Next chunk: {next_chunk}\n"
             )
             if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_q_and_a_tokens, messages=messages)
+                return self.generate_response(max_token=max_q_and_a_tokens, messages=messages)
             elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_q_and_a_tokens, prompt=prompt)
-            try:
-                q_and_a_list = eval(response) if isinstance(response, str) else response
-                if not isinstance(q_and_a_list, list):
-                    q_and_a_list = []
-            except Exception:
-                q_and_a_list = []
-            all_q_and_a.extend(q_and_a_list)
+                return self.generate_response(max_token=max_q_and_a_tokens, prompt=prompt)
+
+        responses = self._run_chunk_tasks(chunks, process_chunk, max_concurrency=max_concurrency, progress_callback=progress_callback, label="Generating Q&A for chunk")
+        all_q_and_a = []
+        for response in responses:
+            all_q_and_a.extend(self._parse_list_response(response))
         return all_q_and_a
     
-    def generate_multiple_choice_questions_from_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_mcq_tokens=5000, progress_callback=None):
+    def generate_multiple_choice_questions_from_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_mcq_tokens=5000, progress_callback=None, max_concurrency=1):
         """
         Generate multiple-choice questions (MCQs) from the text. Each question has 4 options, only one valid answer.
 
@@ -557,6 +836,7 @@ class BaseAIManager:
             max_chunk_size_for_general_summary (int): Max chunk size for general summary. Default 15000.
             max_chunk_size (int): Max size of each chunk for MCQ. Default 2500.
             max_mcq_tokens (int): Max tokens for each MCQ step. Default 5000.
+            max_concurrency (int): Max number of chunks processed in parallel. Default 1 (sequential).
 
         Returns:
             list: List of MCQ dicts for all chunks.
@@ -566,13 +846,8 @@ class BaseAIManager:
         """
         general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        all_mcq = []
-        for i, chunk in enumerate(chunks):
-            msg = f"Generating MCQ for chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
+
+        def process_chunk(i, chunk):
             previous_chunk = chunks[i-1]["html"] if i > 0 else ""
             cur_chunk = chunk["html"]
             next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
@@ -604,19 +879,17 @@ class BaseAIManager:
                 f"Next chunk: {next_chunk}\n"
             )
             if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_mcq_tokens, messages=messages)
+                return self.generate_response(max_token=max_mcq_tokens, messages=messages)
             elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_mcq_tokens, prompt=prompt)
-            try:
-                mcq_list = eval(response) if isinstance(response, str) else response
-                if not isinstance(mcq_list, list):
-                    mcq_list = []
-            except Exception:
-                mcq_list = []
-            all_mcq.extend(mcq_list)
+                return self.generate_response(max_token=max_mcq_tokens, prompt=prompt)
+
+        responses = self._run_chunk_tasks(chunks, process_chunk, max_concurrency=max_concurrency, progress_callback=progress_callback, label="Generating MCQ for chunk")
+        all_mcq = []
+        for response in responses:
+            all_mcq.extend(self._parse_list_response(response))
         return all_mcq
     
-    def build_teaching_content_for_a_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_teaching_tokens=5000, progress_callback=None):
+    def build_teaching_content_for_a_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_teaching_tokens=5000, progress_callback=None, max_concurrency=1):
         """
         Build teaching content for a text. For each chunk, generate:
         {
@@ -633,6 +906,7 @@ class BaseAIManager:
             max_chunk_size_for_general_summary (int): Max chunk size for general summary. Default 15000.
             max_chunk_size (int): Max size of each chunk for teaching. Default 2500.
             max_teaching_tokens (int): Max tokens for each teaching step. Default 5000.
+            max_concurrency (int): Max number of chunks processed in parallel. Default 1 (sequential).
 
         Returns:
             list: List of teaching content dicts for all chunks.
@@ -642,13 +916,8 @@ class BaseAIManager:
         """
         general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        all_teaching_content = []
-        for i, chunk in enumerate(chunks):
-            msg = f"Generating teaching content for chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
+
+        def process_chunk(i, chunk):
             previous_chunk = chunks[i-1]["html"] if i > 0 else ""
             cur_chunk = chunk["html"]
             next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
@@ -679,19 +948,15 @@ class BaseAIManager:
                 f"Next chunk: {next_chunk}\n"
             )
             if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_teaching_tokens, messages=messages)
+                return self.generate_response(max_token=max_teaching_tokens, messages=messages)
             elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_teaching_tokens, prompt=prompt)
-            try:
-                teaching_content = eval(response) if isinstance(response, str) else response
-                if not isinstance(teaching_content, dict):
-                    teaching_content = {}
-            except Exception:
-                teaching_content = {}
-            all_teaching_content.append(teaching_content)
+                return self.generate_response(max_token=max_teaching_tokens, prompt=prompt)
+
+        responses = self._run_chunk_tasks(chunks, process_chunk, max_concurrency=max_concurrency, progress_callback=progress_callback, label="Generating teaching content for chunk")
+        all_teaching_content = [self._parse_dict_response(response) for response in responses]
         return all_teaching_content
     
-    def build_advanced_teaching_content_for_a_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_teaching_tokens=5000, progress_callback=None):
+    def build_advanced_teaching_content_for_a_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_teaching_tokens=5000, progress_callback=None, max_concurrency=1):
         """
         Build advanced teaching content for a text. For each chunk, generate:
         {
@@ -708,19 +973,15 @@ class BaseAIManager:
             max_chunk_size_for_general_summary (int): Max chunk size for general summary. Default 15000.
             max_chunk_size (int): Max size of each chunk for teaching. Default 2500.
             max_teaching_tokens (int): Max tokens for each teaching step. Default 5000.
+            max_concurrency (int): Max number of chunks processed in parallel. Default 1 (sequential).
 
         Returns:
             list: List of advanced teaching content dicts for all chunks.
         """
         general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        all_advanced_content = []
-        for i, chunk in enumerate(chunks):
-            msg = f"Generating advanced teaching content for chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
+
+        def process_chunk(i, chunk):
             previous_chunk = chunks[i-1]["html"] if i > 0 else ""
             cur_chunk = chunk["html"]
             next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
@@ -753,15 +1014,11 @@ class BaseAIManager:
                 f"Next chunk: {next_chunk}\n"
             )
             if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_teaching_tokens, messages=messages)
+                return self.generate_response(max_token=max_teaching_tokens, messages=messages)
             elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_teaching_tokens, prompt=prompt)
-            try:
-                advanced_content = eval(response) if isinstance(response, str) else response
-                if not isinstance(advanced_content, dict):
-                    advanced_content = {}
-            except Exception:
-                advanced_content = {}
-            all_advanced_content.append(advanced_content)
+                return self.generate_response(max_token=max_teaching_tokens, prompt=prompt)
+
+        responses = self._run_chunk_tasks(chunks, process_chunk, max_concurrency=max_concurrency, progress_callback=progress_callback, label="Generating advanced teaching content for chunk")
+        all_advanced_content = [self._parse_dict_response(response) for response in responses]
         return all_advanced_content
         
\ No newline at end of file
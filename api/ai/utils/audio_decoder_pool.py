@@ -0,0 +1,273 @@
+import io
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+try:
+    import av  # PyAV, optional in-process decoder backend
+except ImportError:
+    av = None
+
+# MP4 containers may keep their index (moov atom) at the end of the file, so ffmpeg needs a seekable input for them
+SEEKABLE_INPUT_FORMATS = ("m4a",)
+
+def build_ffmpeg_command(input_name, filter_chain=None, sample_rate=16000, channels=1):
+    """
+    Returns the ffmpeg command decoding input_name ("pipe:0" for stdin) to raw 16-bit PCM on stdout.
+    The audio is resampled before the filter chain, so the filters run on the output rate and channels.
+    """
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    if input_name != "pipe:0":
+        cmd.append("-nostdin")
+    cmd += ["-i", input_name]
+    if filter_chain:
+        layout = {1: "mono", 2: "stereo"}.get(channels)
+        if layout:
+            filter_chain = f"aformat=sample_rates={sample_rate}:channel_layouts={layout},{filter_chain}"
+        cmd += ["-af", filter_chain]
+    return cmd + ["-ar", str(sample_rate), "-ac", str(channels), "-f", "s16le", "pipe:1"]
+
+def run_ffmpeg(audio_bytes, input_format=None, filter_chain=None, sample_rate=16000, channels=1, timeout=None, process=None,
+               on_start=None):
+    """
+    Decodes audio bytes to raw 16-bit PCM with one ffmpeg process, writing the input to its stdin and reading stdout.
+    M4A input (see SEEKABLE_INPUT_FORMATS) is written to a temp file instead.
+
+    Args:
+        audio_bytes (bytes): Input audio data.
+        input_format (str, optional): 'webm', 'mp3', 'wav' or 'm4a'. Only used to pick stdin or a temp file.
+        filter_chain (str, optional): ffmpeg audio filter chain (-af).
+        sample_rate (int): Output sample rate (default: 16000).
+        channels (int): Output channels (default: 1).
+        timeout (float, optional): Seconds before ffmpeg is killed and TimeoutError raised.
+        process (Popen, optional): An ffmpeg already started with build_ffmpeg_command("pipe:0", ...) and waiting on stdin.
+        on_start (callable, optional): Called with the ffmpeg process before the input is written, e.g. to kill it from another thread.
+
+    Returns:
+        bytes: Raw PCM (s16le).
+    """
+    if input_format in SEEKABLE_INPUT_FORMATS:
+        with tempfile.NamedTemporaryFile(suffix=f".{input_format}") as in_file:
+            in_file.write(audio_bytes)
+            in_file.flush()
+            cmd = build_ffmpeg_command(in_file.name, filter_chain, sample_rate, channels)
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if on_start:
+                on_start(process)
+            return _communicate(process, None, timeout)
+    if process is None:
+        cmd = build_ffmpeg_command("pipe:0", filter_chain, sample_rate, channels)
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if on_start:
+        on_start(process)
+    return _communicate(process, audio_bytes, timeout)
+
+def _communicate(process, audio_bytes, timeout):
+    try:
+        stdout, stderr = process.communicate(input=audio_bytes, timeout=timeout)
+    except (subprocess.TimeoutExpired, BrokenPipeError):
+        # BrokenPipeError: the process was killed from another thread while its input was written
+        process.kill()
+        process.communicate()
+        raise TimeoutError(f"ffmpeg did not finish in {timeout:.3g}s")
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg conversion failed: {stderr.decode()}")
+    return stdout
+
+class AudioDecoderPool:
+    def __init__(self, backend="ffmpeg", max_workers=4, max_pending=32, timeout=120, warm_processes=1):
+        """
+        Decodes audio for AudioManager with bounded concurrency: at most max_workers decodes run at once, up to max_pending
+        more wait in the queue, and every job has a timeout.
+
+        Backends:
+            - "ffmpeg": one ffmpeg process per job (ffmpeg cannot decode several inputs in one run), but warm_processes
+              processes per command are started ahead of time and wait on stdin, so a job does not pay for ffmpeg's startup.
+              A job's ffmpeg is killed when the caller times out.
+            - "pyav": decodes and filters in-process with PyAV (pip install av), with no process at all.
+              A PyAV job cannot be interrupted: on timeout the caller gets TimeoutError and the job finishes in the background.
+
+        Args:
+            backend (str): "ffmpeg" (default) or "pyav".
+            max_workers (int): Number of decodes running in parallel. Default is 4 (about one per CPU core).
+            max_pending (int): Number of jobs waiting for a worker before transcode blocks. Default is 32.
+            timeout (float): Seconds a job may wait and run before TimeoutError is raised. Default is 120.
+            warm_processes (int): Idle ffmpeg processes kept started per command (ffmpeg backend). Default is 1, 0 disables it.
+
+        Example:
+            decoder_pool = AudioDecoderPool(backend="ffmpeg", max_workers=4)
+            audio_manager = AudioManager(decoder_pool=decoder_pool)
+            wav_bytes = audio_manager.convert_webm_to_wav(webm_bytes)
+        """
+        if backend not in ("ffmpeg", "pyav"):
+            raise ValueError(f"Unknown audio decoder backend: {backend}")
+        if backend == "pyav" and av is None:
+            raise ImportError("The pyav backend needs PyAV (pip install av)")
+        self.backend = backend
+        self.timeout = timeout
+        self.warm_processes = warm_processes
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._warm = {}  # ffmpeg command -> idle processes waiting on stdin
+        self._spawner = ThreadPoolExecutor(max_workers=1)  # starts warm processes off the jobs' critical path
+        self.stats = {"jobs": 0, "failed": 0, "timeouts": 0, "warm_hits": 0}
+
+    def transcode(self, audio_bytes, input_format=None, filter_chain=None, sample_rate=16000, channels=1, timeout=None):
+        """
+        Decodes audio bytes to raw 16-bit PCM on a worker of the pool.
+
+        Args:
+            audio_bytes (bytes): Input audio data in WebM/Opus, MP3, WAV, or M4A format.
+            input_format (str, optional): 'webm', 'mp3', 'wav' or 'm4a' (see AudioManager.detect_audio_format).
+            filter_chain (str, optional): ffmpeg audio filter chain, e.g. PREPROCESS_FILTER_CHAIN. Filters are separated by commas.
+            sample_rate (int): Output sample rate (default: 16000).
+            channels (int): Output channels (default: 1).
+            timeout (float, optional): Overrides the pool timeout for this job.
+
+        Returns:
+            bytes: Raw PCM (s16le).
+
+        Raises:
+            TimeoutError: The queue stayed full, or the job did not finish in time.
+            RuntimeError: The audio could not be decoded.
+        """
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("Audio decoder queue is full")
+        job = {"process": None, "timed_out": False}
+        try:
+            future = self.executor.submit(self._run_job, job, audio_bytes, input_format, filter_chain, sample_rate, channels, deadline)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            if future.done():
+                raise  # ffmpeg itself was killed on timeout
+            future.cancel()
+            self._time_out(job)
+            raise TimeoutError(f"Audio decoding did not finish in {timeout}s")
+
+    def _run_job(self, job, audio_bytes, input_format, filter_chain, sample_rate, channels, deadline):
+        with self._lock:
+            self.stats["jobs"] += 1
+        try:
+            if self.backend == "pyav":
+                return self._decode_pyav(audio_bytes, filter_chain, sample_rate, channels)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Audio decoding timed out in the queue")
+            process = None
+            if self.warm_processes and input_format not in SEEKABLE_INPUT_FORMATS:
+                process = self._take_warm_process(build_ffmpeg_command("pipe:0", filter_chain, sample_rate, channels))
+            return run_ffmpeg(audio_bytes, input_format, filter_chain, sample_rate, channels, timeout=remaining, process=process,
+                              on_start=lambda started: self._attach_process(job, started))
+        except Exception as e:
+            with self._lock:
+                self.stats["failed"] += 1
+            if isinstance(e, TimeoutError):
+                self._time_out(job)
+            raise
+
+    def _attach_process(self, job, process):
+        with self._lock:
+            job["process"] = process
+            timed_out = job["timed_out"]
+        if timed_out:
+            process.kill()  # the caller gave up before ffmpeg started
+
+    def _time_out(self, job):
+        """
+        Counts a job's timeout once (the caller and the job may both see it) and kills its ffmpeg.
+        """
+        with self._lock:
+            if job["timed_out"]:
+                return
+            job["timed_out"] = True
+            self.stats["timeouts"] += 1
+            process = job["process"]
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def _spawn(self, cmd):
+        return subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def _take_warm_process(self, cmd):
+        """
+        Returns an idle ffmpeg started for cmd (or a new one) and has its replacement started in the background.
+        """
+        key = tuple(cmd)
+        process = None
+        with self._lock:
+            idle = self._warm.setdefault(key, [])
+            while idle and process is None:
+                candidate = idle.pop()
+                if candidate.poll() is None:
+                    process = candidate
+                    self.stats["warm_hits"] += 1
+        try:
+            self._spawner.submit(self._refill_warm_processes, cmd)
+        except RuntimeError:
+            pass  # the pool is closing
+        return process or self._spawn(cmd)
+
+    def _refill_warm_processes(self, cmd):
+        key = tuple(cmd)
+        with self._lock:
+            missing = self.warm_processes - len(self._warm.get(key, []))
+        spares = [self._spawn(cmd) for _ in range(missing)]
+        with self._lock:
+            self._warm.setdefault(key, []).extend(spares)
+
+    def _decode_pyav(self, audio_bytes, filter_chain, sample_rate, channels):
+        layout = "mono" if channels == 1 else "stereo"
+        filters = [f"aformat=sample_rates={sample_rate}:channel_layouts={layout}"]
+        filters += filter_chain.split(",") if filter_chain else []
+        filters.append(f"aformat=sample_fmts=s16:sample_rates={sample_rate}:channel_layouts={layout}")
+        pcm = []
+        try:
+            with av.open(io.BytesIO(audio_bytes)) as container:
+                stream = container.streams.audio[0]
+                graph = av.filter.Graph()
+                nodes = [graph.add_abuffer(template=stream)]
+                for spec in filters:
+                    name, _, args = spec.partition("=")
+                    nodes.append(graph.add(name, args or None))
+                nodes.append(graph.add("abuffersink"))
+                graph.link_nodes(*nodes).configure()
+
+                def pull():
+                    while True:
+                        try:
+                            frame = graph.pull()
+                        except (BlockingIOError, EOFError):
+                            return
+                        pcm.append(frame.to_ndarray().tobytes())
+
+                for frame in container.decode(stream):
+                    graph.push(frame)
+                    pull()
+                graph.push(None)
+                pull()
+        except (av.error.FFmpegError, IndexError) as e:
+            raise RuntimeError(f"PyAV conversion failed: {e}")
+        return b"".join(pcm)
+
+    def close(self):
+        """
+        Stops the workers and the idle ffmpeg processes.
+        """
+        self.executor.shutdown(wait=True)
+        self._spawner.shutdown(wait=True)
+        with self._lock:
+            processes = [process for idle in self._warm.values() for process in idle]
+            self._warm.clear()
+        for process in processes:
+            process.kill()
+            process.communicate()
@@ -2,18 +2,40 @@ from unittest import result
 from django.conf import settings
 import wave
 import io
-import subprocess
-import tempfile
 import uuid
+import re
+import bisect
+from types import SimpleNamespace
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from ai.utils.open_ai_manager import OpenAIManager
+from ai.utils.audio_decoder_pool import run_ffmpeg
+
+# Noise reduction, bandpass, amplitude normalization, volume boost, silence removal
+PREPROCESS_FILTER_CHAIN = "afftdn,highpass=f=300,lowpass=f=3400,dynaudnorm,volume=3dB,silenceremove=stop_periods=-1:stop_duration=1:stop_threshold=-50dB"
+
+STT_FIXER_PROMPT = (
+    "You are a text fixer for speech-to-text (STT) outputs of the user. "
+    "cur_chunk is the USER MESSAGE and may contain transcription errors, misheard words, or awkward phrasing. "
+    "TASK: CORRECT ONLY cur_chunk (USER MESSAGE) IF NEEDED TO MAKE IT CLEARER, GRAMMATICALLY FIXED, and NATURAL, "
+    "while strictly preserving the original meaning, style, and approximate length of cur_chunk. "
+    "Do NOT add new sentences, explanations, or unrelated details to cur_chunk. "
+    "If the input of cur_chunk is already correct, return the original text EXACTLY as received, without any change, copy, or reformulation."
+)
+
 class AudioManager:
-    def __init__(self):
+    def __init__(self, decoder_pool=None):
         """DOC
         Initializes the AudioManager instance.
-        No arguments.
+
+        Args:
+            decoder_pool (AudioDecoderPool, optional): Pool running the ffmpeg/PyAV decodes of this manager with bounded
+                concurrency and timeouts. Can be shared by several managers. If None, each decode starts its own ffmpeg.
         """
+        self.decoder_pool = decoder_pool
         self.open_ai_manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
+        self.last_segmentation_stats = {}
 
     def preprocess_wav(self, wav_bytes):
         """DOC
@@ -25,23 +47,64 @@ class AudioManager:
         Returns:
             bytes: The preprocessed audio data in WAV format.
         """
-        with tempfile.NamedTemporaryFile(suffix=".wav") as in_file, \
-            tempfile.NamedTemporaryFile(suffix=".wav") as out_file:
-            in_file.write(wav_bytes)
-            in_file.flush()
-            # Enhanced filter chain: noise reduction, bandpass, amplitude normalization, volume boost, silence removal
-            filter_chain = "afftdn,highpass=f=300,lowpass=f=3400,dynaudnorm,volume=3dB,silenceremove=stop_periods=-1:stop_duration=1:stop_threshold=-50dB"
-            cmd = [
-                "ffmpeg", "-y", "-i", in_file.name,
-                "-af", filter_chain,
-                "-ar", "16000", "-ac", "1", "-f", "wav", out_file.name
-            ]
-            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            if result.returncode != 0:
-                raise RuntimeError(f"ffmpeg preprocessing failed: {result.stderr.decode()}")
-            out_file.seek(0)
-            return out_file.read()
-    
+        return self.transcode_to_wav(wav_bytes, input_format="wav", filter_chain=PREPROCESS_FILTER_CHAIN)
+
+    def detect_audio_format(self, audio_bytes):
+        """
+        Guesses the format of audio bytes from their magic numbers.
+
+        Returns:
+            str: 'wav', 'mp3', 'webm' or 'm4a' ('webm' if unknown).
+        """
+        if audio_bytes[:4] == b'RIFF':
+            return 'wav'
+        if audio_bytes[:3] == b'ID3' or audio_bytes[0:2] == b'\xff\xfb':
+            return 'mp3'
+        if audio_bytes[:4] == b'\x1A\x45\xDF\xA3':
+            return 'webm'
+        if audio_bytes[:4] == b'\x00\x00\x00\x20' or audio_bytes[4:8] == b'ftyp':
+            return 'm4a'
+        return 'webm'
+
+    def transcode_to_wav(self, audio_bytes, input_format=None, filter_chain=None, sample_rate=16000, channels=1):
+        """
+        Decodes audio bytes to 16-bit PCM WAV with a single ffmpeg process, optionally applying a filter chain in the same pass.
+        The input is written to ffmpeg's stdin and raw PCM is read back from its stdout, so nothing touches the disk,
+        except M4A input which is written to a temp file (see run_ffmpeg). If the manager has a decoder_pool, the job runs on the pool.
+
+        Args:
+            audio_bytes (bytes): Input audio data in WebM/Opus, MP3, WAV, or M4A format.
+            input_format (str, optional): Explicit format ('webm', 'mp3', 'wav', 'm4a'). If None, tries to auto-detect.
+            filter_chain (str, optional): ffmpeg audio filter chain (-af), e.g. PREPROCESS_FILTER_CHAIN.
+            sample_rate (int): Output sample rate (default: 16000).
+            channels (int): Output channels (default: 1).
+
+        Returns:
+            bytes: Audio data in WAV format.
+        """
+        fmt = input_format or self.detect_audio_format(audio_bytes)
+        if self.decoder_pool:
+            pcm = self.decoder_pool.transcode(audio_bytes, input_format=fmt, filter_chain=filter_chain, sample_rate=sample_rate, channels=channels)
+        else:
+            pcm = run_ffmpeg(audio_bytes, input_format=fmt, filter_chain=filter_chain, sample_rate=sample_rate, channels=channels)
+        # WAV written to a pipe has no sizes in its header, so raw PCM is read and wrapped here
+        params = SimpleNamespace(nchannels=channels, sampwidth=2, framerate=sample_rate)
+        return self.pcm_to_wav(pcm, params)
+
+    def decode_and_preprocess(self, audio_bytes, input_format=None):
+        """
+        Converts audio bytes of any supported format to preprocessed 16 kHz mono WAV in one ffmpeg process,
+        i.e. convert_audio_bytes_to_wav followed by preprocess_wav without the intermediate WAV.
+
+        Args:
+            audio_bytes (bytes): Input audio data in WebM/Opus, MP3, WAV, or M4A format.
+            input_format (str, optional): Explicit format ('webm', 'mp3', 'wav', 'm4a'). If None, tries to auto-detect.
+
+        Returns:
+            bytes: The preprocessed audio data in WAV format.
+        """
+        return self.transcode_to_wav(audio_bytes, input_format=input_format, filter_chain=PREPROCESS_FILTER_CHAIN)
+
     def convert_webm_to_wav(self, webm_bytes):
         """DOC
         Converts WebM/Opus audio bytes to WAV format using ffmpeg.
@@ -52,19 +115,7 @@ class AudioManager:
         Returns:
             bytes: The converted audio data in WAV format.
         """
-        with tempfile.NamedTemporaryFile(suffix=".webm") as webm_file, \
-             tempfile.NamedTemporaryFile(suffix=".wav") as wav_file:
-            webm_file.write(webm_bytes)
-            webm_file.flush()
-            cmd = [
-                "ffmpeg", "-y", "-i", webm_file.name,
-                "-ar", "16000", "-ac", "1", "-f", "wav", wav_file.name
-            ]
-            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            if result.returncode != 0:
-                raise RuntimeError(f"ffmpeg conversion failed: {result.stderr.decode()}")
-            wav_file.seek(0)
-            return wav_file.read()
+        return self.transcode_to_wav(webm_bytes)
 
     def create_wav_from_chunk(self, chunk_bytes, sample_width=2, channels=1, framerate=16000):
         """DOC
@@ -170,7 +221,220 @@ class AudioManager:
             out_wf.writeframes(frames)
         return out_buffer.getvalue()
     
-    def advanced_stt(self, audio_bytes, duration_in_second_to_skip=0, max_duration=None, progress_callback=None, target_language=None):
+    def decode_wav_frames(self, wav_bytes):
+        """
+        Reads the PCM frames of a WAV audio byte stream once.
+
+        Args:
+            wav_bytes (bytes): The input audio data in WAV format.
+
+        Returns:
+            tuple: (frames, params) where frames is a memoryview over the PCM data and params the wave parameters.
+        """
+        buffer = io.BytesIO(wav_bytes)
+        with wave.open(buffer, 'rb') as wf:
+            params = wf.getparams()
+            frames = wf.readframes(params.nframes)
+        return memoryview(frames), params
+
+    def pcm_to_wav(self, pcm, params):
+        """
+        Wraps PCM frames (bytes or memoryview) in a WAV header.
+
+        Args:
+            pcm (bytes or memoryview): Raw PCM frames.
+            params: Wave parameters of the frames (see decode_wav_frames).
+
+        Returns:
+            bytes: Audio data in WAV format.
+        """
+        out_buffer = io.BytesIO()
+        with wave.open(out_buffer, 'wb') as out_wf:
+            out_wf.setnchannels(params.nchannels)
+            out_wf.setsampwidth(params.sampwidth)
+            out_wf.setframerate(params.framerate)
+            out_wf.writeframes(pcm)
+        return out_buffer.getvalue()
+
+    def segment_wav(self, wav_bytes, segment_duration_sec=60, overlap_sec=0):
+        """
+        Splits a WAV audio byte stream into consecutive segments. The audio is decoded once and every segment is a
+        zero-copy memoryview window over the same PCM buffer, so the cost is linear in the audio length.
+
+        Args:
+            wav_bytes (bytes): The input audio data in WAV format.
+            segment_duration_sec (float): Duration of each segment in seconds (default: 60). The last one may be shorter.
+            overlap_sec (float): Seconds of the next segment appended to each segment (default: 0), so words cut at a boundary
+                are heard whole by one of the two segments. See trim_overlap_text to remove the repeated text.
+
+        Returns:
+            list: Dicts with index, start and end (seconds), pcm (memoryview), params and overlaps_previous (True if the start of
+                the segment was also heard by the previous one). Use pcm_to_wav(segment["pcm"], segment["params"]) to get the WAV
+                bytes of a segment.
+        """
+        frames, params = self.decode_wav_frames(wav_bytes)
+        frame_size = params.sampwidth * params.nchannels
+        total_frames = len(frames) // frame_size
+        segment_frames = max(1, int(params.framerate * segment_duration_sec))
+        overlap_frames = max(0, int(params.framerate * overlap_sec))
+        segments = []
+        for index, start_frame in enumerate(range(0, total_frames, segment_frames)):
+            end_frame = min(start_frame + segment_frames + overlap_frames, total_frames)
+            segments.append({
+                "index": index,
+                "start": start_frame / params.framerate,
+                "end": end_frame / params.framerate,
+                "pcm": frames[start_frame * frame_size:end_frame * frame_size],
+                "params": params,
+                "overlaps_previous": index > 0 and overlap_frames > 0,
+            })
+        return segments
+
+    def _frame_levels_db(self, frames, params, frame_len, block_frames=4096):
+        """
+        Returns the RMS level (dBFS) of every frame_len samples of 16-bit PCM, computed block by block to bound memory.
+        """
+        samples = np.frombuffer(frames, dtype=np.int16)
+        values_per_frame = frame_len * params.nchannels
+        num_frames = len(samples) // values_per_frame
+        levels = np.empty(num_frames, dtype=np.float32)
+        for first in range(0, num_frames, block_frames):
+            last = min(first + block_frames, num_frames)
+            block = samples[first * values_per_frame:last * values_per_frame].astype(np.float32).reshape(-1, values_per_frame)
+            levels[first:last] = 10 * np.log10(np.mean(block * block, axis=1) / 32768.0 ** 2 + 1e-10)
+        return levels
+
+    def segment_wav_by_silence(self, wav_bytes, target_duration_sec=60, min_silence_sec=0.3, max_silence_sec=1.0, padding_sec=0.2, silence_threshold_db=None, frame_ms=30, min_duration_ratio=0.5, overlap_sec=0):
+        """
+        Splits a WAV audio byte stream into segments cut at pauses, using the energy of the decoded PCM (voice activity detection).
+        Each segment is cut at the longest pause found between min_duration_ratio * target_duration_sec and target_duration_sec of speech,
+        or hard-cut at target_duration_sec if there is none; the segment after a hard cut also gets the overlap_sec of speech before it,
+        so a word cut there is heard whole by one of the two segments (see trim_overlap_text). Pauses longer than max_silence_sec (and leading/trailing silence) are dropped,
+        keeping padding_sec of silence around the speech, so they are neither sent to STT nor billed.
+
+        Args:
+            wav_bytes (bytes): The input audio data in WAV format (16-bit PCM; other sample widths fall back to segment_wav).
+            target_duration_sec (float): Maximum duration of speech per segment in seconds (default: 60).
+            min_silence_sec (float): Shortest pause used as a cut point (default: 0.3).
+            max_silence_sec (float): Pauses longer than this are dropped (default: 1.0).
+            padding_sec (float): Silence kept before and after dropped pauses (default: 0.2).
+            silence_threshold_db (float, optional): Frames below this level (dBFS) are silent. If None, it is set 10 dB above
+                the noise floor of the audio (10th percentile of frame levels), between -60 and -30 dBFS.
+            frame_ms (int): Analysis frame length in milliseconds (default: 30).
+            min_duration_ratio (float): Earliest cut point, as a fraction of target_duration_sec (default: 0.5).
+            overlap_sec (float): Seconds of speech before a hard cut repeated at the start of the next segment (default: 0).
+
+        Returns:
+            list: Dicts with index, start and end (seconds in the original audio), pcm, params and overlaps_previous, like segment_wav.
+                A segment spanning a dropped pause has its speech parts joined. Durations are in self.last_segmentation_stats.
+        """
+        frames, params = self.decode_wav_frames(wav_bytes)
+        if params.sampwidth != 2:
+            return self.segment_wav(wav_bytes, segment_duration_sec=target_duration_sec, overlap_sec=overlap_sec)
+        framerate = params.framerate
+        frame_size = params.sampwidth * params.nchannels
+        total_frames = len(frames) // frame_size
+        frame_len = max(1, int(framerate * frame_ms / 1000))
+        levels = self._frame_levels_db(frames, params, frame_len)
+        if silence_threshold_db is None:
+            noise_floor = float(np.percentile(levels, 10)) if len(levels) else -100.0
+            silence_threshold_db = min(max(noise_floor + 10, -60), -30)
+        voiced = (levels > silence_threshold_db).astype(np.int8)
+        edges = np.diff(np.concatenate(([1], voiced, [1])))
+        silent_runs = zip(np.flatnonzero(edges == -1), np.flatnonzero(edges == 1))
+
+        # Speech spans (in samples) after dropping long pauses, and cut candidates (sample, pause length).
+        padding = int(padding_sec * framerate)
+        spans = []
+        candidates = []
+        span_start = 0
+        for run_start, run_end in silent_runs:
+            start, end = int(run_start) * frame_len, min(int(run_end) * frame_len, total_frames)
+            if run_end >= len(levels):
+                end = total_frames
+            length = (end - start) / framerate
+            is_edge = start == 0 or end == total_frames
+            if is_edge or length >= max_silence_sec:
+                drop_start = start if start == 0 else start + padding
+                drop_end = end if end == total_frames else end - padding
+                if drop_end > drop_start:
+                    if drop_start > span_start:
+                        spans.append((span_start, drop_start))
+                        candidates.append((drop_start, length, True))
+                    span_start = drop_end
+            elif length >= min_silence_sec:
+                candidates.append(((start + end) // 2, length, False))
+        if total_frames > span_start:
+            spans.append((span_start, total_frames))
+        speech_frames = sum(end - start for start, end in spans)
+        self.last_segmentation_stats = {
+            "audio_sec": total_frames / framerate,
+            "speech_sec": speech_frames / framerate,
+            "segments": 0,
+        }
+        if not spans:
+            return []
+
+        # Map spans and candidates onto the speech-only timeline.
+        offsets = [0]
+        for start, end in spans:
+            offsets.append(offsets[-1] + end - start)
+        span_starts = [start for start, _ in spans]
+        positions = []
+        weights = []
+        for sample, length, is_gap in candidates:
+            i = bisect.bisect_right(span_starts, sample) - 1
+            if is_gap:
+                positions.append(offsets[i + 1])
+            elif i >= 0 and sample < spans[i][1]:
+                positions.append(offsets[i] + sample - spans[i][0])
+            else:
+                continue
+            weights.append(length)
+
+        target = max(1, int(target_duration_sec * framerate))
+        shortest = int(target * min_duration_ratio)
+        bounds = [0]
+        hard_cuts = [False]
+        while offsets[-1] - bounds[-1] > target:
+            first = bisect.bisect_right(positions, bounds[-1] + shortest)
+            last = bisect.bisect_right(positions, bounds[-1] + target)
+            if first < last:
+                best = max(range(first, last), key=lambda j: (weights[j], positions[j]))
+                bounds.append(positions[best])
+                hard_cuts.append(False)
+            else:
+                bounds.append(bounds[-1] + target)
+                hard_cuts.append(True)
+        bounds.append(offsets[-1])
+
+        overlap = max(0, int(overlap_sec * framerate))
+        segments = []
+        for index, (seg_start, seg_end) in enumerate(zip(bounds, bounds[1:])):
+            overlaps_previous = hard_cuts[index] and overlap > 0
+            if overlaps_previous:
+                seg_start = max(seg_start - overlap, 0)
+            pieces = []
+            i = bisect.bisect_right(offsets, seg_start) - 1
+            while i < len(spans) and offsets[i] < seg_end:
+                start = spans[i][0] + max(seg_start - offsets[i], 0)
+                end = spans[i][0] + min(seg_end, offsets[i + 1]) - offsets[i]
+                if end > start:
+                    pieces.append((start, end))
+                i += 1
+            windows = [frames[start * frame_size:end * frame_size] for start, end in pieces]
+            segments.append({
+                "index": index,
+                "start": pieces[0][0] / framerate,
+                "end": pieces[-1][1] / framerate,
+                "pcm": windows[0] if len(windows) == 1 else b"".join(windows),
+                "params": params,
+                "overlaps_previous": overlaps_previous,
+            })
+        self.last_segmentation_stats["segments"] = len(segments)
+        return segments
+
+    def advanced_stt(self, audio_bytes, duration_in_second_to_skip=0, max_duration=None, progress_callback=None, target_language=None, max_concurrency=1):
         """
         Processes audio input (WebM/Opus bytes), applies preprocessing, runs STT, chunks the text, and improves each chunk using OpenAI. Optionally reports progress via callback.
 
@@ -178,6 +442,7 @@ class AudioManager:
             audio_bytes (bytes): Input audio data in WebM/Opus format.
             duration_in_second_to_skip (float): Number of seconds to skip from the start of the audio.
             progress_callback (callable, optional): Function to call with progress updates. Signature: progress_callback(progress: float, chunk_index: int, total_chunks: int, improved_chunk: str)
+            max_concurrency (int): Number of text chunks fixed by OpenAI in parallel (default: 1).
 
         Returns:
             str: The improved speech text reconstructed from all chunks.
@@ -186,26 +451,109 @@ class AudioManager:
         if max_duration:
             wav_data = self.limit_wav_duration(wav_data, max_duration)
         filtered_wav = self.skip_seconds_wav(wav_data, duration_in_second_to_skip)
-        open_ai_text = self.open_ai_manager.stt(filtered_wav, input_type='bytes', language=target_language)
-        stt_chunks = self.open_ai_manager.build_chunks(text=open_ai_text, max_chunk_size=1000)
-        self.open_ai_manager.add_message("system", text=(
-            "You are a text fixer for speech-to-text (STT) outputs of the user. "
-            "cur_chunk is the USER MESSAGE and may contain transcription errors, misheard words, or awkward phrasing. "
-            "TASK: CORRECT ONLY cur_chunk (USER MESSAGE) IF NEEDED TO MAKE IT CLEARER, GRAMMATICALLY FIXED, and NATURAL, "
-            "while strictly preserving the original meaning, style, and approximate length of cur_chunk. "
-            "Do NOT add new sentences, explanations, or unrelated details to cur_chunk. "
-            "If the input of cur_chunk is already correct, return the original text EXACTLY as received, without any change, copy, or reformulation."
-        ))
+        return self.transcribe_wav(filtered_wav, progress_callback=progress_callback, target_language=target_language, max_concurrency=max_concurrency)
+
+    def fix_stt_text(self, text):
+        """
+        Corrects one chunk of STT output with OpenAI. The system prompt and the chunk are sent as explicit messages,
+        so calls do not share the manager's conversation and can run in parallel.
+
+        Args:
+            text (str): A chunk of STT output (up to ~1000 characters).
+
+        Returns:
+            str: The corrected chunk.
+        """
+        messages = [
+            {"role": "system", "content": STT_FIXER_PROMPT},
+            {"role": "user", "content": f"cur_chunk: {text}"},
+        ]
+        return self.open_ai_manager.generate_response(messages=messages)
+
+    def improve_stt_text(self, text, progress_callback=None, max_concurrency=1):
+        """
+        Splits STT output in chunks of ~1000 characters and corrects them with fix_stt_text.
+
+        Args:
+            text (str): STT output.
+            progress_callback (callable, optional): Called in chunk order. Signature: progress_callback(chunk_index: int, total_chunks: int, improved_chunk: str)
+            max_concurrency (int): Number of chunks corrected in parallel (default: 1).
+
+        Returns:
+            str: The improved text.
+        """
+        chunk_texts = [chunk["text"] for chunk in self.open_ai_manager.build_chunks(text=text, max_chunk_size=1000)]
+        if max_concurrency <= 1 or len(chunk_texts) <= 1:
+            improved_chunks = map(self.fix_stt_text, chunk_texts)
+            return self._join_improved_chunks(improved_chunks, len(chunk_texts), progress_callback)
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(chunk_texts))) as executor:
+            improved_chunks = executor.map(self.fix_stt_text, chunk_texts)
+            return self._join_improved_chunks(improved_chunks, len(chunk_texts), progress_callback)
+
+    def _join_improved_chunks(self, improved_chunks, total_chunks, progress_callback=None):
         processed_text = ""
-        total_chunks = len(stt_chunks)
-        for i, chunk in enumerate(stt_chunks):
-            cur_chunk = chunk["text"]
-            self.open_ai_manager.add_message("user", text=f"cur_chunk: {cur_chunk}")
-            improved_chunk = self.open_ai_manager.generate_response()
+        for i, improved_chunk in enumerate(improved_chunks):
             processed_text += improved_chunk + " "
             if progress_callback:
                 progress_callback(i, total_chunks, improved_chunk)
         return processed_text.strip()
+
+    def trim_overlap_text(self, previous_text, text, max_overlap_words=30, min_match_words=2, max_offset_words=2):
+        """
+        Removes from the start of text the words already transcribed at the end of previous_text, i.e. the words spoken
+        in the audio shared by two overlapping segments (see segment_wav). Words are compared case-insensitively without punctuation.
+
+        Args:
+            previous_text (str): STT output of the previous segment.
+            text (str): STT output of the current segment.
+            max_overlap_words (int): Longest repeated run of words searched (default: 30).
+            min_match_words (int): Shortest run of words accepted as a repetition (default: 2).
+            max_offset_words (int): Words cut at a segment boundary (mis-transcribed) allowed around the repeated run (default: 2).
+
+        Returns:
+            str: text without its repeated prefix, or text unchanged if no repetition is found.
+        """
+        def normalize(word):
+            return re.sub(r"[^\w]", "", word.lower())
+
+        words = text.split()
+        normalized = [normalize(word) for word in words]
+        previous = [word for word in map(normalize, previous_text.split()[-(max_overlap_words + max_offset_words):]) if word]
+        for size in range(min(max_overlap_words, len(previous), len(words)), min_match_words - 1, -1):
+            for previous_offset in range(max_offset_words + 1):
+                if size + previous_offset > len(previous):
+                    break
+                tail = previous[len(previous) - previous_offset - size:len(previous) - previous_offset]
+                for offset in range(max_offset_words + 1):
+                    if normalized[offset:offset + size] == tail:
+                        return " ".join(words[offset + size:])
+        return text
+
+    def stt_segment(self, segment, target_language=None):
+        """
+        Runs STT on one segment returned by segment_wav.
+
+        Returns:
+            str: The raw STT output of the segment.
+        """
+        wav_bytes = self.pcm_to_wav(segment["pcm"], segment["params"])
+        return self.open_ai_manager.stt(wav_bytes, input_type='bytes', language=target_language)
+
+    def transcribe_wav(self, wav_bytes, progress_callback=None, target_language=None, max_concurrency=1):
+        """
+        Runs STT on WAV audio bytes that are already decoded, chunks the text, and improves each chunk using OpenAI.
+
+        Args:
+            wav_bytes (bytes): Input audio data in WAV format.
+            progress_callback (callable, optional): Function to call with progress updates. Signature: progress_callback(chunk_index: int, total_chunks: int, improved_chunk: str)
+            target_language (str, optional): Language code passed to STT.
+            max_concurrency (int): Number of text chunks fixed by OpenAI in parallel (default: 1).
+
+        Returns:
+            str: The improved speech text reconstructed from all chunks.
+        """
+        open_ai_text = self.open_ai_manager.stt(wav_bytes, input_type='bytes', language=target_language)
+        return self.improve_stt_text(open_ai_text, progress_callback=progress_callback, max_concurrency=max_concurrency)
     
     def convert_audio_bytes_to_wav(self, audio_bytes, input_format=None):
         """
@@ -218,90 +566,76 @@ class AudioManager:
         Returns:
             bytes: WAV audio data.
         """
-        def detect_format(audio_bytes):
-            if audio_bytes[:4] == b'RIFF':
-                return 'wav'
-            if audio_bytes[:3] == b'ID3' or audio_bytes[0:2] == b'\xff\xfb':
-                return 'mp3'
-            if audio_bytes[:4] == b'\x1A\x45\xDF\xA3':
-                return 'webm'
-            if audio_bytes[:4] == b'\x00\x00\x00\x20' or audio_bytes[4:8] == b'ftyp':
-                return 'm4a'
-            return 'webm'
-
-        fmt = input_format or detect_format(audio_bytes)
+        fmt = input_format or self.detect_audio_format(audio_bytes)
         if fmt == 'wav':
             return audio_bytes
-        elif fmt == 'mp3':
-            with tempfile.NamedTemporaryFile(suffix=".mp3") as mp3_file, \
-                tempfile.NamedTemporaryFile(suffix=".wav") as wav_file:
-                mp3_file.write(audio_bytes)
-                mp3_file.flush()
-                cmd = [
-                    "ffmpeg", "-y", "-i", mp3_file.name,
-                    "-ar", "16000", "-ac", "1", "-f", "wav", wav_file.name
-                ]
-                result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                if result.returncode != 0:
-                    raise RuntimeError(f"ffmpeg conversion failed: {result.stderr.decode()}")
-                wav_file.seek(0)
-                return wav_file.read()
-        elif fmt == 'm4a':
-            with tempfile.NamedTemporaryFile(suffix=".m4a") as m4a_file, \
-                tempfile.NamedTemporaryFile(suffix=".wav") as wav_file:
-                m4a_file.write(audio_bytes)
-                m4a_file.flush()
-                cmd = [
-                    "ffmpeg", "-y", "-i", m4a_file.name,
-                    "-ar", "16000", "-ac", "1", "-f", "wav", wav_file.name
-                ]
-                result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                if result.returncode != 0:
-                    raise RuntimeError(f"ffmpeg conversion failed: {result.stderr.decode()}")
-                wav_file.seek(0)
-                return wav_file.read()
-        else:
-            with tempfile.NamedTemporaryFile(suffix=".webm") as webm_file, \
-                tempfile.NamedTemporaryFile(suffix=".wav") as wav_file:
-                webm_file.write(audio_bytes)
-                webm_file.flush()
-                cmd = [
-                    "ffmpeg", "-y", "-i", webm_file.name,
-                    "-ar", "16000", "-ac", "1", "-f", "wav", wav_file.name
-                ]
-                result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                if result.returncode != 0:
-                    raise RuntimeError(f"ffmpeg conversion failed: {result.stderr.decode()}")
-                wav_file.seek(0)
-                return wav_file.read()
-    
-    def convert_audio_to_text(self, audio_bytes, chunk_duration_sec=60, do_final_edition=False, progress_callback=None, input_format=None, chunk_progress_callback=None, target_language=None):
+        return self.transcode_to_wav(audio_bytes, input_format=fmt)
+
+    def convert_audio_to_text(self, audio_bytes, chunk_duration_sec=60, do_final_edition=False, progress_callback=None, input_format=None, chunk_progress_callback=None, target_language=None, max_concurrency=1, overlap_sec=2, segmentation="vad"):
         """
         Converts audio to text using advanced STT, processing the audio in manageable chunks (default: 1 minute).
-        Supports input formats: WebM/Opus, MP3, WAV, M4A. Each chunk is processed sequentially, skipping already processed duration, until the whole audio is transcribed and improved.
+        Supports input formats: WebM/Opus, MP3, WAV, M4A. The audio is decoded and preprocessed once and split into segments cut at
+        pauses (segment_wav_by_silence), or into slightly overlapping fixed-length segments (segment_wav). Up to max_concurrency segments
+        are transcribed at the same time; the text repeated by an overlap is removed with trim_overlap_text, and the segments are
+        stitched and reported in order.
 
         Args:
             audio_bytes (bytes): Input audio data in WebM/Opus, MP3, WAV, or M4A format.
             chunk_duration_sec (int): Duration (in seconds) of each chunk to process (default: 60).
-            progress_callback (callable, optional): Function to call with progress updates for each chunk.
+            progress_callback (callable, optional): Function to call with progress updates for each chunk, in chunk order.
+                Signature: progress_callback(chunk_idx: int, num_chunks: int, chunk_text: str)
             input_format (str, optional): Explicit format ('webm', 'mp3', 'wav', 'm4a'). If None, tries to auto-detect.
             chunk_progress_callback (callable, optional): Function to call with progress updates for each chunk during processing.
             do_final_edition (bool): Whether to perform a final text improvement after all chunks are processed (default: False).
+            max_concurrency (int): Number of STT requests, and of OpenAI text fixes, running in parallel (default: 1).
+                With max_concurrency >= the number of chunks, the audio is transcribed in about the time of its slowest chunk.
+            overlap_sec (float): Seconds of audio shared by consecutive chunks cut in the middle of speech (default: 2), so words cut at
+                a boundary are not lost: every fixed-length boundary, and the VAD boundaries where no pause was found.
+            segmentation (str): "vad" to cut chunks of at most chunk_duration_sec at pauses and drop long silences (default),
+                or "fixed" to cut every chunk_duration_sec.
 
         Returns:
             str: The improved speech text reconstructed from all chunks.
+
+        Example:
+            text = audio_manager.convert_audio_to_text(lecture_bytes, input_format='m4a', max_concurrency=8)
         """
-        wav_data = self.convert_audio_bytes_to_wav(audio_bytes, input_format=input_format)
-        processed_wav = self.preprocess_wav(wav_data)
-        total_duration = self.get_wav_duration(processed_wav)
+        processed_wav = self.decode_and_preprocess(audio_bytes, input_format=input_format)
+        if segmentation == "vad":
+            segments = self.segment_wav_by_silence(processed_wav, target_duration_sec=chunk_duration_sec, overlap_sec=overlap_sec)
+        else:
+            segments = self.segment_wav(processed_wav, segment_duration_sec=chunk_duration_sec, overlap_sec=overlap_sec)
         processed_text = ""
-        num_chunks = int(total_duration // chunk_duration_sec) + (1 if total_duration % chunk_duration_sec > 0 else 0)
-        for chunk_idx in range(num_chunks):
-            self.open_ai_manager.clear_messages()   
-            chunk_text = self.advanced_stt(processed_wav, duration_in_second_to_skip=chunk_idx * chunk_duration_sec, max_duration=chunk_duration_sec * (chunk_idx + 1), progress_callback=chunk_progress_callback, target_language=target_language)
-            if progress_callback:
-                progress_callback(chunk_idx, num_chunks, chunk_text)
-            processed_text += chunk_text + " "
+        num_chunks = len(segments)
+        max_workers = max(1, min(max_concurrency, num_chunks))
+        with ThreadPoolExecutor(max_workers=max_workers) as stt_executor, ThreadPoolExecutor(max_workers=max_workers) as fix_executor:
+            stt_futures = [stt_executor.submit(self.stt_segment, segment, target_language) for segment in segments]
+            fix_futures = []  # fix-ups of the segments whose STT is stitched, in order, until the segment is reported
+            previous_text = ""
+            next_stt = 0
+            chunk_idx = 0
+            while chunk_idx < num_chunks:
+                if next_stt < num_chunks and stt_futures[next_stt].done():
+                    # Stitch the next segment in order and start fixing its text
+                    stt_text = stt_futures[next_stt].result()
+                    overlaps_previous = segments[next_stt]["overlaps_previous"] and previous_text
+                    chunk_text = self.trim_overlap_text(previous_text, stt_text) if overlaps_previous else stt_text
+                    previous_text = stt_text
+                    stt_chunks = self.open_ai_manager.build_chunks(text=chunk_text, max_chunk_size=1000)
+                    fix_futures.append([fix_executor.submit(self.fix_stt_text, chunk["text"]) for chunk in stt_chunks])
+                    next_stt += 1
+                elif fix_futures and all(future.done() for future in fix_futures[0]):
+                    # Report the oldest segment as soon as its fix-ups are done, while later segments keep running
+                    futures = fix_futures.pop(0)
+                    improved_chunks = (future.result() for future in futures)
+                    chunk_text = self._join_improved_chunks(improved_chunks, len(futures), chunk_progress_callback)
+                    if progress_callback:
+                        progress_callback(chunk_idx, num_chunks, chunk_text)
+                    processed_text += chunk_text + " "
+                    chunk_idx += 1
+                else:
+                    waiting = stt_futures[next_stt:next_stt + 1] + (fix_futures[0] if fix_futures else [])
+                    wait(waiting, return_when=FIRST_COMPLETED)
         self.open_ai_manager.clear_messages()
         finalized_text = processed_text.strip()
         if do_final_edition:
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import time
+from django.core.cache import cache
+
+class CacheManager:
+    def __init__(self, namespace="default", ttl=60 * 60 * 24 * 7, max_entries=10000):
+        """
+        Content-addressed cache stored in the default django-redis cache, with TTL and size-based (least recently used) eviction.
+
+        Args:
+            namespace (str): Prefix that isolates this cache's keys, index and counters.
+            ttl (int): Time to live of each entry in seconds. None keeps entries until evicted. Default is 7 days.
+            max_entries (int): Maximum number of entries kept before the least recently used ones are evicted. Default is 10000.
+
+        Example:
+            cache_manager = CacheManager(namespace="ai_completion", ttl=3600, max_entries=5000)
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.index_key = f"cache_index:{namespace}"
+        self.stats_key = f"cache_stats:{namespace}"
+        self.client = cache.client.get_client(write=True)  # direct redis client
+
+    def _entry_key(self, key):
+        return f"cache:{self.namespace}:{key}"
+
+    def build_key(self, *parts):
+        """
+        Build a stable hash key from any JSON-serializable parts.
+
+        Returns:
+            str: SHA-256 hex digest of the parts.
+
+        Example:
+            key = cache_manager.build_key("gpt-4o", messages, 2000)
+        """
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Get a cached value and count the hit or miss. Redis errors are treated as a miss.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        try:
+            raw = self.client.get(self._entry_key(key))
+            if raw is None:
+                self.client.hincrby(self.stats_key, "misses", 1)
+                return None
+            pipe = self.client.pipeline()
+            pipe.hincrby(self.stats_key, "hits", 1)
+            pipe.zadd(self.index_key, {key: time.time()})
+            pipe.execute()
+            return json.loads(raw)
+        except Exception as e:
+            print(f"Cache get error: {e}")
+            return None
+
+    def set(self, key, value):
+        """
+        Store a JSON-serializable value and evict expired or least recently used entries beyond max_entries.
+        """
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(self._entry_key(key), json.dumps(value, ensure_ascii=False), ex=self.ttl)
+            pipe.zadd(self.index_key, {key: time.time()})
+            pipe.execute()
+            self._evict()
+        except Exception as e:
+            print(f"Cache set error: {e}")
+
+    def _evict(self):
+        if self.ttl:
+            self.client.zremrangebyscore(self.index_key, "-inf", time.time() - self.ttl)
+        overflow = self.client.zcard(self.index_key) - self.max_entries
+        if overflow > 0:
+            stale_keys = self.client.zrange(self.index_key, 0, overflow - 1)
+            if stale_keys:
+                stale_keys = [k.decode() if isinstance(k, bytes) else k for k in stale_keys]
+                pipe = self.client.pipeline()
+                pipe.delete(*[self._entry_key(k) for k in stale_keys])
+                pipe.zrem(self.index_key, *stale_keys)
+                pipe.hincrby(self.stats_key, "evictions", len(stale_keys))
+                pipe.execute()
+
+    def get_stats(self):
+        """
+        Get hit/miss counters of this cache.
+
+        Returns:
+            dict: hits, misses, evictions, hit_rate and current number of entries.
+
+        Example:
+            stats = cache_manager.get_stats()
+        """
+        try:
+            raw = self.client.hgetall(self.stats_key)
+            stats = {(k.decode() if isinstance(k, bytes) else k): int(v) for k, v in raw.items()}
+            entries = self.client.zcard(self.index_key)
+        except Exception as e:
+            print(f"Cache stats error: {e}")
+            stats, entries = {}, 0
+        hits = stats.get("hits", 0)
+        misses = stats.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": stats.get("evictions", 0),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0,
+            "entries": entries,
+        }
+
+    def clear(self):
+        """Remove every entry and counter of this cache."""
+        keys = [k.decode() if isinstance(k, bytes) else k for k in self.client.zrange(self.index_key, 0, -1)]
+        pipe = self.client.pipeline()
+        if keys:
+            pipe.delete(*[self._entry_key(k) for k in keys])
+        pipe.delete(self.index_key, self.stats_key)
+        pipe.execute()
@@ -1,7 +1,10 @@
 import re
 import html
+import codecs
 from bs4 import BeautifulSoup
 
+from ai.utils.doc_ai_managr import DocAIManager
+
 class HTMLChunker:
     def __init__(self):
         """
@@ -22,6 +25,14 @@ class HTMLChunker:
         self._COMPLETE_SENTENCE_AT_END = re.compile(
             rf"(?:\.{{3}}|[{re.escape(self._SENT_END_CHARS)}]){self._OPTIONAL_CLOSERS_RE}{self._TRAILING_CLOSE_TAGS_RE}"
         )
+        # One token per match: a tag, an entity, a text run ending a sentence, or any other text run.
+        self._SINGLE_PASS_RE = re.compile(
+            rf"(<[^>]+>)|(&[A-Za-z0-9#]+;)|([^<&]*?(?:\.{{3}}|[{re.escape(self._SENT_END_CHARS)}]){self._OPTIONAL_CLOSERS_RE})|([^<&]+|[<&])",
+            re.DOTALL
+        )
+        # Sentence ends and closers at the end of a buffer; more dots or closers may follow in the next fragment.
+        self._TRAILING_SENT_END_RE = re.compile(rf"[{re.escape(self._SENT_END_CHARS)}{re.escape(self._CLOSERS)}]+$")
+        self._LINE_BREAK_RE = re.compile(r"[^\S\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*[\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]\s*")
 
     def _tag_name(self, tag):
         """
@@ -115,12 +126,15 @@ class HTMLChunker:
         text = soup.get_text(separator=" ")
         return text
     
-    def chunk_html_streaming(self, html_src, max_text_chars = 1000):
+    def chunk_html_streaming(self, html_src, max_text_chars = 1000, break_at_blocks=False, min_fill=0.5):
         """
         Chunk HTML into segments of up to max_text_chars, preserving tag structure.
         Args:
             html_src (str): HTML source string.
             max_text_chars (int): Maximum number of text characters per chunk (default: 1000).
+            break_at_blocks (bool): Also end a chunk at the first closing block tag once it holds min_fill * max_text_chars
+                characters. Boundaries then follow paragraphs, so an edit only moves the boundaries around it (default: False).
+            min_fill (float): Fill ratio required before a block break ends a chunk (default: 0.5).
         Returns:
             List[Dict[str, str]]: List of chunks, each with 'html' and 'text' keys.
         """
@@ -148,6 +162,8 @@ class HTMLChunker:
                     if name in self.BLOCK_BREAK_TAGS or name == "br":
                         text_buf.append("\n")
                         cur_len += 1
+                        if break_at_blocks and cur_len >= max_text_chars * min_fill:
+                            flush()
                 continue
             for raw_unit, plain_unit in self._iter_text_units(token):
                 if cur_len + len(plain_unit) > max_text_chars and cur_len > 0:
@@ -158,6 +174,256 @@ class HTMLChunker:
         flush()
         return chunks
 
+    def _iter_fragments(self, source, read_size=64 * 1024):
+        """
+        Iterate text fragments of a string, a file-like object (text or binary) or an iterable of str/bytes fragments.
+        Bytes are decoded incrementally as UTF-8.
+        """
+        if isinstance(source, (str, bytes)):
+            source = [source]
+        elif hasattr(source, "read"):
+            file_obj = source
+            source = iter(lambda: file_obj.read(read_size), file_obj.read(0))
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for fragment in source:
+            if isinstance(fragment, bytes):
+                fragment = decoder.decode(fragment)
+            if fragment:
+                yield fragment
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def iter_chunks(self, source, max_text_chars=1000, backtrack=300):
+        """
+        Lazily chunk HTML in one pass (see chunk_html_single_pass), reading the input fragment by fragment.
+        Tags, entities and text runs split across fragments are carried over, so fragments can be cut anywhere
+        (e.g. per-page OCR output or fixed-size file reads). Memory is bounded by one fragment plus one chunk,
+        and the first chunk is yielded as soon as enough input has arrived.
+        Args:
+            source (str, file-like or iterable): HTML string, file object, or iterable of str/bytes fragments.
+                Line breaks are joined as in join_paragraphs.
+            max_text_chars (int): Maximum number of text characters per chunk (default: 1000).
+            backtrack (int): Maximum number of text characters carried into the next chunk to end on a sentence (default: 300).
+        Yields:
+            Dict[str, str]: Chunks with 'html' and 'text' keys.
+        """
+        ready = []
+        html_parts = []
+        text_parts = []
+        cur_len = 0
+        boundary = 0  # number of parts up to the last sentence boundary
+        boundary_len = 0  # text length up to the last sentence boundary
+        after_sentence = False
+
+        def emit(cut, cut_len):
+            nonlocal html_parts, text_parts, cur_len, boundary, boundary_len
+            chunk_html = "".join(html_parts[:cut])
+            if chunk_html:
+                ready.append({
+                    "html": chunk_html,
+                    "text": "".join(text_parts[:cut]).strip()
+                })
+            html_parts = html_parts[cut:]
+            text_parts = text_parts[cut:]
+            cur_len -= cut_len
+            boundary = 0
+            boundary_len = 0
+
+        def flush():
+            if boundary > 0 and cur_len - boundary_len <= backtrack:
+                emit(boundary, boundary_len)
+            else:
+                emit(len(html_parts), cur_len)
+
+        def add(raw, plain, kind):
+            # kind: "sentence" ends a sentence, "closing" and "space" extend a boundary right before them, "other" does not.
+            nonlocal cur_len, boundary, boundary_len, after_sentence
+            html_parts.append(raw)
+            text_parts.append(plain)
+            cur_len += len(plain)
+            if kind == "sentence" or (after_sentence and kind in ("closing", "space")):
+                boundary = len(html_parts)
+                boundary_len = cur_len
+                after_sentence = True
+            else:
+                after_sentence = False
+
+        def consume(buf, end):
+            for m in self._SINGLE_PASS_RE.finditer(buf, 0, end):
+                tag, entity, sentence, run = m.groups()
+                if tag is not None:
+                    name = self._tag_name(tag)
+                    if name == "br" or tag.startswith("</"):
+                        add(tag, "\n" if name in self.BLOCK_BREAK_TAGS or name == "br" else "", "closing")
+                    else:
+                        add(tag, "", "other")
+                elif entity is not None:
+                    try:
+                        plain = html.unescape(entity)
+                    except Exception:
+                        plain = entity
+                    if cur_len + len(plain) > max_text_chars and cur_len > 0:
+                        flush()
+                    add(entity, plain, "other")
+                else:
+                    piece = sentence if sentence is not None else run
+                    while cur_len + len(piece) > max_text_chars:
+                        room = max_text_chars - cur_len
+                        if room > 0:
+                            add(piece[:room], piece[:room], "other")
+                            piece = piece[room:]
+                        flush()
+                    if piece:
+                        if sentence is not None:
+                            kind = "sentence"
+                        else:
+                            kind = "other" if piece.strip() else "space"
+                        add(piece, piece, kind)
+
+        carry = ""
+        started = False
+        for fragment in self._iter_fragments(source):
+            buf = carry + fragment
+            # Keep trailing whitespace raw: it may join a line break in the next fragment.
+            stripped = buf.rstrip()
+            trailing = buf[len(stripped):]
+            buf = self._LINE_BREAK_RE.sub(" ", stripped)
+            if not started:
+                buf = buf.lstrip()
+                started = bool(buf)
+            # The last token may continue in the next fragment (open tag or entity, sentence end followed by closers).
+            end = len(buf)
+            last_lt = buf.rfind("<")
+            if last_lt > buf.rfind(">"):
+                end = last_lt
+            m = self._TRAILING_SENT_END_RE.search(buf, 0, end)
+            if m:
+                end = m.start()
+            last_amp = buf.rfind("&", 0, end)
+            if last_amp != -1 and end - last_amp <= 32 and re.fullmatch(r"&[A-Za-z0-9#]*", buf[last_amp:end]):
+                end = last_amp
+            consume(buf, end)
+            carry = buf[end:] + trailing
+            yield from ready
+            ready.clear()
+        if carry.strip():
+            consume(carry.rstrip(), len(carry.rstrip()))
+        emit(len(html_parts), cur_len)
+        yield from ready
+
+    def chunk_html_single_pass(self, html_src, max_text_chars=1000, backtrack=300):
+        """
+        Chunk HTML in one pass. Tags, entities and sentence runs are tokenized once, the last sentence boundary is tracked
+        while text is appended, and each full chunk is cut at that boundary when it lies within backtrack characters
+        of the end. The incomplete sentence is carried into the next chunk, so no boundary repair or HTML re-parse is needed afterwards.
+        Args:
+            html_src (str): HTML source string. Line breaks are joined as in join_paragraphs.
+            max_text_chars (int): Maximum number of text characters per chunk (default: 1000).
+            backtrack (int): Maximum number of text characters carried into the next chunk to end on a sentence (default: 300).
+        Returns:
+            List[Dict[str, str]]: List of chunks, each with 'html' and 'text' keys.
+        """
+        return list(self.iter_chunks(html_src, max_text_chars, backtrack))
+
+    def _split_text(self, text, max_text_chars):
+        """
+        Split text longer than max_text_chars at sentence ends, then at spaces, into pieces of at most max_text_chars characters.
+        """
+        sentences = re.split(rf"(?<=[{re.escape(self._SENT_END_CHARS)}])\s+", text)
+        pieces = []
+        cur = ""
+        for sentence in sentences:
+            words = [sentence] if len(sentence) <= max_text_chars else sentence.split()
+            for word in words:
+                while len(word) > max_text_chars:
+                    if cur:
+                        pieces.append(cur)
+                        cur = ""
+                    pieces.append(word[:max_text_chars])
+                    word = word[max_text_chars:]
+                if cur and len(cur) + 1 + len(word) > max_text_chars:
+                    pieces.append(cur)
+                    cur = ""
+                cur = f"{cur} {word}" if cur else word
+        if cur:
+            pieces.append(cur)
+        return pieces
+
+    def _split_layout_block(self, block, max_text_chars):
+        """
+        Split a layout block whose text is longer than max_text_chars into blocks of the same kind and page:
+        lists by items, tables by rows (header rows stay with the first part), other blocks by sentences.
+        """
+        if len(block["text"]) <= max_text_chars:
+            return [block]
+        if block["kind"] in ("list", "table"):
+            key = "items" if block["kind"] == "list" else "cells"
+            parts = []
+            cur = []
+            cur_len = 0
+            for i, unit in enumerate(block[key]):
+                unit_len = len(unit) if block["kind"] == "list" else sum(len(cell["text"]) + 1 for cell in unit)
+                if cur and cur_len + unit_len > max_text_chars and not (block["kind"] == "table" and i <= block.get("header_rows", 0)):
+                    parts.append(cur)
+                    cur = []
+                    cur_len = 0
+                cur.append(unit)
+                cur_len += unit_len + 1
+            if cur:
+                parts.append(cur)
+            pieces = []
+            for i, units in enumerate(parts):
+                piece = dict(block)
+                piece[key] = units
+                if block["kind"] == "list":
+                    piece["text"] = " ".join(item for item in units if item)
+                else:
+                    piece["header_rows"] = block.get("header_rows", 0) if i == 0 else 0
+                    piece["text"] = " ".join(cell["text"] for row in units for cell in row if cell["text"])
+                pieces.append(piece)
+            return pieces
+        return [dict(block, text=text) for text in self._split_text(block["text"], max_text_chars)]
+
+    def chunk_layout(self, layout, max_text_chars=1000):
+        """
+        Chunk a typed layout (see DocAIManager.build_layout) without going through HTML parsing. Chunks end on block
+        boundaries; blocks longer than max_text_chars are split by sentences, list items or table rows.
+        Args:
+            layout (list): Layout block dicts with 'kind', 'level', 'page', 'text' and 'cells' keys.
+            max_text_chars (int): Maximum number of text characters per chunk (default: 1000).
+        Returns:
+            List[Dict]: List of chunks, each with 'html', 'text', 'pages' (first and last page of the chunk) and 'blocks' keys.
+        """
+        doc_ai_manager = DocAIManager()
+        chunks = []
+        blocks = []
+        cur_len = 0
+
+        def flush():
+            nonlocal blocks, cur_len
+            if blocks:
+                pages = [block["page"] for block in blocks if block.get("page") is not None]
+                chunks.append({
+                    "html": doc_ai_manager.render_layout_html(blocks),
+                    "text": doc_ai_manager.layout_to_text(blocks),
+                    "pages": [min(pages), max(pages)] if pages else [],
+                    "blocks": blocks,
+                })
+            blocks = []
+            cur_len = 0
+
+        for block in layout:
+            for piece in self._split_layout_block(block, max_text_chars):
+                if not piece["text"] and piece["kind"] != "image":
+                    continue
+                if cur_len + len(piece["text"]) > max_text_chars and cur_len > 0:
+                    flush()
+                blocks.append(piece)
+                cur_len += len(piece["text"]) + 1
+        flush()
+        return chunks
+
     def get_incomplete_end_html_aware(self, chunk_html, backtrack=300, sent_end_chars=None, optional_closers_re=None, complete_sentence_at_end=None):
         """
         Get the complete and incomplete parts at the end of a chunk, ignoring HTML entities as boundaries.
@@ -242,19 +508,25 @@ class ChunkPipeline:
             mode (str): Mode for processing ('get_chunks' or 'get_text', default: 'get_chunks').
                 If mode == "get_chunks", chunk HTML.
                 If mode == "get_text", return simple text.
-            chunk_method (str): Method to use for incomplete sentence detection ('html_aware', default: 'html_aware').
+            chunk_method (str): Method to use for incomplete sentence detection ('html_aware', 'block_aligned' or 'single_pass', default: 'html_aware').
                 If chunk_method == "html_aware", use custom logic for incomplete sentence detection.
+                If chunk_method == "block_aligned", also end chunks at block boundaries (see chunk_html_streaming) so chunk
+                boundaries stay stable when the document is edited.
+                If chunk_method == "single_pass", chunk with chunk_html_single_pass, which already ends chunks on sentence
+                boundaries, so 'head' is the whole chunk and 'tail' is empty.
         Returns:
             List[Dict[str, str]]: List of chunk dicts with 'html', 'text', 'head', and 'tail' keys.
         """
+        if mode == "get_chunks" and chunk_method == "single_pass":
+            return list(self.iter_chunks(html_src))
         html_src = self.chunker.clean_text(html_src)
         html_src = self.chunker.join_paragraphs(html_src)
         if mode == "get_text":
             return self.chunker.get_simple_text_from_html(html_src)
-        chunks = self.chunker.chunk_html_streaming(html_src, self.max_text_chars)
+        chunks = self.chunker.chunk_html_streaming(html_src, self.max_text_chars, break_at_blocks=(chunk_method == "block_aligned"))
         results = []
         for chunk in chunks:
-            if chunk_method == "html_aware":
+            if chunk_method in ("html_aware", "block_aligned"):
                 head, tail = self.chunker.get_incomplete_end_html_aware(chunk["html"], self.backtrack)
             results.append({
                 "html": chunk["html"],
@@ -262,4 +534,35 @@ class ChunkPipeline:
                 "head": head,
                 "tail": tail,
             })
-        return results
\ No newline at end of file
+        return results
+
+    def process_layout(self, layout):
+        """
+        Chunk a typed layout (see DocAIManager.build_layout) with HTMLChunker.chunk_layout, keeping the pages of each chunk.
+        Args:
+            layout (list): Layout block dicts, e.g. from OCRManager.read_pdf_layout.
+        Returns:
+            List[Dict]: Chunk dicts with 'html', 'text', 'head', 'tail' and 'pages' keys. Chunks end on block boundaries,
+                so 'head' is the whole chunk and 'tail' is empty.
+        """
+        results = []
+        for chunk in self.chunker.chunk_layout(layout, self.max_text_chars):
+            results.append({
+                "html": chunk["html"],
+                "text": chunk["text"],
+                "head": chunk["html"],
+                "tail": "",
+                "pages": chunk["pages"],
+            })
+        return results
+
+    def iter_chunks(self, source):
+        """
+        Lazily chunk a string, file-like object or iterable of HTML fragments with HTMLChunker.iter_chunks.
+        Args:
+            source (str, file-like or iterable): HTML source, e.g. a generator of per-page OCR output.
+        Yields:
+            Dict[str, str]: Chunk dicts with 'html', 'text', 'head', and 'tail' keys ('tail' is always empty).
+        """
+        for chunk in self.chunker.iter_chunks(source, self.max_text_chars, self.backtrack):
+            yield {"html": chunk["html"], "text": chunk["text"], "head": chunk["html"], "tail": ""}
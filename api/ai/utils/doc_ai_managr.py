@@ -58,7 +58,7 @@ class DocAIManager:
     
     def _text_from_blocks(self, blocks):
         """
-        Recursively extracts and concatenates text from a list of blocks.
+        Extracts and concatenates text from a list of blocks and their nested blocks, depth first with an explicit stack.
 
         Args:
             blocks (list): List of block objects (may have 'text_block' or nested 'blocks').
@@ -67,57 +67,72 @@ class DocAIManager:
             str: Concatenated text from all blocks.
         """
         parts = []
-        for b in blocks or []:
+        stack = [iter(blocks or [])]
+        while stack:
+            b = next(stack[-1], None)
+            if b is None:
+                stack.pop()
+                continue
             tb = getattr(b, "text_block", None)
-            if tb and getattr(tb, "text", None):
-                parts.append(tb.text)
-            child_b = getattr(b, "blocks", None)
-            if child_b:
-                parts.append(self._text_from_blocks(child_b))
             if tb:
+                t = (getattr(tb, "text", None) or "").strip()
+                if t:
+                    parts.append(t)
                 child_tb = getattr(tb, "blocks", None)
                 if child_tb:
-                    parts.append(self._text_from_blocks(child_tb))
-        return " ".join(p.strip() for p in parts if p and p.strip())
-    
-    def _render_table(self, table_block):
+                    stack.append(iter(child_tb))
+            child_b = getattr(b, "blocks", None)
+            if child_b:
+                stack.append(iter(child_b))
+        return " ".join(parts)
+
+    def _render_table(self, table_block, out=None):
         """
         Renders a table block into HTML table markup.
 
         Args:
             table_block: An object representing a table (with header_rows, body_rows, and cell spans).
+            out (list, optional): Output buffer to append the markup to. If None, the markup is returned.
 
         Returns:
-            str: HTML string for the table.
-        """
-        def row_html(row, cell_tag="td"):
-            cells_html = []
-            for cell in getattr(row, "cells", []) or []:
-                txt = self._text_from_blocks(getattr(cell, "blocks", None))
-                attrs = []
-                if getattr(cell, "row_span", 1) > 1:
-                    attrs.append(f'rowspan="{cell.row_span}"')
-                if getattr(cell, "col_span", 1) > 1:
-                    attrs.append(f'colspan="{cell.col_span}"')
-                attr_str = (" " + " ".join(attrs)) if attrs else ""
-                cells_html.append(f"<{cell_tag}{attr_str}>{html.escape((txt or '').strip())}</{cell_tag}>")
-            return "<tr>" + "".join(cells_html) + "</tr>"
-        out = ["<table>"]
+            str or None: HTML string for the table, or None when written into out.
+        """
+        buffer = [] if out is None else out
+        append = buffer.append
+        escape = html.escape
+        text_from_blocks = self._text_from_blocks
+        append("<table>")
         hdrs = getattr(table_block, "header_rows", None)
+        sections = []
         if hdrs:
-            out.append("<thead>")
-            for hr in hdrs:
-                out.append(row_html(hr, "th"))
-            out.append("</thead>")
-        out.append("<tbody>")
-        for br in getattr(table_block, "body_rows", []) or []:
-            out.append(row_html(br, "td"))
-        out.append("</tbody></table>")
-        return "".join(out)
-    
+            sections.append(("<thead>", hdrs, "th", "</thead>"))
+        sections.append(("<tbody>", getattr(table_block, "body_rows", []) or [], "td", ""))
+        for open_tag, rows, cell_tag, close_tag in sections:
+            append(open_tag)
+            for row in rows:
+                append("<tr>")
+                for cell in getattr(row, "cells", []) or []:
+                    txt = text_from_blocks(getattr(cell, "blocks", None))
+                    row_span = getattr(cell, "row_span", 1)
+                    col_span = getattr(cell, "col_span", 1)
+                    attr_str = ""
+                    if row_span > 1:
+                        attr_str += f' rowspan="{row_span}"'
+                    if col_span > 1:
+                        attr_str += f' colspan="{col_span}"'
+                    append(f"<{cell_tag}{attr_str}>{escape(txt)}</{cell_tag}>")
+                append("</tr>")
+            append(close_tag)
+        append("</tbody></table>")
+        if out is None:
+            return "".join(buffer)
+        return None
+
     def render_html_blocks(self, blocks):
         """
         Renders a list of document blocks into HTML, handling tables, images, headings, lists, and paragraphs.
+        Nested blocks are walked with an explicit stack and written into one output buffer, so large layouts
+        are not limited by the recursion depth.
 
         Args:
             blocks (list): List of block objects from Document AI or similar sources.
@@ -126,65 +141,233 @@ class DocAIManager:
             str: HTML string representing the rendered document.
         """
         out = []
-        i = 0
-        n = len(blocks or [])
-        while i < n:
-            b = blocks[i]
-            tb = getattr(b, "table_block", None)
-            if tb:
-                out.append(self._render_table(tb))
+        append = out.append
+        escape = html.escape
+        is_noise_line = self._is_noise_line
+        heading_tags = {}
+        stack = [(blocks or [], 0)]
+        while stack:
+            level_blocks, i = stack.pop()
+            n = len(level_blocks)
+            while i < n:
+                b = level_blocks[i]
                 i += 1
-                continue
-            ib = getattr(b, "image_block", None)
-            if ib:
-                uri = getattr(ib, "image_uri", None)
-                if uri:
-                    out.append(f"<img src='{html.escape(uri)}' alt='Document image'/>")
-                i += 1
-                continue
-            x = getattr(b, "text_block", None)
-            if x:
-                raw = (getattr(x, "text", "") or "").strip()
-                ttype = (getattr(x, "type_", "") or "").lower()
-                if ttype in ("footer", "page-number"):
-                    i += 1
-                    continue
-                if self._is_noise_line(raw):
-                    i += 1
+                tb = getattr(b, "table_block", None)
+                if tb:
+                    self._render_table(tb, out)
                     continue
-                if raw.startswith(("•", "-")):
-                    items = []
-                    while i < n:
-                        b2 = blocks[i]
-                        x2 = getattr(b2, "text_block", None)
-                        if not x2:
-                            break
-                        t2 = (getattr(x2, "text", "") or "").strip()
-                        if not t2.startswith(("•", "-")):
-                            break
-                        items.append(f"<li>{html.escape(t2.lstrip('•-').strip())}</li>")
-                        i += 1
-                    out.append("<ul>" + "".join(items) + "</ul>")
+                ib = getattr(b, "image_block", None)
+                if ib:
+                    uri = getattr(ib, "image_uri", None)
+                    if uri:
+                        append(f"<img src='{escape(uri)}' alt='Document image'/>")
                     continue
-
-                tag = self._map_heading_tag(ttype)
-                esc = html.escape(raw)
-                if tag:
-                    out.append(f"<{tag}>{esc}</{tag}>")
-                elif ttype in ("caption", "figcaption"):
-                    out.append(f"<figcaption>{esc}</figcaption>")
-                else:
-                    out.append(f"<p>{esc}</p>")
+                x = getattr(b, "text_block", None)
                 child_blocks = getattr(b, "blocks", None)
-                if child_blocks:
-                    out.append(self.render_html_blocks(child_blocks))
-                tb_child = getattr(x, "blocks", None)
-                if tb_child:
-                    out.append(self.render_html_blocks(tb_child))
+                if x:
+                    raw = (getattr(x, "text", "") or "").strip()
+                    ttype = (getattr(x, "type_", "") or "").lower()
+                    if ttype in ("footer", "page-number") or is_noise_line(raw):
+                        continue
+                    if raw.startswith(("•", "-")):
+                        append("<ul>")
+                        append(f"<li>{escape(raw.lstrip('•-').strip())}</li>")
+                        while i < n:
+                            x2 = getattr(level_blocks[i], "text_block", None)
+                            if not x2:
+                                break
+                            t2 = (getattr(x2, "text", "") or "").strip()
+                            if not t2.startswith(("•", "-")):
+                                break
+                            append(f"<li>{escape(t2.lstrip('•-').strip())}</li>")
+                            i += 1
+                        append("</ul>")
+                        continue
+                    if ttype not in heading_tags:
+                        heading_tags[ttype] = self._map_heading_tag(ttype)
+                    tag = heading_tags[ttype]
+                    esc = escape(raw)
+                    if tag:
+                        append(f"<{tag}>{esc}</{tag}>")
+                    elif ttype in ("caption", "figcaption"):
+                        append(f"<figcaption>{esc}</figcaption>")
+                    else:
+                        append(f"<p>{esc}</p>")
+                    tb_child = getattr(x, "blocks", None)
+                else:
+                    tb_child = None
+                if child_blocks or tb_child:
+                    # Resume this level after the children: the block's own children first, then the text block's.
+                    stack.append((level_blocks, i))
+                    if tb_child:
+                        stack.append((tb_child, 0))
+                    if child_blocks:
+                        stack.append((child_blocks, 0))
+                    break
+        return "".join(out)
+
+    def _table_cells(self, table_block):
+        """
+        Extracts the rows of a table block (header rows first) as lists of {"text", "row_span", "col_span"} dicts.
+
+        Returns:
+            tuple: (rows, number of header rows)
+        """
+        header_rows = getattr(table_block, "header_rows", None) or []
+        rows = []
+        for row in list(header_rows) + list(getattr(table_block, "body_rows", []) or []):
+            rows.append([
+                {
+                    "text": self._text_from_blocks(getattr(cell, "blocks", None)),
+                    "row_span": getattr(cell, "row_span", 1) or 1,
+                    "col_span": getattr(cell, "col_span", 1) or 1,
+                }
+                for cell in getattr(row, "cells", []) or []
+            ])
+        return rows, len(header_rows)
+
+    def _block_page(self, b, parent_page, first_page):
+        page_span = getattr(b, "page_span", None)
+        page_start = getattr(page_span, "page_start", 0) if page_span else 0
+        if page_start:
+            return first_page + page_start - 1
+        return parent_page
+
+    def build_layout(self, blocks, first_page=1):
+        """
+        Converts document blocks into a flat, typed layout: the same blocks render_html_blocks would output, in the same order,
+        as JSON-serializable dicts instead of HTML.
+
+        Args:
+            blocks (list): List of block objects from Document AI or similar sources.
+            first_page (int): Page number of the first page of the processed document (e.g. the page sent alone to OCR). Default is 1.
+
+        Returns:
+            list: Dicts with keys:
+                kind (str): "heading", "paragraph", "caption", "list", "table" or "image".
+                level (int or None): Heading level (1-6) for headings.
+                page (int): Page number, from the block's page span (or its parent's).
+                text (str): Plain text (list items and table cells joined with spaces; "" for images).
+                cells (list or None): Table rows (header rows first) of {"text", "row_span", "col_span"} dicts.
+                header_rows (int, tables only): Number of header rows at the start of cells.
+                items (list, lists only): Text of each list item.
+                uri (str, images only): Image URI.
+
+        Example:
+            layout = doc_ai_manager.build_layout(document.document_layout.blocks, first_page=12)
+        """
+        layout = []
+        append = layout.append
+        is_noise_line = self._is_noise_line
+        stack = [(blocks or [], 0, first_page)]
+        while stack:
+            level_blocks, i, parent_page = stack.pop()
+            n = len(level_blocks)
+            while i < n:
+                b = level_blocks[i]
                 i += 1
-                continue
-            child_blocks = getattr(b, "blocks", None)
-            if child_blocks:
-                out.append(self.render_html_blocks(child_blocks))
-            i += 1
+                page = self._block_page(b, parent_page, first_page)
+                tb = getattr(b, "table_block", None)
+                if tb:
+                    cells, header_rows = self._table_cells(tb)
+                    text = " ".join(cell["text"] for row in cells for cell in row if cell["text"])
+                    append({"kind": "table", "level": None, "page": page, "text": text, "cells": cells, "header_rows": header_rows})
+                    continue
+                ib = getattr(b, "image_block", None)
+                if ib:
+                    uri = getattr(ib, "image_uri", None)
+                    if uri:
+                        append({"kind": "image", "level": None, "page": page, "text": "", "cells": None, "uri": uri})
+                    continue
+                x = getattr(b, "text_block", None)
+                child_blocks = getattr(b, "blocks", None)
+                if x:
+                    raw = (getattr(x, "text", "") or "").strip()
+                    ttype = (getattr(x, "type_", "") or "").lower()
+                    if ttype in ("footer", "page-number") or is_noise_line(raw):
+                        continue
+                    if raw.startswith(("•", "-")):
+                        items = [raw.lstrip("•-").strip()]
+                        while i < n:
+                            x2 = getattr(level_blocks[i], "text_block", None)
+                            if not x2:
+                                break
+                            t2 = (getattr(x2, "text", "") or "").strip()
+                            if not t2.startswith(("•", "-")):
+                                break
+                            items.append(t2.lstrip("•-").strip())
+                            i += 1
+                        append({"kind": "list", "level": None, "page": page, "text": " ".join(item for item in items if item), "cells": None, "items": items})
+                        continue
+                    tag = self._map_heading_tag(ttype)
+                    if tag:
+                        append({"kind": "heading", "level": int(tag[1]), "page": page, "text": raw, "cells": None})
+                    elif ttype in ("caption", "figcaption"):
+                        append({"kind": "caption", "level": None, "page": page, "text": raw, "cells": None})
+                    else:
+                        append({"kind": "paragraph", "level": None, "page": page, "text": raw, "cells": None})
+                    tb_child = getattr(x, "blocks", None)
+                else:
+                    tb_child = None
+                if child_blocks or tb_child:
+                    stack.append((level_blocks, i, parent_page))
+                    if tb_child:
+                        stack.append((tb_child, 0, page))
+                    if child_blocks:
+                        stack.append((child_blocks, 0, page))
+                    break
+        return layout
+
+    def render_layout_html(self, layout):
+        """
+        Renders a layout built by build_layout as HTML. render_layout_html(build_layout(blocks)) is the same as render_html_blocks(blocks).
+
+        Args:
+            layout (list): Layout block dicts.
+
+        Returns:
+            str: HTML string.
+        """
+        out = []
+        append = out.append
+        escape = html.escape
+        for block in layout:
+            kind = block["kind"]
+            if kind == "heading":
+                append(f"<h{block['level']}>{escape(block['text'])}</h{block['level']}>")
+            elif kind == "caption":
+                append(f"<figcaption>{escape(block['text'])}</figcaption>")
+            elif kind == "list":
+                append("<ul>" + "".join(f"<li>{escape(item)}</li>" for item in block["items"]) + "</ul>")
+            elif kind == "image":
+                append(f"<img src='{escape(block['uri'])}' alt='Document image'/>")
+            elif kind == "table":
+                rows = block["cells"] or []
+                header_rows = rows[:block.get("header_rows", 0)]
+                body_rows = rows[block.get("header_rows", 0):]
+                append("<table>")
+                for open_tag, table_rows, cell_tag, close_tag in (("<thead>", header_rows, "th", "</thead>"), ("<tbody>", body_rows, "td", "")):
+                    if cell_tag == "th" and not table_rows:
+                        continue
+                    append(open_tag)
+                    for row in table_rows:
+                        append("<tr>")
+                        for cell in row:
+                            attr_str = ""
+                            if cell["row_span"] > 1:
+                                attr_str += f' rowspan="{cell["row_span"]}"'
+                            if cell["col_span"] > 1:
+                                attr_str += f' colspan="{cell["col_span"]}"'
+                            append(f"<{cell_tag}{attr_str}>{escape(cell['text'])}</{cell_tag}>")
+                        append("</tr>")
+                    append(close_tag)
+                append("</tbody></table>")
+            else:
+                append(f"<p>{escape(block['text'])}</p>")
         return "".join(out)
+
+    def layout_to_text(self, layout):
+        """
+        Returns the plain text of a layout (texts of its blocks joined with spaces), without going through HTML.
+        """
+        return " ".join(block["text"] for block in layout if block["text"])
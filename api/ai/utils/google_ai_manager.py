@@ -10,7 +10,7 @@ import base64
 import copy
 
 
-from ai.utils.ai_manager import BaseAIManager
+from ai.utils.ai_manager import BaseAIManager, get_loop_client
 from ai.utils.audio_manager import AudioManager
 
 class GoogleAIManager(BaseAIManager):
@@ -54,6 +54,81 @@ class GoogleAIManager(BaseAIManager):
             },
         }
 
+    def _apply_completion_cost(self, prompt, response_text):
+        enc = tiktoken.get_encoding("cl100k_base")
+        input_token_count = len(enc.encode(prompt))
+        output_token_count = len(enc.encode(response_text))
+        total_cost = (input_token_count / 1000) * self.GOOGLE_AI_PRICING["gemini-pro"]["input_per_1k_token"] + (output_token_count / 1000) * self.GOOGLE_AI_PRICING["gemini-pro"]["output_per_1k_token"]
+        self._apply_cost(cost=total_cost, service="GOOGLE_COMPLETION")
+
+    def _get_stt_duration_seconds(self, response, audio_bytes, encoding, file_path):
+        duration_seconds = None
+        if hasattr(response, "total_billed_time") and response.total_billed_time:
+            duration_seconds = response.total_billed_time.total_seconds()
+        else:
+            if encoding == speech.RecognitionConfig.AudioEncoding.LINEAR16:
+                audio_manager = AudioManager()
+                duration_seconds = audio_manager.get_wav_duration(audio_bytes)
+            elif encoding == speech.RecognitionConfig.AudioEncoding.MP3 and file_path:
+                try:
+                    duration_seconds = MP3(file_path).info.length
+                except Exception as e:
+                    print(f"Error reading MP3 duration: {e}")
+                    duration_seconds = 0
+            elif encoding == speech.RecognitionConfig.AudioEncoding.FLAC and file_path:
+                try:
+                    duration_seconds = FLAC(file_path).info.length
+                except Exception as e:
+                    print(f"Error reading FLAC duration: {e}")
+                    duration_seconds = 0
+        return duration_seconds
+
+    def _apply_stt_cost(self, duration_seconds):
+        duration_minutes = (duration_seconds / 60) if duration_seconds else 0
+        price_per_minute = self.GOOGLE_AI_PRICING["speech-to-text"]["audio_stt_per_1_minute"]
+        cost = duration_minutes * price_per_minute
+        self._apply_cost(cost=cost, service="GOOGLE_STT")
+
+    def _format_stt_results(self, response):
+        results = []
+        for result in response.results:
+            alt = result.alternatives[0]
+            words = []
+            for word_info in alt.words:
+                words.append({
+                    "word": word_info.word,
+                    "start_time": word_info.start_time.total_seconds(),
+                    "end_time": word_info.end_time.total_seconds()
+                })
+            results.append({
+                "transcript": alt.transcript,
+                "words": words
+            })
+        return results
+
+    def _build_tts_request(self, text, voice_name, audio_encoding, language_code):
+        if isinstance(text, str) and text.strip().startswith("<speak>"):
+            input_text = texttospeech.SynthesisInput(ssml=text)
+        else:
+            input_text = texttospeech.SynthesisInput(text=text)
+        voice = texttospeech.VoiceSelectionParams(
+            name=voice_name,
+            language_code=language_code,
+        )
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=audio_encoding,
+        )
+        return input_text, voice, audio_config
+
+    def _apply_tts_cost(self, text, voice_name):
+        char_count = len(text)
+        if "Wavenet" in voice_name:
+            price_per_1k = self.GOOGLE_AI_PRICING["text-to-speech"]["tts_premium_per_1k_char"]
+        else:
+            price_per_1k = self.GOOGLE_AI_PRICING["text-to-speech"]["tts_standard_per_1k_char"]
+        cost = (char_count / 1000) * price_per_1k
+        self._apply_cost(cost=cost, service="GOOGLE_TTS")
+
     def add_message(self, role, text=None, max_history=5):
         """
         Add a message to the conversation history. For Google Gemini, concatenates the last max_history turns in order,
@@ -130,13 +205,43 @@ class GoogleAIManager(BaseAIManager):
         use_prompt = prompt if prompt is not None else getattr(self, "prompt", None)
         if not use_prompt:
             raise ValueError("Prompt is empty. Add messages before generating a response.")
+        cache_key, cached_response = self._get_cached_completion(self.model.model_name, use_prompt, max_token)
+        if cached_response is not None:
+            self.clear_messages()
+            return cached_response
         response = self.model.generate_content(use_prompt, generation_config={"max_output_tokens": max_token})
-        enc = tiktoken.get_encoding("cl100k_base") 
-        input_token_count = len(enc.encode(use_prompt))
-        output_token_count = len(enc.encode(response.text))
-        total_cost = (input_token_count / 1000) * self.GOOGLE_AI_PRICING["gemini-pro"]["input_per_1k_token"] + (output_token_count / 1000) * self.GOOGLE_AI_PRICING["gemini-pro"]["output_per_1k_token"]
-        self._apply_cost(cost=total_cost, service="GOOGLE_COMPLETION")
+        self._apply_completion_cost(use_prompt, response.text)
         self.clear_messages()
+        self._set_cached_completion(cache_key, response.text)
+        return response.text
+
+    async def agenerate_response(self, max_token=2000, prompt=None):
+        """
+        Awaitable counterpart of generate_response, backed by GenerativeModel.generate_content_async.
+
+        Args:
+            max_token (int): Maximum number of tokens in the response. Default is 2000.
+            prompt (str): The prompt. If None, uses the prompt built by add_message.
+
+        Returns:
+            str: The model's response text.
+
+        Example:
+            reply = await manager.agenerate_response(max_token=500)
+        """
+        if not self.model:
+            raise RuntimeError("Generative Language API not configured.")
+        use_prompt = prompt if prompt is not None else getattr(self, "prompt", None)
+        if not use_prompt:
+            raise ValueError("Prompt is empty. Add messages before generating a response.")
+        cache_key, cached_response = await self._aget_cached_completion(self.model.model_name, use_prompt, max_token)
+        if cached_response is not None:
+            self.clear_messages()
+            return cached_response
+        response = await self.model.generate_content_async(use_prompt, generation_config={"max_output_tokens": max_token})
+        await self._run_cost_off_loop(self._apply_completion_cost, use_prompt, response.text)
+        self.clear_messages()
+        await self._aset_cached_completion(cache_key, response.text)
         return response.text
     
     def stt(self, audio_bytes, language_code='en-US', encoding=None, file_path=None):
@@ -163,46 +268,36 @@ class GoogleAIManager(BaseAIManager):
             enable_automatic_punctuation=True
         )
         response = client.recognize(config=config, audio=audio)
+        duration_seconds = self._get_stt_duration_seconds(response, audio_bytes, encoding, file_path)
+        self._apply_stt_cost(duration_seconds)
+        return self._format_stt_results(response)
 
-        duration_seconds = None
-        if hasattr(response, "total_billed_time") and response.total_billed_time:
-            duration_seconds = response.total_billed_time.total_seconds()
-        else:
-            if encoding == speech.RecognitionConfig.AudioEncoding.LINEAR16:
-                audio_manager = AudioManager()
-                duration_seconds = audio_manager.get_wav_duration(audio_bytes)
-            elif encoding == speech.RecognitionConfig.AudioEncoding.MP3 and file_path:
-                try:
-                    duration_seconds = MP3(file_path).info.length
-                except Exception as e:
-                    print(f"Error reading MP3 duration: {e}")
-                    duration_seconds = 0
-            elif encoding == speech.RecognitionConfig.AudioEncoding.FLAC and file_path:
-                try:
-                    duration_seconds = FLAC(file_path).info.length
-                except Exception as e:
-                    print(f"Error reading FLAC duration: {e}")
-                    duration_seconds = 0
+    async def astt(self, audio_bytes, language_code='en-US', encoding=None, file_path=None):
+        """
+        Awaitable counterpart of stt, backed by the speech.SpeechAsyncClient of the running event loop (see aclose_shared_clients).
 
-        duration_minutes = (duration_seconds / 60) if duration_seconds else 0
-        price_per_minute = self.GOOGLE_AI_PRICING["speech-to-text"]["audio_stt_per_1_minute"]
-        cost = duration_minutes * price_per_minute
-        self._apply_cost(cost=cost, service="GOOGLE_STT")
-        results = []
-        for result in response.results:
-            alt = result.alternatives[0]
-            words = []
-            for word_info in alt.words:
-                words.append({
-                    "word": word_info.word,
-                    "start_time": word_info.start_time.total_seconds(),
-                    "end_time": word_info.end_time.total_seconds()
-                })
-            results.append({
-                "transcript": alt.transcript,
-                "words": words
-            })
-        return results
+        Args:
+            audio_bytes (bytes): The input audio data.
+            language_code (str): Language code of the audio. Default is 'en-US'.
+            encoding: The audio encoding format (e.g., LINEAR16, MP3, FLAC).
+            file_path (str): Optional path to the audio file (for duration calculation).
+
+        Returns:
+            dict: The transcription result.
+        """
+        if encoding is None:
+            encoding = speech.RecognitionConfig.AudioEncoding.LINEAR16
+        speech_client = get_loop_client("google_speech", speech.SpeechAsyncClient, aclose=lambda client: client.transport.close())
+        audio = speech.RecognitionAudio(content=audio_bytes)
+        config = speech.RecognitionConfig(
+            encoding=encoding,
+            language_code=language_code,
+            enable_automatic_punctuation=True
+        )
+        response = await speech_client.recognize(config=config, audio=audio)
+        duration_seconds = self._get_stt_duration_seconds(response, audio_bytes, encoding, file_path)
+        await self._run_cost_off_loop(self._apply_stt_cost, duration_seconds)
+        return self._format_stt_results(response)
 
     def tts(self, text, voice_name="en-US-Wavenet-D", audio_encoding=texttospeech.AudioEncoding.MP3, language_code="en-US"):
         """
@@ -218,30 +313,36 @@ class GoogleAIManager(BaseAIManager):
             bytes: The audio content in the specified format.
         """
         client = texttospeech.TextToSpeechClient()
-        if isinstance(text, str) and text.strip().startswith("<speak>"):
-            input_text = texttospeech.SynthesisInput(ssml=text)
-        else:
-            input_text = texttospeech.SynthesisInput(text=text)
-        voice = texttospeech.VoiceSelectionParams(
-            name=voice_name,
-            language_code=language_code,
-        )
-        audio_config = texttospeech.AudioConfig(
-            audio_encoding=audio_encoding,
-        )
+        input_text, voice, audio_config = self._build_tts_request(text, voice_name, audio_encoding, language_code)
         response = client.synthesize_speech(
             input=input_text,
             voice=voice,
             audio_config=audio_config,
         )
+        self._apply_tts_cost(text, voice_name)
+        return response.audio_content
 
-        char_count = len(text)
-        if "Wavenet" in voice_name:
-            price_per_1k = self.GOOGLE_AI_PRICING["text-to-speech"]["tts_premium_per_1k_char"]
-        else:
-            price_per_1k = self.GOOGLE_AI_PRICING["text-to-speech"]["tts_standard_per_1k_char"]
-        cost = (char_count / 1000) * price_per_1k
-        self._apply_cost(cost=cost, service="GOOGLE_TTS")
+    async def atts(self, text, voice_name="en-US-Wavenet-D", audio_encoding=texttospeech.AudioEncoding.MP3, language_code="en-US"):
+        """
+        Awaitable counterpart of tts, backed by the texttospeech.TextToSpeechAsyncClient of the running event loop (see aclose_shared_clients).
+
+        Args:
+            text (str): The text to convert to speech.
+            voice_name (str): The name of the voice to use. Default is "en-US-Wavenet-D".
+            audio_encoding (str): The audio encoding format. Default is MP3.
+            language_code (str): The language code for the voice. Default is "en-US".
+
+        Returns:
+            bytes: The audio content in the specified format.
+        """
+        tts_client = get_loop_client("google_tts", texttospeech.TextToSpeechAsyncClient, aclose=lambda client: client.transport.close())
+        input_text, voice, audio_config = self._build_tts_request(text, voice_name, audio_encoding, language_code)
+        response = await tts_client.synthesize_speech(
+            input=input_text,
+            voice=voice,
+            audio_config=audio_config,
+        )
+        await self._run_cost_off_loop(self._apply_tts_cost, text, voice_name)
         return response.audio_content
     
     def advanced_tts(
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import time
+from django.core.cache import cache
+
+from ai.utils.chunk_manager import ChunkPipeline
+
+class OCRJobManager:
+    def __init__(self, ocr_manager, ttl=60 * 60 * 24 * 7):
+        """
+        Runs OCRManager.iter_pdf_html as a resumable job: the HTML of every page is checkpointed in Redis as soon as it is ready,
+        keyed by the document hash and the OCR options. The page range is not part of the job, so a restarted, retried or
+        resized range only OCRs (and pays for) the pages that are missing, and a finished range is served from the stored
+        pages without calling Document AI.
+
+        Args:
+            ocr_manager (OCRManager): Manager used to OCR the missing pages.
+            ttl (int): Time to live of a job's stored pages in seconds, refreshed on every checkpoint. Default is 7 days.
+
+        Example:
+            job_manager = OCRJobManager(ocr_manager)
+            job_id = job_manager.build_job_id(pdf_bytes)
+            html_src, simple_text = job_manager.run(pdf_bytes, start_page=1, end_page=300, max_workers=4)
+        """
+        self.ocr_manager = ocr_manager
+        self.ttl = ttl
+        self.client = cache.client.get_client(write=True)  # direct redis client
+
+    def _pages_key(self, job_id):
+        return f"ocr_job:{job_id}:pages"
+
+    def _meta_key(self, job_id):
+        return f"ocr_job:{job_id}:meta"
+
+    def build_job_id(self, pdf_bytes, dpi=200, use_text_layer=False):
+        """
+        Build the ID of a job from the document hash and every option that changes the HTML of a page.
+        Page ranges are not part of it: every range of the same document and options shares the stored pages.
+
+        Returns:
+            str: SHA-256 hex digest identifying the job.
+        """
+        doc_hash = self.ocr_manager.raster_manager.build_doc_hash(pdf_bytes)
+        raw = json.dumps([doc_hash, self.ocr_manager.GOOGLE_CLOUD_PROCESSOR_ID, dpi, use_text_layer])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_stored_pages(self, job_id):
+        """
+        Get the checkpointed pages of a job.
+
+        Returns:
+            dict: page number -> HTML output.
+        """
+        raw = self.client.hgetall(self._pages_key(job_id))
+        return {int(k): v.decode("utf-8") if isinstance(v, bytes) else v for k, v in raw.items()}
+
+    def save_page(self, job_id, page, html_output):
+        """
+        Checkpoint the HTML output of one page and refresh the job's TTL.
+        """
+        pipe = self.client.pipeline()
+        pipe.hset(self._pages_key(job_id), str(page), html_output)
+        pipe.hset(self._meta_key(job_id), "updated_at", time.time())
+        if self.ttl:
+            pipe.expire(self._pages_key(job_id), self.ttl)
+            pipe.expire(self._meta_key(job_id), self.ttl)
+        pipe.execute()
+
+    def _get_meta(self, job_id):
+        raw = self.client.hgetall(self._meta_key(job_id))
+        return {(k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v) for k, v in raw.items()}
+
+    def _get_pages(self, number_of_pages, start_page=None, end_page=None):
+        start = max(start_page or 1, 1)
+        end = min(end_page or number_of_pages, number_of_pages)
+        return list(range(start, end + 1))
+
+    def get_status(self, job_id, start_page=None, end_page=None):
+        """
+        Get the progress of a job over a page range (default: the whole document).
+
+        Returns:
+            dict: status of the last run ("missing", "running", "failed" or "done"), pages (pages in the range),
+                done (checkpointed pages in the range) and error.
+        """
+        meta = self._get_meta(job_id)
+        if not meta:
+            return {"status": "missing", "pages": 0, "done": 0, "error": ""}
+        pages = self._get_pages(int(meta.get("page_count", 0)), start_page, end_page)
+        stored = self.get_stored_pages(job_id)
+        return {
+            "status": meta.get("status", "running"),
+            "pages": len(pages),
+            "done": sum(1 for page in pages if page in stored),
+            "error": meta.get("error", ""),
+        }
+
+    def get_result(self, job_id, start_page=None, end_page=None):
+        """
+        Serve a page range (default: the whole document) of a job from its stored pages.
+
+        Returns:
+            tuple: (html_src, simple_text) as returned by OCRManager.read_pdf_bytes, or None if a page of the range is not stored.
+        """
+        meta = self._get_meta(job_id)
+        if not meta:
+            return None
+        pages = self._get_pages(int(meta.get("page_count", 0)), start_page, end_page)
+        stored = self.get_stored_pages(job_id)
+        if not pages or any(page not in stored for page in pages):
+            return None
+        html_src = "".join(stored[page] for page in pages)
+        chunk_pipeline = ChunkPipeline()
+        simple_text = chunk_pipeline.process(html_src, "get_text")
+        return html_src, simple_text
+
+    def run(self, pdf_bytes, progress_callback=None, start_page=None, end_page=None, max_workers=1, max_retries=2, dpi=200, use_text_layer=False):
+        """
+        OCR a PDF like OCRManager.read_pdf_bytes (page mode), skipping the pages already checkpointed by a previous run of the same job.
+
+        Args:
+            pdf_bytes (bytes): PDF file data.
+            progress_callback (callable, optional): Function called after each newly processed page. Signature: (page, total).
+            start_page (int, optional): First page to process (1-based). If None, starts from first page.
+            end_page (int, optional): Last page to process (1-based, inclusive). If None, ends at last page.
+            max_workers (int): Number of pages OCR'd in parallel (default 1).
+            max_retries (int): Retries per failed page (default 2).
+            dpi (int): Rendering resolution of the pages (default 200).
+            use_text_layer (bool): Take pages with a usable native text layer from PyPDF2 (default False).
+
+        Behavior:
+            - Stored pages are kept, whatever range stored them; the job resumes from the first missing page of the range.
+            - Each page is checkpointed by its worker as soon as it is OCR'd, even if pages before it are still running.
+            - Pages that failed after all retries are not stored: the job is marked "failed" and RuntimeError is raised,
+              so re-running the job (e.g. a Celery retry) OCRs only those pages.
+            - If the process dies, re-running the job picks up where it stopped.
+
+        Returns:
+            tuple:
+                html_src (str): Concatenated HTML output for all processed pages.
+                simple_text (str): Extracted plain text from the HTML.
+        """
+        job_id = self.build_job_id(pdf_bytes, dpi=dpi, use_text_layer=use_text_layer)
+        number_of_pages = self.ocr_manager.get_pdf_page_count(pdf_bytes)
+        pages = self._get_pages(number_of_pages, start_page, end_page)
+        stored = self.get_stored_pages(job_id)
+        missing = [page for page in pages if page not in stored]
+        self.client.hset(self._meta_key(job_id), mapping={"status": "running", "page_count": number_of_pages, "error": ""})
+        if self.ttl:
+            self.client.expire(self._meta_key(job_id), self.ttl)
+        if missing:
+            print(f"OCR job {job_id[:12]}: {len(pages) - len(missing)}/{len(pages)} pages stored, resuming from page {missing[0]}")
+
+        def checkpoint(page, html_output):
+            if html_output is not None:
+                self.save_page(job_id, page, html_output)
+
+        try:
+            html_parts = self.ocr_manager.iter_pdf_html(
+                pdf_bytes,
+                progress_callback=progress_callback,
+                max_workers=max_workers,
+                max_retries=max_retries,
+                dpi=dpi,
+                use_text_layer=use_text_layer,
+                page_numbers=missing,
+                failed_output=None,
+                page_callback=checkpoint,
+            ) if missing else []
+            failed_pages = []
+            for page, html_output in zip(missing, html_parts):
+                if html_output is None:
+                    failed_pages.append(page)
+                    continue
+                stored[page] = html_output
+            if failed_pages:
+                raise RuntimeError(f"OCR failed for pages {failed_pages} after {max_retries + 1} attempts")
+        except Exception as e:
+            self.client.hset(self._meta_key(job_id), mapping={"status": "failed", "error": str(e)})
+            raise
+        self.client.hset(self._meta_key(job_id), "status", "done")
+        html_src = "".join(stored[page] for page in pages)
+        chunk_pipeline = ChunkPipeline()
+        simple_text = chunk_pipeline.process(html_src, "get_text")
+        return html_src, simple_text
+
+    def clear(self, job_id):
+        """Remove the stored pages and status of a job."""
+        self.client.delete(self._pages_key(job_id), self._meta_key(job_id))
@@ -1,14 +1,23 @@
 import base64
+import hashlib
+import html
+import re
+import time
+import threading
 from io import BytesIO
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageEnhance, ImageFilter
 from google.cloud import vision, documentai
 from google.api_core.client_options import ClientOptions
 from pdf2image import convert_from_bytes
 import requests
-from PyPDF2 import PdfReader
+from PyPDF2 import PdfReader, PdfWriter
 from weasyprint import HTML
 
 from ai.utils.doc_ai_managr import DocAIManager
+from ai.utils.pdf_raster_manager import PdfRasterManager
+from ai.utils.cache_manager import CacheManager
 from ai.utils.chunk_manager import ChunkPipeline
 from ai.tasks import apply_cost_task
 
@@ -30,13 +39,34 @@ class OCRManager:
         self.GOOGLE_CLOUD_PROCESSOR_ID = google_cloud_processor_id
         self.cur_users = cur_users
         self.cost = 0
+        self._cost_lock = threading.Lock()
+        self._client_lock = threading.Lock()
+        self._document_ai_client = None
+        self.raster_manager = PdfRasterManager()
+        self.last_read_stats = {}
+        self.page_cache = None
+        # Options of enhance_image_for_ocr used before pages are sent to Document AI.
+        self.ocr_image_options = {"grayscale": True, "binarize": False, "contrast": 1.5, "sharpen": True, "target_dpi": 300}
 
     def _apply_cost(self, cost, service):
-        self.cost += cost
+        with self._cost_lock:
+            self.cost += cost
+        user_ids = []
         if self.cur_users:
             user_ids = [user.id for user in self.cur_users]
         apply_cost_task.delay(user_ids, cost, service)
 
+    def _get_document_ai_client(self):
+        """
+        Returns the Document AI client shared by every call of this manager (the client is thread-safe).
+        """
+        with self._client_lock:
+            if self._document_ai_client is None:
+                self._document_ai_client = documentai.DocumentProcessorServiceClient(
+                    client_options=ClientOptions(api_endpoint=f"{self.GOOGLE_CLOUD_LOCATION}-documentai.googleapis.com")
+                )
+            return self._document_ai_client
+
     def _png_bytes_to_pdf_bytes(self, png_bytes):
         """
         Converts PNG image bytes to PDF bytes.
@@ -69,6 +99,28 @@ class OCRManager:
         doc_ai_manager = DocAIManager()
         return doc_ai_manager.render_html_blocks(blocks)
 
+    def _docai_blocks_to_layout(self, document):
+        """
+        Converts Document AI blocks to a typed layout using DocAIManager.build_layout (pages numbered from 1).
+
+        Args:
+            document: Document AI document object.
+
+        Returns:
+            list: Layout block dicts.
+        """
+        layout = getattr(document, "document_layout", None)
+        if not layout:
+            return []
+        blocks = getattr(layout, "blocks", [])
+        doc_ai_manager = DocAIManager()
+        return doc_ai_manager.build_layout(blocks)
+
+    def _shift_layout_pages(self, layout, first_page):
+        if first_page == 1:
+            return layout
+        return [dict(block, page=block["page"] + first_page - 1) for block in layout]
+
     def convert_html_to_pdf(self, html_content):
         """
         Converts HTML content to PDF bytes.
@@ -100,6 +152,47 @@ class OCRManager:
         """
         self.cost = 0
 
+    def enable_page_cache(self, ttl=60 * 60 * 24 * 30, max_entries=50000):
+        """
+        Enable the OCR result cache in front of ocr_bytes_using_document_ai. Results are keyed by a hash of the sent
+        image/PDF bytes, the processor ID and the enhancement options, so re-uploaded documents and shared pages
+        (covers, boilerplate) are served from Redis without calling Document AI and without applying any cost.
+
+        Args:
+            ttl (int): Time to live of each cached page in seconds. Default is 30 days.
+            max_entries (int): Maximum number of cached pages before least recently used ones are evicted. Default is 50000.
+
+        Returns:
+            None
+
+        Example:
+            manager.enable_page_cache(ttl=3600)
+        """
+        self.page_cache = CacheManager(namespace="ocr_page", ttl=ttl, max_entries=max_entries)
+
+    def disable_page_cache(self):
+        """
+        Disable the OCR result cache.
+
+        Returns:
+            None
+        """
+        self.page_cache = None
+
+    def get_page_cache_stats(self):
+        """
+        Get hit/miss counters of the OCR result cache.
+
+        Returns:
+            dict: hits, misses, evictions, hit_rate and entries; empty if the cache is not enabled.
+
+        Example:
+            stats = manager.get_page_cache_stats()
+        """
+        if not self.page_cache:
+            return {}
+        return self.page_cache.get_stats()
+
     def convert_pdf_page_to_png_bytes(self, source, page_number):
         """
         Converts a single PDF page to PNG image bytes. Accepts a file path, URL, or bytes.
@@ -174,6 +267,72 @@ class OCRManager:
         im.save(out, format="PNG")
         return out.getvalue()
     
+    def _otsu_threshold(self, gray):
+        """
+        Returns the Otsu threshold of a uint8 grayscale array (the level that maximizes the between-class variance).
+        """
+        hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+        omega = np.cumsum(hist)
+        mu = np.cumsum(hist * np.arange(256))
+        total = omega[-1]
+        denom = omega * (total - omega)
+        sigma = np.zeros(256)
+        valid = denom > 0
+        sigma[valid] = (mu[-1] * omega[valid] - mu[valid] * total) ** 2 / denom[valid]
+        return int(np.argmax(sigma))
+
+    def enhance_image_for_ocr(self, im, grayscale=True, binarize=False, contrast=1.5, sharpen=True, source_dpi=None, target_dpi=300):
+        """
+        Enhances a decoded page image for OCR in memory, on the Pillow image and its NumPy array (no PNG encoding between steps).
+
+        Args:
+            im (PIL.Image.Image): Decoded page image.
+            grayscale (bool): Convert to 8-bit grayscale (default True).
+            binarize (bool): Convert to 1-bit black and white with an Otsu threshold, implies grayscale (default False).
+            contrast (float): Contrast factor around the mean level, 1 keeps it (default 1.5, same as make_img_more_readable).
+            sharpen (bool): Apply ImageFilter.SHARPEN (default True).
+            source_dpi (float, optional): Resolution of the image, if known.
+            target_dpi (int, optional): Downscale images whose source_dpi is higher than this (default 300).
+
+        Returns:
+            PIL.Image.Image: Enhanced image in mode "L", "RGB" or "1".
+        """
+        if grayscale or binarize:
+            im = im.convert("L")
+        elif im.mode not in ("L", "RGB"):
+            im = im.convert("RGB")
+        if source_dpi and target_dpi and source_dpi > target_dpi:
+            scale = target_dpi / source_dpi
+            im = im.resize((max(1, round(im.width * scale)), max(1, round(im.height * scale))), Image.LANCZOS)
+        if sharpen:
+            im = im.filter(ImageFilter.SHARPEN)
+        if binarize:
+            gray = np.asarray(im)
+            return Image.fromarray(gray > self._otsu_threshold(gray))
+        if contrast == 1:
+            return im
+        arr = np.asarray(im, dtype=np.float32)
+        mean = arr.mean()
+        arr = (arr - mean) * contrast + mean
+        return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+
+    def images_to_pdf_bytes(self, images, resolution=300.0):
+        """
+        Writes enhanced page images into one PDF, in a single encode.
+
+        Args:
+            images (list): PIL images, one per page.
+            resolution (float): Resolution stored in the PDF (default 300).
+
+        Returns:
+            bytes or None: PDF file data, or None if images is empty.
+        """
+        if not images:
+            return None
+        out = BytesIO()
+        images[0].save(out, format="PDF", save_all=True, append_images=images[1:], resolution=float(resolution))
+        return out.getvalue()
+
     def ocr_using_document_ai(self, base64_encoded_file, cost_per_page=0.03):
         """
         Processes an image or PDF file using Google Document AI OCR. If input is image, converts to PDF bytes.
@@ -189,11 +348,40 @@ class OCRManager:
             self.cost (float): Total cost for the operation.
         """
         try:
-            client = documentai.DocumentProcessorServiceClient(
-                client_options=ClientOptions(api_endpoint=f"{self.GOOGLE_CLOUD_LOCATION}-documentai.googleapis.com")
+            file_bytes = base64.b64decode(base64_encoded_file)
+        except Exception as e:
+            print(f"Error in Document AI OCR: {e}")
+            return None
+        return self.ocr_bytes_using_document_ai(file_bytes, cost_per_page=cost_per_page)
+
+    def ocr_bytes_using_document_ai(self, file_bytes, cost_per_page=0.03, enhance=True, output_format="html", first_page=1):
+        """
+        Same as ocr_using_document_ai, for raw image or PDF bytes (no base64 round trip).
+
+        Args:
+            file_bytes (bytes): Image or PDF file data.
+            cost_per_page (float, optional): Cost per page for Document AI OCR (default $0.03).
+            enhance (bool, optional): Rasterize and enhance PDF pages before sending them (default True).
+                If False, PDFs are sent as they are. Images are always enhanced.
+            output_format (str, optional): "html" (default) or "layout" for the typed blocks of DocAIManager.build_layout.
+            first_page (int, optional): Page number of the first sent page, used to number layout blocks (default 1).
+
+        Returns:
+            str, list or None: HTML output (or layout blocks) from Document AI OCR, or None on error.
+        """
+        cache_key = None
+        if self.page_cache:
+            cache_key = self.page_cache.build_key(
+                hashlib.sha256(file_bytes).hexdigest(), self.GOOGLE_CLOUD_PROCESSOR_ID, enhance, self.ocr_image_options, output_format
             )
+            html_output = self.page_cache.get(cache_key)
+            if html_output is not None:
+                if output_format == "layout":
+                    return self._shift_layout_pages(html_output, first_page)
+                return html_output
+        try:
+            client = self._get_document_ai_client()
             name = client.processor_path(self.GOOGLE_CLOUD_PROJECT_ID, self.GOOGLE_CLOUD_LOCATION, self.GOOGLE_CLOUD_PROCESSOR_ID)
-            file_bytes = base64.b64decode(base64_encoded_file)
             html_outputs = []
             num_pages = 1
             mime_type = "application/pdf"
@@ -203,26 +391,24 @@ class OCRManager:
                 is_image = True
             except Exception:
                 is_image = False
+            options = self.ocr_image_options
             if is_image:
-                enhanced_img_bytes = self.make_img_more_readable(file_bytes)
-                pdf_bytes = self._png_bytes_to_pdf_bytes(enhanced_img_bytes)
+                source_dpi = (im.info.get("dpi") or (None,))[0]
+                enhanced_im = self.enhance_image_for_ocr(im, source_dpi=source_dpi, **options)
+                pdf_bytes = self.images_to_pdf_bytes([enhanced_im], resolution=min(source_dpi or 300, options.get("target_dpi") or 300))
+            elif not enhance:
+                pdf_bytes = file_bytes
             else:
                 try:
-                    pages = convert_from_bytes(file_bytes, fmt="png")
-                    enhanced_pngs = []
-                    for page in pages:
-                        png_bytes_io = BytesIO()
-                        page.save(png_bytes_io, format="PNG")
-                        enhanced_png = self.make_img_more_readable(png_bytes_io.getvalue())
-                        enhanced_pngs.append(enhanced_png)
-                    # Convert enhanced PNGs back to PDF
-                    pdf_images = [Image.open(BytesIO(png)) for png in enhanced_pngs]
-                    out_pdf = BytesIO()
-                    if pdf_images:
-                        pdf_images[0].save(out_pdf, format="PDF", save_all=True, append_images=pdf_images[1:], resolution=300.0)
-                        pdf_bytes = out_pdf.getvalue()
-                    else:
-                        pdf_bytes = file_bytes
+                    doc_hash = self.raster_manager.open(file_bytes)
+                    try:
+                        source_dpi = self.raster_manager.dpi
+                        pdf_images = []
+                        for _, png_bytes in self.raster_manager.iter_pages(doc_hash):
+                            pdf_images.append(self.enhance_image_for_ocr(Image.open(BytesIO(png_bytes)), source_dpi=source_dpi, **options))
+                    finally:
+                        self.raster_manager.close(doc_hash)
+                    pdf_bytes = self.images_to_pdf_bytes(pdf_images, resolution=min(source_dpi, options.get("target_dpi") or 300)) or file_bytes
                 except Exception as e:
                     print(f"Error enhancing PDF pages: {e}")
                     pdf_bytes = file_bytes
@@ -236,41 +422,248 @@ class OCRManager:
                     raw_document=documentai.RawDocument(content=pdf_bytes, mime_type=mime_type),
                 )
                 res = client.process_document(request=req)
-                html_output = self._docai_blocks_to_html(res.document)
+                if output_format == "layout":
+                    html_output = self._docai_blocks_to_layout(res.document)
+                else:
+                    html_output = self._docai_blocks_to_html(res.document)
                 html_outputs.append(html_output)
             except Exception as e:
                 print(f"Error in Document AI OCR: {e}")
                 return None
             self._apply_cost(cost=num_pages * cost_per_page, service="GOOGLE_OCR")
-            return "\n".join(html_outputs)
+            if output_format == "layout":
+                html_output = [block for layout in html_outputs for block in layout]
+            else:
+                html_output = "\n".join(html_outputs)
+            if cache_key:
+                self.page_cache.set(cache_key, html_output)
+            if output_format == "layout":
+                return self._shift_layout_pages(html_output, first_page)
+            return html_output
         except Exception as e:
             print(f"Error in Document AI OCR: {e}")
             return None
     
-    def read_pdf_bytes(self, pdf_bytes, progress_callback=None, start_page=None, end_page=None):
+    def get_pdf_page_png_bytes(self, pdf_bytes, page_number, doc_hash=None, dpi=200):
         """
-        Extracts and OCRs pages from a PDF file, returning HTML and plain text.
+        Returns the PNG bytes of one PDF page from the rasterize-once page cache (see PdfRasterManager).
 
         Args:
             pdf_bytes (bytes): PDF file data.
-            progress_callback (callable, optional): Function called after each page is processed. Signature: (page, total).
+            page_number (int): The page number (1-based).
+            doc_hash (str, optional): Hash of a document opened in self.raster_manager, skips hashing pdf_bytes again.
+                Without it, pdf_bytes is opened and closed for this page only.
+            dpi (int): Rendering resolution (default 200).
+
+        Returns:
+            bytes or None: PNG image data, or None on error.
+
+        Raises:
+            KeyError: doc_hash is not open (any more) in self.raster_manager.
+        """
+        opened = None
+        try:
+            if doc_hash is None:
+                doc_hash = opened = self.raster_manager.open(pdf_bytes)
+            return self.raster_manager.get_page_png(doc_hash, page_number, dpi=dpi)
+        except KeyError:
+            raise
+        except Exception as e:
+            print(f"Error converting PDF page to PNG: {e}")
+            return None
+        finally:
+            if opened:
+                self.raster_manager.close(opened)
+
+    def ocr_pdf_page(self, pdf_bytes, page_number, max_retries=2, retry_delay=1.0, doc_hash=None, dpi=200, output_format="html", failed_output=""):
+        """
+        Rasterizes and OCRs one PDF page, retrying with exponential backoff when rasterization or OCR fails.
+
+        Args:
+            pdf_bytes (bytes or None): PDF file data. May be None when doc_hash is given.
+            page_number (int): The page number (1-based).
+            max_retries (int): Number of retries after the first failed attempt (default 2).
+            retry_delay (float): Seconds to wait before the first retry, doubled on each retry (default 1.0).
+            doc_hash (str, optional): Hash of the document already opened in self.raster_manager.
+            dpi (int): Rendering resolution (default 200).
+            output_format (str): "html" (default) or "layout" (see ocr_bytes_using_document_ai).
+            failed_output: Returned if every attempt failed (default "", [] in "layout" format). Pass None to tell a failed page
+                from a blank one.
+
+        Returns:
+            str or list: HTML output of the page, or failed_output if every attempt failed.
+        """
+        def ocr_page():
+            png_bytes = self.get_pdf_page_png_bytes(pdf_bytes, page_number, doc_hash=doc_hash, dpi=dpi)
+            return self.ocr_bytes_using_document_ai(png_bytes, output_format=output_format, first_page=page_number) if png_bytes else None
+        result = self._run_with_retries(ocr_page, f"page {page_number}", max_retries=max_retries, retry_delay=retry_delay, default=None)
+        if result is None and failed_output is None:
+            return None
+        if output_format == "layout":
+            return result or []
+        return result if result is not None else failed_output
+
+    def _run_with_retries(self, func, label, max_retries=2, retry_delay=1.0, default=""):
+        """
+        Calls func until it returns something other than None, waiting retry_delay * 2 ** attempt between attempts.
+        Returns default (and reports the failure) if every attempt returned None.
+        """
+        for attempt in range(max_retries + 1):
+            result = func()
+            if result is not None:
+                return result
+            if attempt < max_retries:
+                time.sleep(retry_delay * (2 ** attempt))
+        print(f"Error in Document AI OCR: {label} failed after {max_retries + 1} attempts, skipping it.")
+        return default
+
+    def is_usable_text_layer(self, text, min_chars=80, min_letter_ratio=0.5, max_avg_word_length=20):
+        """
+        Decides whether the native text of a PDF page is good enough to skip OCR.
+        Rejects near-empty pages (scans), undecodable glyphs ("(cid:..)", replacement characters) and text without spaces.
+
+        Args:
+            text (str): Text extracted from the page.
+            min_chars (int): Minimum number of non-space characters (default 80).
+            min_letter_ratio (float): Minimum share of letters among non-space characters (default 0.5).
+            max_avg_word_length (int): Maximum average word length (default 20).
+
+        Returns:
+            bool: True if the text layer can be used instead of OCR.
+        """
+        compact = re.sub(r"\s+", "", text or "")
+        if len(compact) < min_chars:
+            return False
+        if "(cid:" in text or compact.count("\ufffd") > len(compact) * 0.01:
+            return False
+        letters = sum(1 for ch in compact if ch.isalpha())
+        if letters < len(compact) * min_letter_ratio:
+            return False
+        words = text.split()
+        return len(compact) / len(words) <= max_avg_word_length
+
+    def _text_layer_paragraphs(self, text):
+        """
+        Splits extracted page text into paragraphs: blank lines separate paragraphs, hyphenated line breaks are rejoined
+        and the remaining line breaks become spaces.
+        """
+        paragraphs = []
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph = re.sub(r"(\w)-\n(?=[a-z])", r"\1", paragraph)
+            paragraph = " ".join(paragraph.split())
+            if paragraph:
+                paragraphs.append(paragraph)
+        return paragraphs
+
+    def _text_layer_to_html(self, text):
+        """
+        Renders extracted page text as paragraphs (see _text_layer_paragraphs).
+        """
+        return "".join(f"<p>{html.escape(paragraph)}</p>" for paragraph in self._text_layer_paragraphs(text))
+
+    def extract_text_layer_html(self, pdf_bytes, page_numbers, output_format="html"):
+        """
+        Extracts the native text layer of PDF pages with PyPDF2 and keeps the pages whose text is usable (see is_usable_text_layer).
+
+        Args:
+            pdf_bytes (bytes or str): PDF file data, or the path of a PDF file (read lazily instead of loaded in memory).
+            page_numbers (list): Pages to check (1-based).
+            output_format (str): "html" (default) or "layout" for paragraph blocks as built by DocAIManager.build_layout.
+
+        Returns:
+            dict: page_number -> HTML (or layout blocks) for pages that do not need OCR.
+        """
+        if isinstance(pdf_bytes, (bytes, bytearray)):
+            stream = BytesIO(pdf_bytes)
+        else:
+            stream = open(pdf_bytes, "rb")
+        try:
+            return self._extract_text_layer(PdfReader(stream), page_numbers, output_format)
+        finally:
+            stream.close()
+
+    def _extract_text_layer(self, reader, page_numbers, output_format="html"):
+        text_layer = {}
+        for page_number in page_numbers:
+            try:
+                text = reader.pages[page_number - 1].extract_text() or ""
+            except Exception as e:
+                print(f"Error extracting text of page {page_number}: {e}")
+                continue
+            if not self.is_usable_text_layer(text):
+                continue
+            if output_format == "layout":
+                text_layer[page_number] = [
+                    {"kind": "paragraph", "level": None, "page": page_number, "text": paragraph, "cells": None}
+                    for paragraph in self._text_layer_paragraphs(text)
+                ]
+            else:
+                text_layer[page_number] = self._text_layer_to_html(text)
+        return text_layer
+
+    def split_pdf_page_ranges(self, pdf_bytes, start_page=None, end_page=None, pages_per_request=15, page_numbers=None):
+        """
+        Splits a PDF into consecutive page ranges of at most pages_per_request pages.
+
+        Args:
+            pdf_bytes (bytes): PDF file data.
+            start_page (int, optional): First page (1-based). If None, starts from first page.
+            end_page (int, optional): Last page (1-based, inclusive). If None, ends at last page.
+            pages_per_request (int): Maximum pages per range (default 15, the online processing limit of Document AI OCR processors).
+            page_numbers (list, optional): Only include these pages (1-based); a gap starts a new range. Overrides start_page and end_page.
+
+        Returns:
+            list: Tuples (first_page, last_page, range_pdf_bytes) in page order.
+        """
+        reader = PdfReader(BytesIO(pdf_bytes))
+        number_of_pages = len(reader.pages)
+        if page_numbers is None:
+            start = max(start_page or 1, 1)
+            end = min(end_page or number_of_pages, number_of_pages)
+            page_numbers = range(start, end + 1)
+        runs = []
+        for page_number in sorted(page_numbers):
+            if runs and page_number == runs[-1][1] + 1 and page_number - runs[-1][0] < pages_per_request:
+                runs[-1][1] = page_number
+            else:
+                runs.append([page_number, page_number])
+        ranges = []
+        for first_page, last_page in runs:
+            writer = PdfWriter()
+            for page_index in range(first_page - 1, last_page):
+                writer.add_page(reader.pages[page_index])
+            out = BytesIO()
+            writer.write(out)
+            ranges.append((first_page, last_page, out.getvalue()))
+        return ranges
+
+    def iter_pdf_html(self, pdf_bytes, progress_callback=None, start_page=None, end_page=None, max_workers=1, max_retries=2, dpi=200, use_text_layer=False, page_numbers=None, output_format="html", failed_output="", page_callback=None):
+        """
+        OCRs the pages of a PDF file and yields the HTML of each page, in page order, as soon as it and every page before it are ready.
+        Can be passed directly to BaseAIManager.iter_chunks, so chunking starts while later pages are still being OCR'd.
+
+        Args:
+            pdf_bytes (bytes): PDF file data.
+            progress_callback (callable, optional): Function called each time a page completes (in completion order). Signature: (page, total).
             start_page (int, optional): First page to process (1-based). If None, starts from first page.
             end_page (int, optional): Last page to process (1-based, inclusive). If None, ends at last page.
+            max_workers (int): Number of pages rasterized and OCR'd in parallel (default 1).
+            max_retries (int): Retries per failed page (see ocr_pdf_page, default 2).
+            dpi (int): Rendering resolution of the pages (default 200). Pages are rendered once through self.raster_manager,
+                whose temp file and cached pages are released when the iteration ends.
+            use_text_layer (bool): Use the native text of pages that have a usable text layer and only OCR the others (default False).
+            page_numbers (iterable, optional): Exact pages to process (1-based), e.g. the missing pages of a resumed job.
+                Overrides start_page and end_page.
+            output_format (str): "html" (default) or "layout" to yield the typed blocks of each page (see read_pdf_layout).
+            failed_output: Yielded for pages that failed after all retries (see ocr_pdf_page, default "").
+            page_callback (callable, optional): Function called by the worker with the output of each page as soon as it is
+                ready, before the pages in front of it (e.g. to checkpoint it). Signature: (page, html_output).
 
-        Behavior:
-            - Determines the total number of pages in the PDF.
-            - Processes only the pages in the range [start_page, end_page].
-            - For each page:
-                - Converts the page to PNG bytes.
-                - Runs OCR using Document AI and collects HTML output.
-                - Calls progress_callback (if provided) after each page.
-            - Concatenates all HTML outputs.
-            - Extracts plain text from the combined HTML using ChunkPipeline.
+        Yields:
+            str or list: HTML output of each page (failed_output if the page failed after all retries), or its layout blocks.
 
-        Returns:
-            tuple:
-                html_src (str): Concatenated HTML output for all processed pages.
-                simple_text (str): Extracted plain text from the HTML.
+        Sets:
+            self.last_read_stats (dict): pages, ocr_pages and text_layer_pages of this read.
         """
         number_of_pages = self.get_pdf_page_count(pdf_bytes)
         start = start_page if start_page is not None else 1
@@ -279,17 +672,269 @@ class OCRManager:
             start = 1
         if end > number_of_pages:
             end = number_of_pages
-        pdf_texts = []
-        for page in range(start, end + 1):
-            msg = f"Processing page {page}/{number_of_pages}..."
+        if page_numbers is not None:
+            pages = sorted(page for page in set(page_numbers) if 1 <= page <= number_of_pages)
+        else:
+            pages = list(range(start, end + 1))
+        text_layer = self.extract_text_layer_html(pdf_bytes, pages, output_format=output_format) if use_text_layer else {}
+        self.last_read_stats = {"pages": len(pages), "ocr_pages": len(pages) - len(text_layer), "text_layer_pages": len(text_layer)}
+        doc_hash = self.raster_manager.open(pdf_bytes) if len(text_layer) < len(pages) else None
+
+        def process_page(page):
+            if page in text_layer:
+                html_output = text_layer[page]
+            else:
+                html_output = self.ocr_pdf_page(pdf_bytes, page, max_retries=max_retries, doc_hash=doc_hash, dpi=dpi, output_format=output_format, failed_output=failed_output)
+            if page_callback:
+                page_callback(page, html_output)
+            msg = f"Processed page {page}/{number_of_pages}..."
             if progress_callback:
                 progress_callback(page=page, total=number_of_pages)
             else:
                 print(msg)
-            png_bytes = self.convert_pdf_page_to_png_bytes(pdf_bytes, page_number=page)
-            html_output = self.ocr_using_document_ai(base64.b64encode(png_bytes).decode('utf-8'))
-            pdf_texts.append(html_output)
-        html_src = "".join(pdf_texts)
+            return html_output
+
+        try:
+            yield from self._iter_ordered(process_page, pages, max_workers)
+        finally:
+            if doc_hash:
+                self.raster_manager.close(doc_hash)
+
+    def _iter_ordered(self, func, items, max_workers=1):
+        """
+        Yields func(item) for each item in order, running up to max_workers calls in parallel.
+        Only a bounded window of items is in flight, so results do not pile up ahead of the consumer.
+        """
+        if max_workers <= 1 or len(items) <= 1:
+            for item in items:
+                yield func(item)
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            window = max_workers * 2
+            futures = [executor.submit(func, item) for item in items[:window]]
+            next_item = window
+            for i in range(len(items)):
+                result = futures[i].result()
+                futures[i] = None
+                if next_item < len(items):
+                    futures.append(executor.submit(func, items[next_item]))
+                    next_item += 1
+                yield result
+
+    def iter_pdf_file_html(self, source, progress_callback=None, start_page=None, end_page=None, max_workers=1, max_retries=2, dpi=None, use_text_layer=False, output_format="html"):
+        """
+        Same as iter_pdf_html for a PDF file path or file-like object (e.g. CloudStorageManager.get_file_stream), without
+        holding the document in memory: the file is rendered from disk (a stream is spooled to a temp file first),
+        page images go straight to Document AI as bytes (no base64), and each page is dropped from the raster cache once
+        it is OCR'd. Peak memory is a few pages per worker, whatever the size of the document.
+
+        Args:
+            source (str or file-like): Path of a PDF file, or a binary file-like object.
+            progress_callback (callable, optional): Function called each time a page completes. Signature: (page, total).
+            start_page (int, optional): First page to process (1-based). If None, starts from first page.
+            end_page (int, optional): Last page to process (1-based, inclusive). If None, ends at last page.
+            max_workers (int): Number of pages rasterized and OCR'd in parallel (default 1).
+            max_retries (int): Retries per failed page (default 2).
+            dpi (int, optional): Rendering resolution of the pages. Defaults to self.raster_manager.dpi.
+            use_text_layer (bool): Use the native text of pages that have a usable text layer (default False).
+            output_format (str): "html" (default) or "layout" (see read_pdf_layout).
+
+        Yields:
+            str or list: HTML output (or layout blocks) of each page, in page order.
+
+        Example:
+            for chunk in manager.iter_chunks(ocr_manager.iter_pdf_file_html("/websocket_tmp/texts/book.pdf", max_workers=4)):
+                print(chunk["text"])
+        """
+        dpi = dpi or self.raster_manager.dpi
+        doc_hash = self.raster_manager.open_file(source)
+        try:
+            number_of_pages = self.raster_manager.get_page_count(doc_hash)
+            start = max(start_page or 1, 1)
+            end = min(end_page or number_of_pages, number_of_pages)
+            pages = list(range(start, end + 1))
+            text_layer = self.extract_text_layer_html(self.raster_manager.get_path(doc_hash), pages, output_format=output_format) if use_text_layer else {}
+            self.last_read_stats = {"pages": len(pages), "ocr_pages": len(pages) - len(text_layer), "text_layer_pages": len(text_layer)}
+
+            def process_page(page):
+                if page in text_layer:
+                    html_output = text_layer[page]
+                else:
+                    html_output = self.ocr_pdf_page(None, page, max_retries=max_retries, doc_hash=doc_hash, dpi=dpi, output_format=output_format)
+                    self.raster_manager.discard_page(doc_hash, page, dpi)
+                msg = f"Processed page {page}/{number_of_pages}..."
+                if progress_callback:
+                    progress_callback(page=page, total=number_of_pages)
+                else:
+                    print(msg)
+                return html_output
+
+            yield from self._iter_ordered(process_page, pages, max_workers)
+        finally:
+            self.raster_manager.close(doc_hash)
+
+    def iter_pdf_html_batched(self, pdf_bytes, progress_callback=None, start_page=None, end_page=None, pages_per_request=15, max_workers=4, max_retries=2, cost_per_page=0.03, enhance=False, use_text_layer=False):
+        """
+        OCRs a PDF with multi-page Document AI requests: the pages are split into ranges of pages_per_request pages,
+        the ranges are processed concurrently, and the HTML of each range (its document_layout blocks rendered with
+        DocAIManager.render_html_blocks) is yielded in page order.
+
+        Args:
+            pdf_bytes (bytes): PDF file data.
+            progress_callback (callable, optional): Function called each time a range completes, with its last page. Signature: (page, total).
+            start_page (int, optional): First page to process (1-based). If None, starts from first page.
+            end_page (int, optional): Last page to process (1-based, inclusive). If None, ends at last page.
+            pages_per_request (int): Maximum pages per request (default 15).
+            max_workers (int): Number of requests in flight (default 4).
+            max_retries (int): Retries per failed range (default 2).
+            cost_per_page (float, optional): Cost per page for Document AI OCR (default $0.03).
+            enhance (bool): Rasterize and enhance pages before sending (default False, ranges are sent as native PDF pages).
+            use_text_layer (bool): Use the native text of pages that have a usable text layer; only the other pages are
+                grouped into requests (default False).
+
+        Yields:
+            str: HTML output of each range or text-layer page ("" if a range failed after all retries).
+
+        Sets:
+            self.last_read_stats (dict): pages, ocr_pages and text_layer_pages of this read.
+        """
+        number_of_pages = self.get_pdf_page_count(pdf_bytes)
+        start = max(start_page or 1, 1)
+        end = min(end_page or number_of_pages, number_of_pages)
+        pages = list(range(start, end + 1))
+        text_layer = self.extract_text_layer_html(pdf_bytes, pages) if use_text_layer else {}
+        self.last_read_stats = {"pages": len(pages), "ocr_pages": len(pages) - len(text_layer), "text_layer_pages": len(text_layer)}
+        ranges = self.split_pdf_page_ranges(pdf_bytes, pages_per_request=pages_per_request, page_numbers=[page for page in pages if page not in text_layer])
+        ranges += [(page, page, None) for page in text_layer]
+        ranges.sort(key=lambda page_range: page_range[0])
+
+        def process_range(page_range):
+            first_page, last_page, range_bytes = page_range
+            if range_bytes is None:
+                msg = f"Extracted page {first_page}/{number_of_pages}..."
+                if progress_callback:
+                    progress_callback(page=first_page, total=number_of_pages)
+                else:
+                    print(msg)
+                return text_layer[first_page]
+            html_output = self._run_with_retries(
+                lambda: self.ocr_bytes_using_document_ai(range_bytes, cost_per_page=cost_per_page, enhance=enhance),
+                f"pages {first_page}-{last_page}",
+                max_retries=max_retries,
+            )
+            msg = f"Processed pages {first_page}-{last_page}/{number_of_pages}..."
+            if progress_callback:
+                progress_callback(page=last_page, total=number_of_pages)
+            else:
+                print(msg)
+            return html_output
+
+        if not ranges:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ranges)))) as executor:
+            for html_output in executor.map(process_range, ranges):
+                yield html_output
+
+    def read_pdf_bytes(self, pdf_bytes, progress_callback=None, start_page=None, end_page=None, max_workers=1, max_retries=2, dpi=200, mode="page", pages_per_request=15, use_text_layer=False):
+        """
+        Extracts and OCRs pages from a PDF file, returning HTML and plain text.
+
+        Args:
+            pdf_bytes (bytes): PDF file data.
+            progress_callback (callable, optional): Function called after each page is processed. Signature: (page, total).
+            start_page (int, optional): First page to process (1-based). If None, starts from first page.
+            end_page (int, optional): Last page to process (1-based, inclusive). If None, ends at last page.
+            max_workers (int): Number of pages OCR'd in parallel with one shared Document AI client (default 1).
+            max_retries (int): Retries per failed page (default 2).
+            dpi (int): Rendering resolution of the pages (default 200).
+            mode (str): "page" OCRs each page separately (see iter_pdf_html), "batch" sends multi-page requests
+                of pages_per_request pages (see iter_pdf_html_batched). Default is "page".
+            pages_per_request (int): Maximum pages per request in "batch" mode (default 15).
+            use_text_layer (bool): Take pages that have a usable native text layer (born-digital PDFs) from PyPDF2
+                and only OCR image-only or low-quality pages (default False). Counts are in self.last_read_stats.
+
+        Behavior:
+            - Determines the total number of pages in the PDF.
+            - Processes only the pages in the range [start_page, end_page], max_workers pages at a time.
+            - With use_text_layer, takes pages that have a usable native text layer from PyPDF2.
+            - For each other page:
+                - Converts the page to PNG bytes (rendered once, several pages per poppler call).
+                - Runs OCR using Document AI and collects HTML output, retrying on failure.
+                - Calls progress_callback (if provided) after each page.
+            - Concatenates all HTML outputs in page order; failed pages contribute "".
+            - Extracts plain text from the combined HTML using ChunkPipeline.
+
+        Returns:
+            tuple:
+                html_src (str): Concatenated HTML output for all processed pages.
+                simple_text (str): Extracted plain text from the HTML.
+        """
+        if mode == "batch":
+            html_parts = self.iter_pdf_html_batched(pdf_bytes, progress_callback=progress_callback, start_page=start_page, end_page=end_page, pages_per_request=pages_per_request, max_workers=max_workers, max_retries=max_retries, use_text_layer=use_text_layer)
+        else:
+            html_parts = self.iter_pdf_html(pdf_bytes, progress_callback=progress_callback, start_page=start_page, end_page=end_page, max_workers=max_workers, max_retries=max_retries, dpi=dpi, use_text_layer=use_text_layer)
+        html_src = "".join(html_parts)
+        chunk_pipeline = ChunkPipeline()
+        simple_text = chunk_pipeline.process(html_src, "get_text")
+        return html_src, simple_text
+
+    def read_pdf_file(self, source, progress_callback=None, start_page=None, end_page=None, max_workers=1, max_retries=2, dpi=None, use_text_layer=False):
+        """
+        Same as read_pdf_bytes ("page" mode) for a PDF file path or file-like object, processed page by page without
+        loading the document in memory or base64-encoding it (see iter_pdf_file_html).
+
+        Args:
+            source (str or file-like): Path of a PDF file, or a binary file-like object such as
+                CloudStorageManager.get_file_stream(bucket, file_key).
+            progress_callback (callable, optional): Function called after each page is processed. Signature: (page, total).
+            start_page (int, optional): First page to process (1-based). If None, starts from first page.
+            end_page (int, optional): Last page to process (1-based, inclusive). If None, ends at last page.
+            max_workers (int): Number of pages OCR'd in parallel (default 1).
+            max_retries (int): Retries per failed page (default 2).
+            dpi (int, optional): Rendering resolution of the pages. Defaults to self.raster_manager.dpi.
+            use_text_layer (bool): Take pages with a usable native text layer from PyPDF2 (default False).
+
+        Returns:
+            tuple:
+                html_src (str): Concatenated HTML output for all processed pages.
+                simple_text (str): Extracted plain text from the HTML.
+
+        Example:
+            html_src, simple_text = ocr_manager.read_pdf_file(storage_manager.get_file_stream("docs", "user/1/book.pdf"), max_workers=4)
+        """
+        html_src = "".join(self.iter_pdf_file_html(source, progress_callback=progress_callback, start_page=start_page, end_page=end_page, max_workers=max_workers, max_retries=max_retries, dpi=dpi, use_text_layer=use_text_layer))
         chunk_pipeline = ChunkPipeline()
         simple_text = chunk_pipeline.process(html_src, "get_text")
-        return html_src, simple_text
\ No newline at end of file
+        return html_src, simple_text
+
+    def read_pdf_layout(self, pdf_bytes, progress_callback=None, start_page=None, end_page=None, max_workers=1, max_retries=2, dpi=200, use_text_layer=False):
+        """
+        Same as read_pdf_bytes in "page" mode, but returns the typed layout of DocAIManager.build_layout instead of HTML,
+        so chunking (BaseAIManager.build_chunks), text extraction and RAG ingestion can use it without re-parsing HTML,
+        and every block keeps its page number.
+
+        Args:
+            pdf_bytes (bytes): PDF file data.
+            progress_callback (callable, optional): Function called after each page is processed. Signature: (page, total).
+            start_page (int, optional): First page to process (1-based). If None, starts from first page.
+            end_page (int, optional): Last page to process (1-based, inclusive). If None, ends at last page.
+            max_workers (int): Number of pages OCR'd in parallel (default 1).
+            max_retries (int): Retries per failed page (default 2).
+            dpi (int): Rendering resolution of the pages (default 200).
+            use_text_layer (bool): Take pages with a usable native text layer from PyPDF2 as paragraph blocks (default False).
+
+        Returns:
+            tuple:
+                layout (list): Layout block dicts of all processed pages, in page order.
+                simple_text (str): Plain text of the layout.
+
+        Example:
+            layout, simple_text = ocr_manager.read_pdf_layout(pdf_bytes, max_workers=4)
+            materials = open_ai_manager.build_materials_for_rag(layout)
+        """
+        layout = []
+        for page_layout in self.iter_pdf_html(pdf_bytes, progress_callback=progress_callback, start_page=start_page, end_page=end_page, max_workers=max_workers, max_retries=max_retries, dpi=dpi, use_text_layer=use_text_layer, output_format="layout"):
+            layout.extend(page_layout)
+        doc_ai_manager = DocAIManager()
+        simple_text = doc_ai_manager.layout_to_text(layout)
+        return layout, simple_text
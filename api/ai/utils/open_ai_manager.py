@@ -1,11 +1,47 @@
 import openai
+import httpx
+import asyncio
 import wave
 import contextlib
 import io
 import requests
+import tiktoken
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 
 from core.models import UserModel, ProfileModel
-from ai.utils.ai_manager import BaseAIManager
+from ai.utils.ai_manager import BaseAIManager, get_loop_client, aclose_shared_clients
+
+def _build_async_http_client():
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+        timeout=httpx.Timeout(600.0, connect=10.0)
+    )
+
+def get_async_http_client():
+    """
+    Return the httpx.AsyncClient shared by every async OpenAI call on the running event loop,
+    so all websocket sessions of a worker reuse one connection pool.
+    Must be called from a coroutine; see aclose_shared_clients.
+
+    Returns:
+        httpx.AsyncClient: The shared async HTTP client.
+    """
+    return get_loop_client("http", _build_async_http_client, aclose=lambda client: client.aclose())
+
+def get_async_open_ai_client(api_key):
+    """
+    Return an AsyncOpenAI client for the API key, backed by the shared async HTTP client.
+    Must be called from a coroutine; see aclose_shared_clients.
+
+    Args:
+        api_key (str): Your OpenAI API key.
+
+    Returns:
+        openai.AsyncOpenAI: The shared async client.
+    """
+    http_client = get_async_http_client()
+    return get_loop_client(("openai", api_key), lambda: openai.AsyncOpenAI(api_key=api_key, http_client=http_client))
 
 class OpenAIManager(BaseAIManager):
     def __init__(self, model, api_key, cur_users=[]):
@@ -56,7 +92,100 @@ class OpenAIManager(BaseAIManager):
             },
         }
         self.OPEN_AI_CLIENT = openai.OpenAI(api_key=api_key)
+        self.api_key = api_key
         self.model = model
+        self.last_rag_stats = {}
+
+    @property
+    def ASYNC_OPEN_AI_CLIENT(self):
+        return get_async_open_ai_client(self.api_key)
+
+    def _apply_completion_cost(self, usage):
+        pricing = self.OPENAI_PRICING.get(self.model, {})
+        input_price = pricing.get("input_per_1k_token", 0)
+        output_price = pricing.get("output_per_1k_token", 0)
+        cost = (usage.prompt_tokens / 1000) * input_price + (usage.completion_tokens / 1000) * output_price
+        self._apply_cost(cost=cost, service="OPEN_AI_COMPLETION")
+
+    def _estimate_completion_usage(self, messages, completion_text):
+        """
+        Estimate the usage of a completion with tiktoken, for streams that ended before OpenAI sent the usage block.
+        Only text content is counted (about 4 tokens of overhead per message, 3 to prime the reply).
+        """
+        try:
+            enc = tiktoken.encoding_for_model(self.model)
+        except KeyError:
+            enc = tiktoken.get_encoding("o200k_base")
+        prompt_tokens = 3
+        for message in messages or []:
+            content = message.get("content") or ""
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+            prompt_tokens += 4 + len(enc.encode(content))
+        return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(enc.encode(completion_text)))
+
+    def _apply_stream_cost(self, usage, messages, streamed_parts):
+        """
+        Apply the cost of a stream from its usage block, or from an estimate if the stream stopped early
+        (consumer stopped iterating, client disconnected or the stream failed).
+        """
+        if usage is None:
+            usage = self._estimate_completion_usage(messages, "".join(streamed_parts))
+        self._apply_completion_cost(usage)
+
+    def _get_wav_duration_seconds(self, audio_file):
+        try:
+            if hasattr(audio_file, "seek"):
+                audio_file.seek(0)
+            with contextlib.closing(wave.open(audio_file, 'r')) as f:
+                frames = f.getnframes()
+                rate = f.getframerate()
+                duration_seconds = frames / float(rate)
+        except Exception:
+            duration_seconds = 0
+        if hasattr(audio_file, "seek"):
+            audio_file.seek(0)
+        return duration_seconds
+
+    def _apply_stt_cost(self, duration_seconds):
+        duration_minutes = duration_seconds / 60
+        pricing = self.OPENAI_PRICING.get("whisper", {})
+        input_price = pricing.get("audio_stt_per_1_minute", 0)
+        cost = duration_minutes * input_price
+        self._apply_cost(cost=cost, service="OPEN_AI_STT")
+
+    def _format_stt_response(self, response, response_format):
+        if response_format == "text":
+            return response
+        elif response_format == "json":
+            return response.json["text"]
+        elif response_format == "srt":
+            return response.srt
+        elif response_format == "verbose_json":
+            return response.verbose_json
+        else:
+            return response
+
+    def _apply_tts_cost(self, text, model):
+        pricing = self.OPENAI_PRICING.get("gpt-4o", {})
+        if model == "tts-1-hd":
+            input_price = pricing.get("tts_premium_per_1k_char", 0)
+        else:
+            input_price = pricing.get("tts_standard_per_1k_char", 0)
+        char_count = len(text)
+        cost = (char_count / 1000) * input_price
+        self._apply_cost(cost=cost, service="OPEN_AI_TTS")
+
+    def _apply_embedding_cost(self, response, embedding_text, embedding_model):
+        usage = getattr(response, "usage", None)
+        if usage:
+            input_tokens = getattr(usage, "prompt_tokens", 0)
+        else:
+            input_tokens = max(1, len(embedding_text) // 4)
+        pricing = self.OPENAI_PRICING.get(embedding_model, {})
+        input_price = pricing.get("input_per_1k_token", 0)
+        cost = (input_tokens / 1000) * input_price
+        self._apply_cost(cost=cost, service="OPEN_AI_EMBEDDING")
     
     def add_message(self, role, text=None, img_url=None, max_history=5):
         """
@@ -124,26 +253,140 @@ class OpenAIManager(BaseAIManager):
         """
         if messages is None:
             messages = self.messages
+        use_messages = messages if messages else self.messages
+        cache_key, cached_response = self._get_cached_completion(self.model, use_messages, max_token)
+        if cached_response is not None:
+            self.clear_messages()
+            return cached_response
         response = self.OPEN_AI_CLIENT.chat.completions.create(
             model=self.model,
-            messages=messages if messages else self.messages,
+            messages=use_messages,
             max_tokens=max_token
         )
-        tokens_used = response.usage
-        prompt_tokens = tokens_used.prompt_tokens
-        completion_tokens = tokens_used.completion_tokens
-        pricing = self.OPENAI_PRICING.get(self.model, {})
-        input_price = pricing.get("input_per_1k_token", 0)
-        output_price = pricing.get("output_per_1k_token", 0)
-        
-        cost = (prompt_tokens / 1000) * input_price + (completion_tokens / 1000) * output_price
-        self._apply_cost(cost=cost, service="OPEN_AI_COMPLETION")
+        self._apply_completion_cost(response.usage)
 
         raw_response = response.choices[0].message.content.strip() if response.choices and response.choices[0].message else ""
         self.clear_messages()
-        return self._clean_code_block(raw_response)
+        response_text = self._clean_code_block(raw_response)
+        self._set_cached_completion(cache_key, response_text)
+        return response_text
+
+    async def agenerate_response(self, max_token=2000, messages=None):
+        """
+        Awaitable counterpart of generate_response, backed by the shared AsyncOpenAI client.
+
+        Args:
+            max_token (int): Maximum number of tokens in the response. Default is 2000.
+            messages (list): List of message dicts. If None, uses internal history.
+
+        Returns:
+            str: The assistant's response text.
+
+        Example:
+            reply = await manager.agenerate_response(max_token=500)
+        """
+        if messages is None:
+            messages = self.messages
+        use_messages = messages if messages else self.messages
+        cache_key, cached_response = await self._aget_cached_completion(self.model, use_messages, max_token)
+        if cached_response is not None:
+            self.clear_messages()
+            return cached_response
+        response = await self.ASYNC_OPEN_AI_CLIENT.chat.completions.create(
+            model=self.model,
+            messages=use_messages,
+            max_tokens=max_token
+        )
+        await self._run_cost_off_loop(self._apply_completion_cost, response.usage)
+
+        raw_response = response.choices[0].message.content.strip() if response.choices and response.choices[0].message else ""
+        self.clear_messages()
+        response_text = self._clean_code_block(raw_response)
+        await self._aset_cached_completion(cache_key, response_text)
+        return response_text
 
     
+    def stream_response(self, max_token=2000, messages=None):
+        """
+        Stream a response from the OpenAI chat model, yielding text deltas as they arrive.
+        The cost is applied once the stream closes, from the usage block sent in the final chunk, or estimated from the
+        prompt and the text streamed so far if the stream stops before it.
+        Deltas are raw model output; code fences are not stripped (use _clean_code_block on the joined text if needed).
+
+        Args:
+            max_token (int): Maximum number of tokens in the response. Default is 2000.
+            messages (list): List of message dicts. If None, uses internal history.
+
+        Yields:
+            str: Text deltas of the assistant's response.
+
+        Example:
+            for delta in manager.stream_response(messages=messages):
+                print(delta, end="")
+        """
+        if messages is None:
+            messages = self.messages
+        use_messages = messages if messages else self.messages
+        stream = self.OPEN_AI_CLIENT.chat.completions.create(
+            model=self.model,
+            messages=use_messages,
+            max_tokens=max_token,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        usage = None
+        streamed_parts = []
+        try:
+            for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    streamed_parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+            self._apply_stream_cost(usage, use_messages, streamed_parts)
+            self.clear_messages()
+
+    async def astream_response(self, max_token=2000, messages=None):
+        """
+        Awaitable counterpart of stream_response, backed by the shared AsyncOpenAI client.
+
+        Args:
+            max_token (int): Maximum number of tokens in the response. Default is 2000.
+            messages (list): List of message dicts. If None, uses internal history.
+
+        Yields:
+            str: Text deltas of the assistant's response.
+
+        Example:
+            async for delta in manager.astream_response(messages=messages):
+                await send(delta)
+        """
+        if messages is None:
+            messages = self.messages
+        use_messages = messages if messages else self.messages
+        stream = await self.ASYNC_OPEN_AI_CLIENT.chat.completions.create(
+            model=self.model,
+            messages=use_messages,
+            max_tokens=max_token,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        usage = None
+        streamed_parts = []
+        try:
+            async for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    streamed_parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+            await self._run_cost_off_loop(self._apply_stream_cost, usage, use_messages, streamed_parts)
+            self.clear_messages()
+
     def stt(self, audio_input, response_format="text", language=None, input_type="url"):
         """
         Transcribe speech to text using OpenAI Whisper.
@@ -171,58 +414,62 @@ class OpenAIManager(BaseAIManager):
             audio_file = io.BytesIO(audio_input)
             audio_file.name = f"{self._random_generator()}.wav"
             file_for_api = audio_file
-            try:
-                audio_file.seek(0)
-                with contextlib.closing(wave.open(audio_file, 'r')) as f:
-                    frames = f.getnframes()
-                    rate = f.getframerate()
-                    duration_seconds = frames / float(rate)
-            except Exception:
-                duration_seconds = 0
+            duration_seconds = self._get_wav_duration_seconds(audio_file)
         elif input_type == "url":
             response_url = requests.get(audio_input)
             audio_bytes = response_url.content
             audio_file = io.BytesIO(audio_bytes)
             audio_file.name = f"{self._random_generator()}.wav"
             file_for_api = audio_file
-            try:
-                audio_file.seek(0)
-                with contextlib.closing(wave.open(audio_file, 'r')) as f:
-                    frames = f.getnframes()
-                    rate = f.getframerate()
-                    duration_seconds = frames / float(rate)
-            except Exception:
-                duration_seconds = 0
+            duration_seconds = self._get_wav_duration_seconds(audio_file)
         else:
             file_for_api = audio_input
-            try:
-                with contextlib.closing(wave.open(audio_input, 'r')) as f:
-                    frames = f.getnframes()
-                    rate = f.getframerate()
-                    duration_seconds = frames / float(rate)
-            except Exception:
-                duration_seconds = 0
+            duration_seconds = self._get_wav_duration_seconds(audio_input)
         response = self.OPEN_AI_CLIENT.audio.transcriptions.create(
             model="whisper-1",
             file=file_for_api,
             response_format=response_format,
             language=language
         )
-        duration_minutes = duration_seconds / 60
-        pricing = self.OPENAI_PRICING.get("whisper", {})
-        input_price = pricing.get("audio_stt_per_1_minute", 0)
-        cost = duration_minutes * input_price
-        self._apply_cost(cost=cost, service="OPEN_AI_STT")
-        if response_format == "text":
-            return response
-        elif response_format == "json":
-            return response.json["text"]
-        elif response_format == "srt":
-            return response.srt
-        elif response_format == "verbose_json":
-            return response.verbose_json
+        self._apply_stt_cost(duration_seconds)
+        return self._format_stt_response(response, response_format)
+
+    async def astt(self, audio_input, response_format="text", language=None, input_type="url"):
+        """
+        Awaitable counterpart of stt. URL inputs are downloaded with the shared async HTTP pool.
+
+        Args:
+            audio_input: Audio data (bytes, file path, or URL).
+            response_format (str): Output format. Options: 'text', 'json', 'srt', 'verbose_json'. Default 'text'.
+            language (str): Language code (e.g., 'en'). Optional.
+            input_type (str): Type of input. Options: 'bytes', 'url', 'file'. Default 'url'.
+
+        Returns:
+            str or dict: Transcription result in the requested format.
+
+        Example:
+            text = await manager.astt(audio_bytes, input_type='bytes')
+        """
+        if input_type in ("bytes", "url"):
+            if input_type == "url":
+                response_url = await get_async_http_client().get(audio_input)
+                response_url.raise_for_status()
+                audio_input = response_url.content
+            audio_file = io.BytesIO(audio_input)
+            audio_file.name = f"{self._random_generator()}.wav"
+            file_for_api = audio_file
+            duration_seconds = self._get_wav_duration_seconds(audio_file)
         else:
-            return response
+            file_for_api = audio_input
+            duration_seconds = self._get_wav_duration_seconds(audio_input)
+        response = await self.ASYNC_OPEN_AI_CLIENT.audio.transcriptions.create(
+            model="whisper-1",
+            file=file_for_api,
+            response_format=response_format,
+            language=language
+        )
+        await self._run_cost_off_loop(self._apply_stt_cost, duration_seconds)
+        return self._format_stt_response(response, response_format)
 
     def tts(self, text, voice="nova", audio_format="mp3", model="tts-1"):
         """
@@ -248,14 +495,32 @@ class OpenAIManager(BaseAIManager):
             voice=voice,
             response_format=audio_format
         )
-        pricing = self.OPENAI_PRICING.get("gpt-4o", {})
-        if model == "tts-1-hd":
-            input_price = pricing.get("tts_premium_per_1k_char", 0)
-        else:
-            input_price = pricing.get("tts_standard_per_1k_char", 0)
-        char_count = len(text)
-        cost = (char_count / 1000) * input_price
-        self._apply_cost(cost=cost, service="OPEN_AI_TTS")
+        self._apply_tts_cost(text, model)
+        return response.content
+
+    async def atts(self, text, voice="nova", audio_format="mp3", model="tts-1"):
+        """
+        Awaitable counterpart of tts.
+
+        Args:
+            text (str): The text to synthesize.
+            voice (str): Voice name. Default is 'nova'.
+            audio_format (str): Output format. Options: 'mp3', 'wav', 'ogg'. Default 'mp3'.
+            model (str): TTS model. Options: 'tts-1', 'tts-1-hd'. Default 'tts-1'.
+
+        Returns:
+            bytes: Audio content in the requested format.
+
+        Example:
+            audio = await manager.atts("Hello world!")
+        """
+        response = await self.ASYNC_OPEN_AI_CLIENT.audio.speech.create(
+            model=model,
+            input=text,
+            voice=voice,
+            response_format=audio_format
+        )
+        await self._run_cost_off_loop(self._apply_tts_cost, text, model)
         return response.content
 
     def generate_image(self, prompt, size="1024x1024"):
@@ -286,59 +551,208 @@ class OpenAIManager(BaseAIManager):
         self._apply_cost(cost=image_price)
         return image_bytes
     
-    def build_materials_for_rag(self, text, max_chunk_size=1000, embedding_model="text-embedding-3-large", progress_callback=None):
+    def generate_embedding(self, text, embedding_model="text-embedding-3-large", embedding_dimensions=None):
+        """
+        Generate an embedding vector for a text.
+
+        Args:
+            text (str): The text to embed.
+            embedding_model (str): OpenAI embedding model name. Default "text-embedding-3-large".
+            embedding_dimensions (int, optional): Shorten the vector to this many dimensions (text-embedding-3 models only).
+
+        Returns:
+            list: The embedding vector.
+
+        Example:
+            vector = manager.generate_embedding("What is relativity?")
+        """
+        response = self.OPEN_AI_CLIENT.embeddings.create(
+            model=embedding_model,
+            input=text,
+            dimensions=embedding_dimensions or openai.NOT_GIVEN
+        )
+        self._apply_embedding_cost(response, text, embedding_model)
+        return response.data[0].embedding if response and response.data and response.data[0].embedding else []
+
+    async def agenerate_embedding(self, text, embedding_model="text-embedding-3-large", embedding_dimensions=None):
+        """
+        Awaitable counterpart of generate_embedding.
+
+        Args:
+            text (str): The text to embed.
+            embedding_model (str): OpenAI embedding model name. Default "text-embedding-3-large".
+            embedding_dimensions (int, optional): Shorten the vector to this many dimensions (text-embedding-3 models only).
+
+        Returns:
+            list: The embedding vector.
+
+        Example:
+            vector = await manager.agenerate_embedding("What is relativity?")
+        """
+        response = await self.ASYNC_OPEN_AI_CLIENT.embeddings.create(
+            model=embedding_model,
+            input=text,
+            dimensions=embedding_dimensions or openai.NOT_GIVEN
+        )
+        await self._run_cost_off_loop(self._apply_embedding_cost, response, text, embedding_model)
+        return response.data[0].embedding if response and response.data and response.data[0].embedding else []
+
+    def _build_embedding_batches(self, texts, batch_size, max_batch_tokens):
+        """
+        Group text indexes into batches that respect the number of inputs and the number of tokens allowed per embeddings request.
+        Empty texts are skipped because the API rejects empty inputs.
+
+        Returns:
+            list: List of lists of indexes into texts.
+        """
+        enc = tiktoken.get_encoding("cl100k_base")
+        batches = []
+        cur_batch = []
+        cur_tokens = 0
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            tokens = len(enc.encode(text))
+            if cur_batch and (len(cur_batch) >= batch_size or cur_tokens + tokens > max_batch_tokens):
+                batches.append(cur_batch)
+                cur_batch = []
+                cur_tokens = 0
+            cur_batch.append(i)
+            cur_tokens += tokens
+        if cur_batch:
+            batches.append(cur_batch)
+        return batches
+
+    def generate_embeddings(self, texts, embedding_model="text-embedding-3-large", embedding_dimensions=None, batch_size=100, max_batch_tokens=250000, max_concurrency=1, progress_callback=None, chunks=None):
+        """
+        Generate embedding vectors for many texts, sending them in batches instead of one request per text.
+        One cost record is applied per batch.
+
+        Args:
+            texts (list): The texts to embed.
+            embedding_model (str): OpenAI embedding model name. Default "text-embedding-3-large".
+            embedding_dimensions (int, optional): Shorten the vectors to this many dimensions (text-embedding-3 models only).
+            batch_size (int): Maximum number of inputs per request (API limit is 2048). Default 100.
+            max_batch_tokens (int): Maximum number of tokens per request (API limit is 300000). Default 250000.
+            max_concurrency (int): Number of batches sent in parallel. Default 1 (sequential).
+            progress_callback (callable, optional): Called for each text when its batch starts, with (chunk=, index=, total=),
+                and with an error message first if its batch fails.
+            chunks (list, optional): Objects passed to progress_callback as chunk. Defaults to texts.
+
+        Returns:
+            list: One embedding vector per text, in the same order. Empty texts and texts of failed batches get [].
+
+        Example:
+            vectors = manager.generate_embeddings(["first text", "second text"], max_concurrency=4)
+        """
+        batch_size = max(1, min(batch_size, 2048))
+        chunks = chunks if chunks is not None else texts
+        total = len(texts)
+        vectors = [[] for _ in texts]
+        batches = self._build_embedding_batches(texts, batch_size, max_batch_tokens)
+
+        def embed_batch(batch):
+            for i in batch:
+                if progress_callback:
+                    progress_callback(chunk=chunks[i], index=i+1, total=total)
+                else:
+                    print(f"Processing chunk {i+1}/{total} for embeddings...")
+            batch_texts = [texts[i] for i in batch]
+            try:
+                response = self.OPEN_AI_CLIENT.embeddings.create(
+                    model=embedding_model,
+                    input=batch_texts,
+                    dimensions=embedding_dimensions or openai.NOT_GIVEN
+                )
+                for item in response.data:
+                    vectors[batch[item.index]] = item.embedding or []
+                self._apply_embedding_cost(response, "".join(batch_texts), embedding_model)
+            except Exception as e:
+                err_msg = f"Error generating embedding: {e}"
+                for i in batch:
+                    if progress_callback:
+                        progress_callback(err_msg, chunk=chunks[i], index=i+1, total=total)
+                    else:
+                        print(err_msg)
+
+        if max_concurrency <= 1 or len(batches) <= 1:
+            for batch in batches:
+                embed_batch(batch)
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches))) as executor:
+                list(executor.map(embed_batch, batches))
+        return vectors
+
+    def build_materials_for_rag(self, text, max_chunk_size=1000, embedding_model="text-embedding-3-large", progress_callback=None, batch_size=100, max_batch_tokens=250000, max_concurrency=1, embedding_dimensions=None, previous_materials=None, chunk_mode=None):
         """
         Build materials for RAG (Retrieval-Augmented Generation):
         For each chunk, generate:
         {
             "html": "...",        # HTML output for the chunk
             "text": "...",        # Plain text output for the chunk
+            "content_hash": "...", # Hash of the normalized text (see build_content_hash)
             "vector": [...]        # Vector format (embedding-ready text for OpenAI query)
+            "pages": [first, last] # Only when text is a typed layout (see DocAIManager.build_layout)
         }
+        Chunks are embedded in batches (see generate_embeddings), so a large book needs a few requests instead of one per chunk.
+        When previous_materials are given, chunks whose content hash matches a previous material reuse its vector and only
+        new or changed chunks are embedded. Use chunk_mode="block_aligned" for both runs so an edit does not move every later chunk boundary.
         Args:
-            text (str): The input text (can be HTML)
+            text (str or list): The input text (can be HTML), or a typed layout from OCRManager.read_pdf_layout
             max_chunk_size (int): Max size of each chunk. Default 1000.
             embedding_model (str): OpenAI embedding model name. Default "text-embedding-3-large".
+            batch_size (int): Maximum number of chunks per embeddings request. Default 100.
+            max_batch_tokens (int): Maximum number of tokens per embeddings request. Default 250000.
+            max_concurrency (int): Number of batches sent in parallel. Default 1 (sequential).
+            embedding_dimensions (int, optional): Shorten the vectors to this many dimensions, e.g. 1536 to fit RagChunk.embedding.
+            previous_materials (list, optional): Materials of an earlier version of the text, built with the same model and dimensions.
+                Materials without content_hash are hashed from their text.
+            chunk_mode (str): Passed to build_chunks. Default self.chunk_mode.
         Returns:
             list: List of dicts for all chunks
+        Sets:
+            self.last_rag_stats (dict): chunks, reused and embedded counts of this run.
         """
-        chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
+        chunks = self.build_chunks(text, max_chunk_size=max_chunk_size, chunk_mode=chunk_mode)
+        content_hashes = [self.build_content_hash(chunk["text"]) for chunk in chunks]
+        previous_vectors = {}
+        for material in previous_materials or []:
+            vector = material.get("vector")
+            if vector is not None and len(vector):
+                content_hash = material.get("content_hash") or self.build_content_hash(material.get("text", ""))
+                previous_vectors[content_hash] = list(vector)
+        # Reused chunks are passed as empty texts, which generate_embeddings skips while keeping chunk numbers in progress reports.
+        texts_to_embed = ["" if content_hash in previous_vectors else chunk["text"] for chunk, content_hash in zip(chunks, content_hashes)]
+        vectors = self.generate_embeddings(
+            texts_to_embed,
+            embedding_model=embedding_model,
+            embedding_dimensions=embedding_dimensions,
+            batch_size=batch_size,
+            max_batch_tokens=max_batch_tokens,
+            max_concurrency=max_concurrency,
+            progress_callback=progress_callback,
+            chunks=chunks,
+        )
         materials = []
+        reused = 0
         for i, chunk in enumerate(chunks):
-            msg = f"Processing chunk {i+1}/{len(chunks)} for embeddings..."
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i+1, total=len(chunks))
-            else:
-                print(msg)
-            html_output = chunk["html"]
-            text_output = chunk["text"]
-            embedding_text = text_output
-            try:
-                response = self.OPEN_AI_CLIENT.embeddings.create(
-                    model=embedding_model,
-                    input=embedding_text
-                )
-                vector_output = response.data[0].embedding if response and response.data and response.data[0].embedding else []
-                usage = getattr(response, "usage", None)
-                if usage:
-                    input_tokens = getattr(usage, "prompt_tokens", 0)
-                else:
-                    input_tokens = max(1, len(embedding_text) // 4)
-                pricing = self.OPENAI_PRICING.get(embedding_model, {})
-                input_price = pricing.get("input_per_1k_token", 0)
-                cost = (input_tokens / 1000) * input_price
-                self._apply_cost(cost=cost, service="OPEN_AI_EMBEDDING")
-            except Exception as e:
-                err_msg = f"Error generating embedding: {e}"
-                if progress_callback:
-                    progress_callback(err_msg, chunk=chunk, index=i+1, total=len(chunks))
-                else:
-                    print(err_msg)
-                vector_output = []
-            materials.append({
+            vector = vectors[i]
+            if content_hashes[i] in previous_vectors:
+                vector = previous_vectors[content_hashes[i]]
+                reused += 1
+            material = {
                 "chunk_number": i + 1,
-                "html": html_output,
-                "text": text_output,
-                "vector": vector_output
-            })
-        return materials
\ No newline at end of file
+                "html": chunk["html"],
+                "text": chunk["text"],
+                "content_hash": content_hashes[i],
+                "vector": vector
+            }
+            if "pages" in chunk:
+                material["pages"] = chunk["pages"]
+            materials.append(material)
+        self.last_rag_stats = {
+            "chunks": len(chunks),
+            "reused": reused,
+            "embedded": sum(1 for text_to_embed in texts_to_embed if text_to_embed.strip()),
+        }
+        return materials
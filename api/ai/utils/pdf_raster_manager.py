@@ -0,0 +1,294 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+class PdfRasterManager:
+    def __init__(self, dpi=200, max_workers=4, pages_per_render=4, max_cached_pages=64):
+        """
+        Rasterizes PDF pages lazily and caches the rendered PNG bytes by (document hash, page, dpi).
+        Each document is written to a temp file once, and pages are rendered pages_per_render at a time per poppler call,
+        so the PDF is not re-sent and re-parsed for every single page.
+        Documents are reference counted: every open must be matched by a close, and a document is removed when its last
+        reader closes it, so concurrent readers of the same PDF share it safely.
+
+        Args:
+            dpi (int): Default rendering resolution. Default is 200 (same as pdf2image).
+            max_workers (int): Number of poppler renders running in parallel. Default is 4.
+            pages_per_render (int): Number of consecutive pages rendered by one poppler call. Default is 4.
+            max_cached_pages (int): Number of rendered pages kept in memory before the least recently used are evicted. Default is 64.
+
+        Example:
+            raster_manager = PdfRasterManager(dpi=300)
+            doc_hash = raster_manager.open(pdf_bytes)
+            png_bytes = raster_manager.get_page_png(doc_hash, page_number=3)
+            raster_manager.close(doc_hash)
+        """
+        self.dpi = dpi
+        self.pages_per_render = max(1, pages_per_render)
+        self.max_cached_pages = max_cached_pages
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._documents = {}  # doc_hash -> {"path": ..., "page_count": ..., "owned": ..., "refs": number of open readers}
+        self._pages = OrderedDict()  # (doc_hash, page, dpi) -> png bytes
+        self._pending = {}  # (doc_hash, first_page, dpi) -> future of a running render
+        self.stats = {"hits": 0, "misses": 0, "renders": 0, "evictions": 0}
+
+    def build_doc_hash(self, pdf_bytes):
+        """
+        Returns the SHA-256 hex digest identifying a PDF.
+        """
+        return hashlib.sha256(pdf_bytes).hexdigest()
+
+    def open(self, pdf_bytes):
+        """
+        Registers a PDF: writes it to a temp file (once per content) and reads its page count. Call close when done.
+
+        Args:
+            pdf_bytes (bytes): PDF file data.
+
+        Returns:
+            str: Document hash to pass to the other methods.
+        """
+        doc_hash = self.build_doc_hash(pdf_bytes)
+        if self._touch(doc_hash):
+            return doc_hash
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as file:
+            file.write(pdf_bytes)
+        return self._register(doc_hash, path, owned=True)
+
+    def open_file(self, source, read_size=1024 * 1024):
+        """
+        Registers a PDF from a file path or a file-like object without loading it in memory: a path is hashed in
+        read_size blocks and rendered in place, a file-like object (e.g. an S3 streaming body) is spooled to a temp file
+        while it is hashed. Call close when done.
+
+        Args:
+            source (str or file-like): Path of a PDF file, or a binary file-like object positioned at the start of the PDF.
+            read_size (int): Bytes read at a time (default 1 MB).
+
+        Returns:
+            str: Document hash to pass to the other methods.
+        """
+        digest = hashlib.sha256()
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as file:
+                for block in iter(lambda: file.read(read_size), b""):
+                    digest.update(block)
+            doc_hash = digest.hexdigest()
+            if self._touch(doc_hash):
+                return doc_hash
+            return self._register(doc_hash, os.fspath(source), owned=False)
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for block in iter(lambda: source.read(read_size), b""):
+                    digest.update(block)
+                    file.write(block)
+        except Exception:
+            self._remove_file(path)
+            raise
+        doc_hash = digest.hexdigest()
+        if self._touch(doc_hash):
+            self._remove_file(path)
+            return doc_hash
+        return self._register(doc_hash, path, owned=True)
+
+    def _touch(self, doc_hash):
+        with self._lock:
+            doc = self._documents.get(doc_hash)
+            if doc is not None:
+                doc["refs"] += 1
+                return True
+            return False
+
+    def _register(self, doc_hash, path, owned):
+        """
+        Adds an opened document with one reader, or adds a reader if another thread registered it meanwhile.
+        Only temp files created by this manager (owned) are removed on close.
+        """
+        try:
+            page_count = pdfinfo_from_path(path)["Pages"]
+        except Exception:
+            if owned:
+                self._remove_file(path)
+            raise
+        with self._lock:
+            doc = self._documents.get(doc_hash)
+            if doc is None:
+                self._documents[doc_hash] = {"path": path, "page_count": page_count, "owned": owned, "refs": 1}
+                return doc_hash
+            doc["refs"] += 1
+        if owned:
+            self._remove_file(path)
+        return doc_hash
+
+    def _get_document(self, doc_hash):
+        """
+        Returns an opened document. Must be called with self._lock held.
+        """
+        doc = self._documents.get(doc_hash)
+        if doc is None:
+            raise KeyError(f"PDF document {doc_hash} is not open")
+        return doc
+
+    def get_path(self, doc_hash):
+        """
+        Returns the path of the PDF file of an opened document.
+        """
+        with self._lock:
+            return self._get_document(doc_hash)["path"]
+
+    def get_page_count(self, doc_hash):
+        """
+        Returns the number of pages of an opened document.
+        """
+        with self._lock:
+            return self._get_document(doc_hash)["page_count"]
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _render_block(self, doc_hash, path, first_page, last_page, dpi):
+        try:
+            with tempfile.TemporaryDirectory() as output_folder:
+                paths = convert_from_path(
+                    path,
+                    dpi=dpi,
+                    first_page=first_page,
+                    last_page=last_page,
+                    fmt="png",
+                    output_folder=output_folder,
+                    paths_only=True,
+                )
+                rendered = {}
+                for page, png_path in zip(range(first_page, last_page + 1), paths):
+                    with open(png_path, "rb") as file:
+                        rendered[page] = file.read()
+            with self._lock:
+                self.stats["renders"] += 1
+                if doc_hash not in self._documents:
+                    return rendered  # closed while rendering, do not cache its pages
+                for page, png_bytes in rendered.items():
+                    self._pages[(doc_hash, page, dpi)] = png_bytes
+                    self._pages.move_to_end((doc_hash, page, dpi))
+                while len(self._pages) > self.max_cached_pages:
+                    self._pages.popitem(last=False)
+                    self.stats["evictions"] += 1
+            return rendered
+        finally:
+            with self._lock:
+                self._pending.pop((doc_hash, first_page, dpi), None)
+
+    def _request_block(self, doc_hash, page_number, dpi):
+        """
+        Returns a future of the render containing page_number, starting it if it is not already running.
+        """
+        with self._lock:
+            doc = self._get_document(doc_hash)
+            first_page = ((page_number - 1) // self.pages_per_render) * self.pages_per_render + 1
+            last_page = min(first_page + self.pages_per_render - 1, doc["page_count"])
+            key = (doc_hash, first_page, dpi)
+            future = self._pending.get(key)
+            if future is None:
+                future = self.executor.submit(self._render_block, doc_hash, doc["path"], first_page, last_page, dpi)
+                self._pending[key] = future
+            return future
+
+    def _get_cached(self, doc_hash, page_number, dpi):
+        with self._lock:
+            png_bytes = self._pages.get((doc_hash, page_number, dpi))
+            if png_bytes is not None:
+                self._pages.move_to_end((doc_hash, page_number, dpi))
+            return png_bytes
+
+    def get_page_png(self, doc_hash, page_number, dpi=None):
+        """
+        Returns the PNG bytes of one page, rendering it (and its neighbours of the same render block) on a cache miss.
+
+        Args:
+            doc_hash (str): Hash returned by open.
+            page_number (int): Page number (1-based).
+            dpi (int, optional): Rendering resolution. Defaults to self.dpi.
+
+        Returns:
+            bytes: PNG image data.
+
+        Raises:
+            KeyError: The document is not open.
+        """
+        dpi = dpi or self.dpi
+        png_bytes = self._get_cached(doc_hash, page_number, dpi)
+        if png_bytes is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            return png_bytes
+        with self._lock:
+            self.stats["misses"] += 1
+        rendered = self._request_block(doc_hash, page_number, dpi).result()
+        if page_number not in rendered:
+            raise ValueError(f"Page {page_number} could not be rendered")
+        return rendered[page_number]
+
+    def iter_pages(self, doc_hash, page_numbers=None, dpi=None, prefetch=2):
+        """
+        Yields (page_number, png_bytes) in order, rendering the next blocks in the background.
+
+        Args:
+            doc_hash (str): Hash returned by open.
+            page_numbers (iterable, optional): Pages to render (1-based). Defaults to every page.
+            dpi (int, optional): Rendering resolution. Defaults to self.dpi.
+            prefetch (int): Number of render blocks requested ahead of the current page. Default is 2.
+        """
+        dpi = dpi or self.dpi
+        if page_numbers is None:
+            page_numbers = range(1, self.get_page_count(doc_hash) + 1)
+        page_numbers = list(page_numbers)
+        for i, page_number in enumerate(page_numbers):
+            for ahead in page_numbers[i + 1:i + 1 + prefetch * self.pages_per_render:self.pages_per_render]:
+                if self._get_cached(doc_hash, ahead, dpi) is None:
+                    self._request_block(doc_hash, ahead, dpi)
+            yield page_number, self.get_page_png(doc_hash, page_number, dpi)
+
+    def discard_page(self, doc_hash, page_number, dpi=None):
+        """
+        Drops one rendered page from the cache, e.g. once it has been OCR'd and will not be requested again.
+        """
+        with self._lock:
+            self._pages.pop((doc_hash, page_number, dpi or self.dpi), None)
+
+    def close(self, doc_hash):
+        """
+        Releases one reader of a document. The last reader removes its temp file (if created by this manager) and cached pages.
+        """
+        with self._lock:
+            doc = self._documents.get(doc_hash)
+            if doc is None:
+                return
+            doc["refs"] -= 1
+            if doc["refs"] > 0:
+                return
+            del self._documents[doc_hash]
+            for key in [key for key in self._pages if key[0] == doc_hash]:
+                del self._pages[key]
+        if doc["owned"]:
+            self._remove_file(doc["path"])
+
+    def close_all(self):
+        """
+        Removes every temp file and cached page of this manager, whatever readers are left.
+        """
+        with self._lock:
+            docs = list(self._documents.values())
+            self._documents.clear()
+            self._pages.clear()
+        for doc in docs:
+            if doc["owned"]:
+                self._remove_file(doc["path"])
@@ -0,0 +1,215 @@
+from django.conf import settings
+from django.db import connection, transaction
+from pgvector.django import CosineDistance
+
+from ai.models import RagDocumentModel, RagChunkModel
+from ai.models.rag import EMBEDDING_DIMENSIONS
+from ai.utils.open_ai_manager import OpenAIManager
+
+class RagStoreManager:
+    def __init__(self, open_ai_manager=None, embedding_model="text-embedding-3-large", cur_users=[]):
+        """
+        Stores RAG materials (see OpenAIManager.build_materials_for_rag) in Postgres and serves top-k similarity search
+        from the HNSW index of RagChunk.embedding.
+
+        Args:
+            open_ai_manager (OpenAIManager, optional): Manager used to embed texts and queries. A gpt-4o manager is created if None.
+            embedding_model (str): OpenAI embedding model name. Default "text-embedding-3-large".
+            cur_users (list): Users charged for the embedding calls when open_ai_manager is None.
+
+        Example:
+            store = RagStoreManager()
+            document = store.ingest_text(html_src, title="Physics book", user=request.user)
+            results = store.search("What is relativity?", top_k=5, document_ids=[document.id])
+        """
+        self.open_ai_manager = open_ai_manager or OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY, cur_users=cur_users)
+        self.embedding_model = embedding_model
+        self.embedding_dimensions = EMBEDDING_DIMENSIONS
+        self.chunk_mode = "block_aligned"
+
+    def _build_chunk_metadata(self, material, chunk_metadata=None):
+        metadata = dict(chunk_metadata or {})
+        if material.get("pages"):
+            metadata["pages"] = material["pages"]
+        return metadata
+
+    def ingest_materials(self, materials, title="", user=None, metadata=None, chunk_metadata=None, document=None, batch_size=500):
+        """
+        Write materials to the database with bulk_create.
+
+        Args:
+            materials (list): Dicts with chunk_number, html, text, content_hash and vector, as returned by build_materials_for_rag.
+                Vectors must have EMBEDDING_DIMENSIONS dimensions; empty vectors are stored as NULL.
+                The pages of materials built from a layout are stored in the chunk metadata.
+            title (str): Title of the new document.
+            user (User, optional): Owner of the new document.
+            metadata (dict, optional): Metadata of the new document.
+            chunk_metadata (dict, optional): Metadata stored on every chunk, usable as a search filter.
+            document (RagDocument, optional): Append the chunks to this document instead of creating a new one.
+            batch_size (int): Number of rows per INSERT. Default 500.
+
+        Returns:
+            RagDocument: The document the chunks belong to.
+        """
+        with transaction.atomic():
+            if document is None:
+                document = RagDocumentModel.objects.create(
+                    user=user,
+                    title=title,
+                    embedding_model=self.embedding_model,
+                    metadata=metadata or {},
+                )
+            chunks = [
+                RagChunkModel(
+                    document=document,
+                    chunk_number=material["chunk_number"],
+                    html=material.get("html", ""),
+                    text=material.get("text", ""),
+                    content_hash=material.get("content_hash") or self.open_ai_manager.build_content_hash(material.get("text", "")),
+                    embedding=self._embedding_or_none(material.get("vector")),
+                    metadata=self._build_chunk_metadata(material, chunk_metadata),
+                )
+                for material in materials
+            ]
+            RagChunkModel.objects.bulk_create(chunks, batch_size=batch_size)
+        return document
+
+    def ingest_text(self, text, title="", user=None, metadata=None, chunk_metadata=None, max_chunk_size=1000, max_concurrency=1, progress_callback=None):
+        """
+        Chunk and embed a text with build_materials_for_rag, then store it with ingest_materials.
+
+        Args:
+            text (str or list): The input text (can be HTML), or a typed layout from OCRManager.read_pdf_layout.
+            title (str): Title of the new document.
+            user (User, optional): Owner of the new document.
+            metadata (dict, optional): Metadata of the new document.
+            chunk_metadata (dict, optional): Metadata stored on every chunk.
+            max_chunk_size (int): Max size of each chunk. Default 1000.
+            max_concurrency (int): Number of embedding batches sent in parallel. Default 1.
+            progress_callback (callable, optional): Passed to build_materials_for_rag.
+
+        Returns:
+            RagDocument: The created document.
+        """
+        materials = self.open_ai_manager.build_materials_for_rag(
+            text,
+            max_chunk_size=max_chunk_size,
+            embedding_model=self.embedding_model,
+            progress_callback=progress_callback,
+            max_concurrency=max_concurrency,
+            embedding_dimensions=self.embedding_dimensions,
+            chunk_mode=self.chunk_mode,
+        )
+        return self.ingest_materials(materials, title=title, user=user, metadata=metadata, chunk_metadata=chunk_metadata)
+
+    def get_materials(self, document):
+        """
+        Load the stored chunks of a document back as materials.
+
+        Args:
+            document (RagDocument): The document.
+
+        Returns:
+            list: Dicts with chunk_number, html, text, content_hash and vector (an empty list if the chunk has no vector).
+        """
+        materials = []
+        for chunk in document.chunks.order_by("chunk_number"):
+            materials.append({
+                "chunk_number": chunk.chunk_number,
+                "html": chunk.html,
+                "text": chunk.text,
+                "content_hash": chunk.content_hash,
+                "vector": chunk.embedding.tolist() if chunk.embedding is not None else [],
+            })
+        return materials
+
+    def _embedding_or_none(self, vector):
+        """
+        Returns vector (list or NumPy array), or None if it is missing or empty so the chunk is stored without embedding.
+        """
+        return vector if vector is not None and len(vector) > 0 else None
+
+    def reingest_text(self, document, text, chunk_metadata=None, max_chunk_size=1000, max_concurrency=1, progress_callback=None):
+        """
+        Replace the chunks of a document with a new version of its text, embedding only new or changed chunks.
+        Unchanged chunks (same content hash) keep their stored vectors.
+
+        Args:
+            document (RagDocument): The document to update.
+            text (str): The new text (can be HTML).
+            chunk_metadata (dict, optional): Metadata stored on every chunk.
+            max_chunk_size (int): Max size of each chunk. Default 1000.
+            max_concurrency (int): Number of embedding batches sent in parallel. Default 1.
+            progress_callback (callable, optional): Passed to build_materials_for_rag.
+
+        Returns:
+            dict: chunks, reused and embedded counts (see OpenAIManager.last_rag_stats).
+
+        Example:
+            stats = store.reingest_text(document, edited_html)
+        """
+        materials = self.open_ai_manager.build_materials_for_rag(
+            text,
+            max_chunk_size=max_chunk_size,
+            embedding_model=self.embedding_model,
+            progress_callback=progress_callback,
+            max_concurrency=max_concurrency,
+            embedding_dimensions=self.embedding_dimensions,
+            previous_materials=self.get_materials(document),
+            chunk_mode=self.chunk_mode,
+        )
+        with transaction.atomic():
+            document.chunks.all().delete()
+            self.ingest_materials(materials, chunk_metadata=chunk_metadata, document=document)
+        return self.open_ai_manager.last_rag_stats
+
+    def search(self, query, top_k=5, document_ids=None, filters=None, document_filters=None, ef_search=None):
+        """
+        Get the chunks closest to a query by cosine distance.
+
+        Args:
+            query (str or list): Query text, embedded with the store's model, or an already computed vector.
+            top_k (int): Number of chunks to return. Default 5.
+            document_ids (list, optional): Only search chunks of these documents.
+            filters (dict, optional): Only search chunks whose metadata contains these key/values.
+            document_filters (dict, optional): Only search chunks whose document metadata contains these key/values.
+            ef_search (int, optional): HNSW candidate list size for this query (default of pgvector is 40).
+                Raise it when filters are selective so enough rows survive the filter.
+
+        Returns:
+            list: Dicts with document_id, chunk_number, html, text, metadata, distance and score (1 - distance), closest first.
+
+        Example:
+            results = store.search("What is relativity?", top_k=3, filters={"lang": "en"})
+        """
+        if isinstance(query, str):
+            vector = self.open_ai_manager.generate_embedding(query, embedding_model=self.embedding_model, embedding_dimensions=self.embedding_dimensions)
+        else:
+            vector = query  # list or NumPy array, e.g. RagChunkModel.embedding
+        if vector is None or len(vector) == 0:
+            return []
+        qs = RagChunkModel.objects.filter(embedding__isnull=False)
+        if document_ids:
+            qs = qs.filter(document_id__in=document_ids)
+        if filters:
+            qs = qs.filter(metadata__contains=filters)
+        if document_filters:
+            qs = qs.filter(document__metadata__contains=document_filters)
+        qs = qs.annotate(distance=CosineDistance("embedding", vector)).order_by("distance")[:top_k]
+        with transaction.atomic():
+            if ef_search:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL hnsw.ef_search = %s", [int(ef_search)])
+            rows = list(qs.values("document_id", "chunk_number", "html", "text", "metadata", "distance"))
+        for row in rows:
+            row["score"] = 1 - row["distance"]
+        return rows
+
+    def delete_document(self, document_id):
+        """
+        Delete a document and all its chunks.
+
+        Args:
+            document_id (int): ID of the document.
+        """
+        RagDocumentModel.objects.filter(id=document_id).delete()
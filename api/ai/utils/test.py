@@ -1,14 +1,26 @@
 import base64
+import html
 from pydoc import text
 from django.conf import settings
 import json
 import os
+import random
+import time
+import tracemalloc
+from types import SimpleNamespace
+from io import BytesIO
+from PIL import Image
 from google.cloud import texttospeech, speech
 
+from ai.utils.ai_manager import BaseAIManager
 from ai.utils.open_ai_manager import OpenAIManager
 from ai.utils.google_ai_manager import GoogleAIManager
 from ai.utils.ocr_manager import OCRManager
+from ai.utils.ocr_job_manager import OCRJobManager
+from ai.utils.doc_ai_managr import DocAIManager
+from ai.utils.rag_store_manager import RagStoreManager
 from ai.utils.audio_manager import AudioManager
+from ai.utils.audio_decoder_pool import AudioDecoderPool
 from ai.utils.aws_manager import AwsManager
 from ai.utils.azure_manager import AzureManager
 
@@ -49,6 +61,41 @@ def test_chunking():
             file.write(simple_text)
     print(f"Successfully Done")
 
+def build_sample_ocr_html(size_mb=4):
+    words = ["relativity", "energy", "mass", "light", "observer", "frame", "&amp;", "Einstein&rsquo;s", "velocity", "time"]
+    def sentence():
+        return " ".join(random.choice(words) for _ in range(random.randint(6, 30))) + random.choice([".", "?", "!", ".”"])
+    blocks = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        r = random.random()
+        if r < 0.1:
+            block = f"<h2>{sentence()}</h2>"
+        elif r < 0.2:
+            block = "<ul>" + "".join(f"<li>{sentence()}</li>" for _ in range(3)) + "</ul>"
+        elif r < 0.25:
+            block = f"<table><tbody><tr><td>{sentence()}</td><td>{sentence()}</td></tr></tbody></table>"
+        else:
+            block = "<p>" + " ".join(sentence() for _ in range(random.randint(1, 8))) + "</p>"
+        blocks.append(block)
+        size += len(block)
+    return "\n".join(blocks)
+
+def test_chunking_benchmark():
+    html_file_path = os.path.join("/websocket_tmp/texts/", 'ocr_output.html')
+    if os.path.exists(html_file_path):
+        with open(html_file_path, 'r', encoding='utf-8') as file:
+            html_content = file.read()
+    else:
+        html_content = build_sample_ocr_html(size_mb=4)
+    size_mb = len(html_content.encode("utf-8")) / (1024 * 1024)
+    manager = BaseAIManager()
+    for chunk_mode in ["html_aware", "single_pass"]:
+        start = time.perf_counter()
+        chunks = manager.build_chunks(text=html_content, max_chunk_size=1000, chunk_mode=chunk_mode)
+        elapsed = time.perf_counter() - start
+        print(f"{chunk_mode}: {len(chunks)} chunks from {size_mb:.1f} MB in {elapsed:.2f}s ({size_mb / elapsed:.2f} MB/s)")
+
 def test_ai_tts():
     manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
     # Simulate SSML tags for OpenAI TTS
@@ -140,6 +187,271 @@ def test_document_ai_ocr():
         file.write(html_output)
     print(f"Successfully Done!")
 
+def test_ocr_preprocessing_benchmark():
+    manager = OCRManager(
+        google_cloud_project_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROJECT_ID,
+        google_cloud_location=settings.GOOGLE_CLOUD_DOCUMENT_AI_LOCATION,
+        google_cloud_processor_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROCESSOR_ID
+    )
+    pdf_file_path = os.path.join("/websocket_tmp/texts/", 'The Data Science Handbook.pdf')
+    with open(pdf_file_path, 'rb') as pdf_file:
+        pdf_bytes = pdf_file.read()
+    doc_hash = manager.raster_manager.open(pdf_bytes)
+    pages = [png_bytes for _, png_bytes in manager.raster_manager.iter_pages(doc_hash, page_numbers=range(20, 30))]
+    manager.raster_manager.close(doc_hash)
+
+    start = time.perf_counter()
+    legacy_size = 0
+    for png_bytes in pages:
+        legacy_size += len(manager._png_bytes_to_pdf_bytes(manager.make_img_more_readable(png_bytes)))
+    elapsed = time.perf_counter() - start
+    print(f"legacy: {elapsed / len(pages) * 1000:.0f} ms/page, {legacy_size / len(pages) / 1024:.0f} KB/page")
+
+    for options in [
+        {"grayscale": False, "binarize": False},
+        {"grayscale": True, "binarize": False},
+        {"grayscale": True, "binarize": True},
+    ]:
+        start = time.perf_counter()
+        size = 0
+        for png_bytes in pages:
+            im = manager.enhance_image_for_ocr(Image.open(BytesIO(png_bytes)), source_dpi=manager.raster_manager.dpi, **options)
+            size += len(manager.images_to_pdf_bytes([im], resolution=manager.raster_manager.dpi))
+        elapsed = time.perf_counter() - start
+        print(f"{options}: {elapsed / len(pages) * 1000:.0f} ms/page, {size / len(pages) / 1024:.0f} KB/page")
+
+def test_ocr_job():
+    manager = OCRManager(
+        google_cloud_project_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROJECT_ID,
+        google_cloud_location=settings.GOOGLE_CLOUD_DOCUMENT_AI_LOCATION,
+        google_cloud_processor_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROCESSOR_ID
+    )
+    pdf_file_path = os.path.join("/websocket_tmp/texts/", 'The Data Science Handbook.pdf')
+    with open(pdf_file_path, 'rb') as pdf_file:
+        pdf_bytes = pdf_file.read()
+    job_manager = OCRJobManager(manager)
+    job_id = job_manager.build_job_id(pdf_bytes)
+    print(job_manager.get_status(job_id, start_page=20, end_page=30))
+    # Interrupt and re-run: stored pages are skipped and not billed again
+    html_src, simple_text = job_manager.run(pdf_bytes, start_page=20, end_page=30, max_workers=4)
+    print(job_manager.get_status(job_id, start_page=20, end_page=30), f"Cost: {manager.get_cost()}")
+    # A wider range reuses pages 20-30 and only OCRs the new ones
+    html_src, simple_text = job_manager.run(pdf_bytes, start_page=15, end_page=35, max_workers=4)
+    print(job_manager.get_result(job_id, start_page=15, end_page=35) is not None, f"Cost: {manager.get_cost()}")
+    with open(os.path.join("/websocket_tmp/texts/", 'ocr_job_output.html'), 'w', encoding='utf-8') as file:
+        file.write(html_src)
+
+def test_ocr_page_cache():
+    manager = OCRManager(
+        google_cloud_project_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROJECT_ID,
+        google_cloud_location=settings.GOOGLE_CLOUD_DOCUMENT_AI_LOCATION,
+        google_cloud_processor_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROCESSOR_ID
+    )
+    manager.enable_page_cache()
+    pdf_file_path = os.path.join("/websocket_tmp/texts/", 'The Data Science Handbook.pdf')
+    with open(pdf_file_path, 'rb') as pdf_file:
+        pdf_bytes = pdf_file.read()
+    for _ in range(2):
+        manager.clear_cost()
+        manager.read_pdf_bytes(pdf_bytes, start_page=20, end_page=25, max_workers=4)
+        print(f"Cost: {manager.get_cost()}", manager.get_page_cache_stats())
+
+def test_ocr_layout():
+    manager = OCRManager(
+        google_cloud_project_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROJECT_ID,
+        google_cloud_location=settings.GOOGLE_CLOUD_DOCUMENT_AI_LOCATION,
+        google_cloud_processor_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROCESSOR_ID
+    )
+    pdf_file_path = os.path.join("/websocket_tmp/texts/", 'The Data Science Handbook.pdf')
+    with open(pdf_file_path, 'rb') as pdf_file:
+        pdf_bytes = pdf_file.read()
+    layout, simple_text = manager.read_pdf_layout(pdf_bytes, start_page=20, end_page=25, max_workers=4)
+    with open(os.path.join("/websocket_tmp/texts/", 'ocr_layout.json'), 'w', encoding='utf-8') as file:
+        json.dump(layout, file, ensure_ascii=False, indent=2)
+    chunks = BaseAIManager().build_chunks(layout, max_chunk_size=1000)
+    for chunk in chunks:
+        print(chunk["pages"], chunk["text"][:80])
+
+def test_ocr_pdf_file():
+    manager = OCRManager(
+        google_cloud_project_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROJECT_ID,
+        google_cloud_location=settings.GOOGLE_CLOUD_DOCUMENT_AI_LOCATION,
+        google_cloud_processor_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROCESSOR_ID
+    )
+    pdf_file_path = os.path.join("/websocket_tmp/texts/", 'The Data Science Handbook.pdf')
+    tracemalloc.start()
+    html_src, simple_text = manager.read_pdf_file(pdf_file_path, start_page=20, end_page=40, max_workers=4)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"File size: {os.path.getsize(pdf_file_path) / (1024 * 1024):.1f} MB, peak memory: {peak / (1024 * 1024):.1f} MB")
+    with open(os.path.join("/websocket_tmp/texts/", 'ocr_file_output.html'), 'w', encoding='utf-8') as file:
+        file.write(html_src)
+
+def build_sample_docai_blocks(pages=300, depth=4):
+    def text_block(text, type_, children):
+        return SimpleNamespace(table_block=None, image_block=None, text_block=SimpleNamespace(text=text, type_=type_, blocks=children), blocks=[])
+    def section(level):
+        children = [section(level + 1) for _ in range(2)] if level < depth else []
+        paragraphs = [text_block(f"Paragraph {random.random()} about relativity & light.", "paragraph", []) for _ in range(3)]
+        items = [text_block(f"• item {i}", "paragraph", []) for i in range(3)]
+        cells = [SimpleNamespace(blocks=[text_block(f"cell {i}", "paragraph", [])], row_span=1, col_span=1) for i in range(3)]
+        table = SimpleNamespace(table_block=SimpleNamespace(header_rows=[SimpleNamespace(cells=cells)], body_rows=[SimpleNamespace(cells=cells)] * 2), blocks=[])
+        return text_block(f"Section level {level}", f"heading-{level}", paragraphs + items + [table] + children)
+    return [section(1) for _ in range(pages)]
+
+class RecursiveDocAIManager(DocAIManager):
+    """
+    DocAIManager with the previous recursive renderer, used as the baseline of test_docai_render_benchmark.
+    """
+    def _text_from_blocks_recursive(self, blocks):
+        """
+        Recursively extracts and concatenates text from a list of blocks.
+        Legacy implementation of DocAIManager._text_from_blocks.
+
+        Args:
+            blocks (list): List of block objects (may have 'text_block' or nested 'blocks').
+
+        Returns:
+            str: Concatenated text from all blocks.
+        """
+        parts = []
+        for b in blocks or []:
+            tb = getattr(b, "text_block", None)
+            if tb and getattr(tb, "text", None):
+                parts.append(tb.text)
+            child_b = getattr(b, "blocks", None)
+            if child_b:
+                parts.append(self._text_from_blocks_recursive(child_b))
+            if tb:
+                child_tb = getattr(tb, "blocks", None)
+                if child_tb:
+                    parts.append(self._text_from_blocks_recursive(child_tb))
+        return " ".join(p.strip() for p in parts if p and p.strip())
+    
+    def _render_table_recursive(self, table_block):
+        """
+        Renders a table block into HTML table markup.
+        Legacy implementation of DocAIManager._render_table.
+
+        Args:
+            table_block: An object representing a table (with header_rows, body_rows, and cell spans).
+
+        Returns:
+            str: HTML string for the table.
+        """
+        def row_html(row, cell_tag="td"):
+            cells_html = []
+            for cell in getattr(row, "cells", []) or []:
+                txt = self._text_from_blocks_recursive(getattr(cell, "blocks", None))
+                attrs = []
+                if getattr(cell, "row_span", 1) > 1:
+                    attrs.append(f'rowspan="{cell.row_span}"')
+                if getattr(cell, "col_span", 1) > 1:
+                    attrs.append(f'colspan="{cell.col_span}"')
+                attr_str = (" " + " ".join(attrs)) if attrs else ""
+                cells_html.append(f"<{cell_tag}{attr_str}>{html.escape((txt or '').strip())}</{cell_tag}>")
+            return "<tr>" + "".join(cells_html) + "</tr>"
+        out = ["<table>"]
+        hdrs = getattr(table_block, "header_rows", None)
+        if hdrs:
+            out.append("<thead>")
+            for hr in hdrs:
+                out.append(row_html(hr, "th"))
+            out.append("</thead>")
+        out.append("<tbody>")
+        for br in getattr(table_block, "body_rows", []) or []:
+            out.append(row_html(br, "td"))
+        out.append("</tbody></table>")
+        return "".join(out)
+    
+    def _render_html_blocks_recursive(self, blocks):
+        """
+        Renders a list of document blocks into HTML, handling tables, images, headings, lists, and paragraphs.
+        Legacy implementation of DocAIManager.render_html_blocks.
+
+        Args:
+            blocks (list): List of block objects from Document AI or similar sources.
+
+        Returns:
+            str: HTML string representing the rendered document.
+        """
+        out = []
+        i = 0
+        n = len(blocks or [])
+        while i < n:
+            b = blocks[i]
+            tb = getattr(b, "table_block", None)
+            if tb:
+                out.append(self._render_table_recursive(tb))
+                i += 1
+                continue
+            ib = getattr(b, "image_block", None)
+            if ib:
+                uri = getattr(ib, "image_uri", None)
+                if uri:
+                    out.append(f"<img src='{html.escape(uri)}' alt='Document image'/>")
+                i += 1
+                continue
+            x = getattr(b, "text_block", None)
+            if x:
+                raw = (getattr(x, "text", "") or "").strip()
+                ttype = (getattr(x, "type_", "") or "").lower()
+                if ttype in ("footer", "page-number"):
+                    i += 1
+                    continue
+                if self._is_noise_line(raw):
+                    i += 1
+                    continue
+                if raw.startswith(("•", "-")):
+                    items = []
+                    while i < n:
+                        b2 = blocks[i]
+                        x2 = getattr(b2, "text_block", None)
+                        if not x2:
+                            break
+                        t2 = (getattr(x2, "text", "") or "").strip()
+                        if not t2.startswith(("•", "-")):
+                            break
+                        items.append(f"<li>{html.escape(t2.lstrip('•-').strip())}</li>")
+                        i += 1
+                    out.append("<ul>" + "".join(items) + "</ul>")
+                    continue
+
+                tag = self._map_heading_tag(ttype)
+                esc = html.escape(raw)
+                if tag:
+                    out.append(f"<{tag}>{esc}</{tag}>")
+                elif ttype in ("caption", "figcaption"):
+                    out.append(f"<figcaption>{esc}</figcaption>")
+                else:
+                    out.append(f"<p>{esc}</p>")
+                child_blocks = getattr(b, "blocks", None)
+                if child_blocks:
+                    out.append(self._render_html_blocks_recursive(child_blocks))
+                tb_child = getattr(x, "blocks", None)
+                if tb_child:
+                    out.append(self._render_html_blocks_recursive(tb_child))
+                i += 1
+                continue
+            child_blocks = getattr(b, "blocks", None)
+            if child_blocks:
+                out.append(self._render_html_blocks_recursive(child_blocks))
+            i += 1
+        return "".join(out)
+
+def test_docai_render_benchmark():
+    blocks = build_sample_docai_blocks(pages=300)
+    manager = DocAIManager()
+    legacy_manager = RecursiveDocAIManager()
+    start = time.perf_counter()
+    legacy_html = legacy_manager._render_html_blocks_recursive(blocks)
+    legacy_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    html_output = manager.render_html_blocks(blocks)
+    elapsed = time.perf_counter() - start
+    print(f"identical: {html_output == legacy_html}, {len(html_output) / (1024 * 1024):.1f} MB")
+    print(f"recursive: {legacy_elapsed:.2f}s, iterative: {elapsed:.2f}s ({legacy_elapsed / elapsed:.2f}x)")
+
 def test_google_tts_farsi():
     manager = GoogleAIManager(api_key=settings.GOOGLE_API_KEY)
     text = (
@@ -427,6 +739,17 @@ def test_build_rag_materials_for_text():
     with open("/websocket_tmp/texts/rag.json", "w", encoding="utf-8") as f:
         json.dump(rag_materials, f, ensure_ascii=False, indent=2)
 
+def test_rag_store():
+    html_path = os.path.join("/websocket_tmp/texts/", 'Relativity4.html')
+    with open(html_path, 'r', encoding="utf-8") as file:
+        html_src = file.read()
+    store = RagStoreManager()
+    document = store.ingest_text(html_src, title="Relativity", max_concurrency=4)
+    results = store.search("What is the principle of relativity?", top_k=3, document_ids=[document.id])
+    for result in results:
+        print(f"{result['chunk_number']} ({result['score']:.3f}): {result['text'][:100]}")
+    store.delete_document(document.id)
+
 def test_advanced_stt():
     audio_path = os.path.join("/websocket_tmp/me/", 'chunk_0.wav')
     with open(audio_path, 'rb') as file:
@@ -447,10 +770,122 @@ def test_convert_audio_to_text():
         print(f"Progress: {chunk_index + 1}/{total_chunks}")
     def chunk_progress_callback(chunk_index, total_chunks, chunk_text):
         print(f"Chunk Progress: {chunk_index + 1}/{total_chunks}")
-    result = audio_manager.convert_audio_to_text(audio_bytes, chunk_duration_sec=30, do_final_edition=True, progress_callback=progress_callback, input_format='m4a', chunk_progress_callback=chunk_progress_callback)
+    start = time.time()
+    result = audio_manager.convert_audio_to_text(audio_bytes, chunk_duration_sec=30, do_final_edition=True, progress_callback=progress_callback, input_format='m4a', chunk_progress_callback=chunk_progress_callback, max_concurrency=8)
+    print(f"Transcribed in {time.time() - start:.1f}s")
     with open("/websocket_tmp/me/convert_audio_to_text_result_now.html", "w", encoding="utf-8") as f:
         f.write(result)
 
+def build_sample_wav(duration_sec=2 * 60 * 60, sample_rate=16000):
+    import numpy as np
+    import wave
+    t = np.arange(int(duration_sec * sample_rate), dtype=np.float32) / sample_rate
+    samples = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+    buffer = BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+def test_audio_segmentation_benchmark():
+    wav_bytes = build_sample_wav(duration_sec=2 * 60 * 60)
+    audio_manager = AudioManager()
+    chunk_duration_sec = 60
+    total_duration = audio_manager.get_wav_duration(wav_bytes)
+    num_chunks = int(total_duration // chunk_duration_sec) + (1 if total_duration % chunk_duration_sec > 0 else 0)
+    # Old path: every chunk re-reads the audio from the start (the ffmpeg re-decode of convert_webm_to_wav is not even counted).
+    start = time.time()
+    old_sizes = []
+    for chunk_idx in range(num_chunks):
+        wav_data = audio_manager.limit_wav_duration(wav_bytes, chunk_duration_sec * (chunk_idx + 1))
+        old_sizes.append(len(audio_manager.skip_seconds_wav(wav_data, chunk_idx * chunk_duration_sec)))
+    old_time = time.time() - start
+    start = time.time()
+    new_sizes = []
+    for segment in audio_manager.segment_wav(wav_bytes, segment_duration_sec=chunk_duration_sec):
+        new_sizes.append(len(audio_manager.pcm_to_wav(segment["pcm"], segment["params"])))
+    new_time = time.time() - start
+    assert old_sizes == new_sizes
+    start = time.time()
+    audio_manager.convert_webm_to_wav(wav_bytes)
+    decode_time = time.time() - start
+    print(f"{num_chunks} chunks of {chunk_duration_sec}s over {total_duration / 3600:.1f}h of audio")
+    print(f"Per-chunk slicing: {old_time:.2f}s + ~{decode_time * num_chunks:.0f}s of ffmpeg re-decodes ({decode_time:.2f}s each)")
+    print(f"Segment once: {new_time:.2f}s ({old_time / max(new_time, 1e-9):.0f}x faster without counting ffmpeg)")
+
+def build_sample_speech_wav(duration_sec=60 * 60, sample_rate=16000):
+    import numpy as np
+    import wave
+    rng = np.random.default_rng(0)
+    parts = []
+    elapsed = 0
+    while elapsed < duration_sec:
+        speech = rng.uniform(2, 12)
+        pause = rng.uniform(0.3, 0.8) if rng.random() < 0.7 else rng.uniform(1.5, 6)
+        parts.append(rng.normal(0, 3000, int(speech * sample_rate)))
+        parts.append(rng.normal(0, 30, int(pause * sample_rate)))
+        elapsed += speech + pause
+    samples = np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+    buffer = BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+def test_vad_segmentation():
+    wav_bytes = build_sample_speech_wav(duration_sec=60 * 60)
+    audio_manager = AudioManager()
+    start = time.time()
+    segments = audio_manager.segment_wav_by_silence(wav_bytes, target_duration_sec=60)
+    print(f"VAD segmentation: {time.time() - start:.2f}s, {audio_manager.last_segmentation_stats}")
+    fixed_segments = audio_manager.segment_wav(wav_bytes, segment_duration_sec=60)
+    stats = audio_manager.last_segmentation_stats
+    print(f"Fixed: {len(fixed_segments)} segments, {stats['audio_sec'] / 60:.1f} billed minutes")
+    print(f"VAD: {len(segments)} segments, {stats['speech_sec'] / 60:.1f} billed minutes")
+    for segment in segments[:5]:
+        print(f"Segment {segment['index']}: {segment['start']:.2f}s - {segment['end']:.2f}s")
+
+def test_audio_decode_and_preprocess():
+    audio_path = os.path.join("/websocket_tmp/me/", 'tavalod.m4a')
+    with open(audio_path, 'rb') as file:
+        audio_bytes = file.read()
+    audio_manager = AudioManager()
+    start = time.time()
+    two_pass_wav = audio_manager.preprocess_wav(audio_manager.convert_audio_bytes_to_wav(audio_bytes, input_format='m4a'))
+    two_pass_time = time.time() - start
+    start = time.time()
+    one_pass_wav = audio_manager.decode_and_preprocess(audio_bytes, input_format='m4a')
+    one_pass_time = time.time() - start
+    print(f"Convert + preprocess (2 ffmpeg processes): {two_pass_time:.2f}s, {audio_manager.get_wav_duration(two_pass_wav):.1f}s of audio")
+    print(f"Decode and preprocess (1 ffmpeg process): {one_pass_time:.2f}s, {audio_manager.get_wav_duration(one_pass_wav):.1f}s of audio")
+
+def test_audio_decoder_pool_benchmark(clips=200, max_workers=4):
+    audio_path = os.path.join("/websocket_tmp/me/", 'voice_message.webm')
+    with open(audio_path, 'rb') as file:
+        audio_bytes = file.read()
+    from concurrent.futures import ThreadPoolExecutor
+    modes = [("ffmpeg per call", None), ("ffmpeg pool", AudioDecoderPool(backend="ffmpeg", max_workers=max_workers))]
+    try:
+        modes.append(("pyav pool", AudioDecoderPool(backend="pyav", max_workers=max_workers)))
+    except ImportError:
+        print("PyAV is not installed, skipping the pyav backend")
+    for name, decoder_pool in modes:
+        audio_manager = AudioManager(decoder_pool=decoder_pool)
+        cpu_start = sum(os.times()[:4])
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(lambda _: audio_manager.decode_and_preprocess(audio_bytes), range(clips)))
+        elapsed = time.time() - start
+        cpu_time = sum(os.times()[:4]) - cpu_start
+        print(f"{name}: {clips / elapsed:.1f} clips/s, {clips / cpu_time:.1f} clips per CPU second")
+        if decoder_pool:
+            print(decoder_pool.stats)
+            decoder_pool.close()
+
 def test_advanced_teaching_content():
     pdf_path = os.path.join("/websocket_tmp/texts/", 'Relativity4.pdf')
     with open(pdf_path, 'rb') as file:
@@ -65,6 +65,26 @@ class CloudStorageManager:
             print(f"Get URL error: {e}")
             return ""
 
+    def download_file(self, destination, bucket="images", file_key="nested/test_img.svg"):
+        """Download a file to a local path or a binary file object, streaming it in parts instead of loading it in memory."""
+        try:
+            if isinstance(destination, str):
+                self.client.download_file(Bucket=bucket, Key=file_key, Filename=destination)
+            else:
+                self.client.download_fileobj(Bucket=bucket, Key=file_key, Fileobj=destination)
+            return True
+        except Exception as e:
+            print(f"Download error: {e}")
+            return False
+
+    def get_file_stream(self, bucket="images", file_key="nested/test_img.svg"):
+        """Get a readable binary stream of a file (e.g. for OCRManager.read_pdf_file), or None on error."""
+        try:
+            return self.client.get_object(Bucket=bucket, Key=file_key)["Body"]
+        except Exception as e:
+            print(f"Get stream error: {e}")
+            return None
+
     def delete_file(self, bucket="images", file_key="nested/test_img.svg"):
         """Delete a file from storage."""
         try:
@@ -3,6 +3,7 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 import json
 import functools
 import asyncio
+import uuid
 from rest_framework_simplejwt.tokens import AccessToken
 from urllib.parse import parse_qs
 from asgiref.sync import sync_to_async
@@ -117,6 +118,32 @@ class BasePrivateRoomBasedConsumer(BasePrivateConsumer):
             event
         )
     
+    async def _stream_to_group(self, deltas, stream_id=None, event_type="broadcast_message"):
+        """
+        Forward text deltas (e.g. from OpenAIManager.astream_response or stream_response) to the room group as they arrive.
+        Each delta is sent as {"stream_id", "delta", "done": False}; once the stream ends the full text is sent as {"stream_id", "text", "done": True}.
+        Sync iterators are advanced on the executor so they never block the event loop.
+        Returns the full streamed text.
+        """
+        stream_id = stream_id or uuid.uuid4().hex
+        parts = []
+        if hasattr(deltas, "__aiter__"):
+            async for delta in deltas:
+                parts.append(delta)
+                await self._send_to_group({"stream_id": stream_id, "delta": delta, "done": False}, event_type=event_type)
+        else:
+            iterator = iter(deltas)
+            sentinel = object()
+            while True:
+                delta = await self._run_blocking(next, iterator, sentinel)
+                if delta is sentinel:
+                    break
+                parts.append(delta)
+                await self._send_to_group({"stream_id": stream_id, "delta": delta, "done": False}, event_type=event_type)
+        text = "".join(parts)
+        await self._send_to_group({"stream_id": stream_id, "text": text, "done": True}, event_type=event_type)
+        return text
+
     async def _can_user_join_room(self):
         return True
     